@@ -2,10 +2,11 @@
 # Analyse complete du PDF 02-Machines-.pdf
 
 import fitz
-import re
 from collections import defaultdict
 
-TAG_PATTERN = re.compile(r'([A-Z]{2,4}\d{3,4}[-_]\d{3,4})', re.IGNORECASE)
+from pdf_extraction.csv_reference import load_tag_qty, nesting_dir_for
+from pdf_extraction.rows import row_lines
+from pdf_extraction.tags import TAG_PATTERN, tag_from_match
 
 pdf_path = r'C:\Vault\Engineering\Projects\10381\REF13\M02\6-Shop Drawing PDF\Production\BatchPrint\02-Machines-.pdf'
 
@@ -19,19 +20,14 @@ tag_occurrences = defaultdict(list)
 
 for page_num, page in enumerate(doc):
     words = page.get_text('words')
-    lines = defaultdict(list)
-    for w in words:
-        y_key = round(w[1] / 5) * 5
-        lines[y_key].append({'text': w[4], 'x': w[0]})
-    
-    for y_key in sorted(lines.keys()):
-        line_words = sorted(lines[y_key], key=lambda w: w['x'])
+    for line in row_lines(words).values():
+        line_words = [{'text': w[4], 'x': w[0]} for w in line]
         tags = []
         numbers = []
         for w in line_words:
             m = TAG_PATTERN.match(w['text'])
             if m:
-                tags.append({'tag': m.group(1).upper().replace('_','-'), 'x': w['x']})
+                tags.append({'tag': tag_from_match(m), 'x': w['x']})
             if w['text'].isdigit() and len(w['text']) <= 3:
                 numbers.append({'qty': int(w['text']), 'x': w['x']})
         
@@ -105,18 +101,7 @@ print('=' * 70)
 print('COMPARAISON AVEC CSV:')
 
 csv_path = r'C:\Vault\Engineering\Projects\10381\REF13\M02\5_Exportation\Sheet_Metal_Nesting\Punch\10381-13-M02.csv'
-csv_tags = {}
-with open(csv_path, 'r', encoding='utf-8-sig') as f:
-    for line in f:
-        parts = re.split(r'[;,]', line)
-        if len(parts) >= 2:
-            try:
-                qty = int(parts[0].strip())
-                m = TAG_PATTERN.search(parts[1].strip())
-                if m:
-                    csv_tags[m.group(1).upper().replace('_','-')] = qty
-            except:
-                pass
+csv_tags = load_tag_qty(nesting_dir_for(csv_path))
 
 print(f'CSV: {len(csv_tags)} tags')
 print(f'PDF: {len(tag_qty_extracted)} tags')
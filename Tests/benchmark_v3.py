@@ -1,35 +1,25 @@
 # -*- coding: utf-8 -*-
 # PDF TABLE EXTRACTION BENCHMARK v3
 
-import re
 import os
-from collections import defaultdict
+
+from pdf_extraction.csv_reference import load_tag_qty, nesting_dir_for
+from pdf_extraction.lattice import iter_lattice_tables
+from pdf_extraction.neighbors import next_word_pairs, score_page_matrix
+from pdf_extraction.results_store import ResultRecorder, timed
+from pdf_extraction.rows import plumber_box, row_lines
+from pdf_extraction.streaming import iter_fitz_words, iter_pdfplumber_words
+from pdf_extraction.tags import QTY_TAG_PATTERN, TAG_PATTERN, TAG_QTY_PATTERN, tag_from_match
+from pdf_extraction.templates import QTY_HEADERS, TAG_HEADERS, TemplateCache, grid_pages, header_column_pages
 
 PDF_PATH = r"C:\Vault\Engineering\Projects\10381\REF13\M02\6-Shop Drawing PDF\Production\BatchPrint\02-Machines.pdf"
 CSV_PATH = r"C:\Vault\Engineering\Projects\10381\REF13\M02\5_Exportation\Sheet_Metal_Nesting\Punch\10381-13-M02.csv"
 
-TAG_PATTERN = re.compile(r'([A-Z]{2,4}\d{3,4}[-_]\d{3,4})', re.IGNORECASE)
-
-QTY_HEADERS = ['qty', 'quantity', 'quantite', 'qte', 'nb', 'nombre', 'count', 'pcs', 'pieces', 'units', 'amt']
-TAG_HEADERS = ['item', 'tag', 'part', 'piece', 'file', 'filename', 'fichier', 'name', 'ref', 'drawing', 'dxf']
 
 def load_csv_reference():
-    tag_qty = {}
-    if not os.path.exists(CSV_PATH):
-        print(f"[-] CSV non trouve: {CSV_PATH}")
-        return tag_qty
-    with open(CSV_PATH, 'r', encoding='utf-8-sig') as f:
-        for line in f:
-            parts = re.split(r'[;,]', line)
-            if len(parts) >= 2:
-                try:
-                    qty = int(parts[0].strip())
-                except:
-                    continue
-                match = TAG_PATTERN.search(parts[1].strip())
-                if match:
-                    tag = match.group(1).upper().replace("_", "-")
-                    tag_qty[tag] = qty
+    tag_qty = load_tag_qty(nesting_dir_for(CSV_PATH))
+    if not tag_qty:
+        print(f"[-] CSV non trouve sous: {nesting_dir_for(CSV_PATH)}")
     return tag_qty
 
 def evaluate(method, extracted, reference):
@@ -46,43 +36,11 @@ def evaluate(method, extracted, reference):
     }
 
 def test_auto_structure():
-    import pdfplumber
     tag_qty = {}
     try:
-        with pdfplumber.open(PDF_PATH) as pdf:
-            for page in pdf.pages:
-                words = page.extract_words()
-                lines = defaultdict(list)
-                for w in words:
-                    lines[round(w['top'], 0)].append(w)
-                
-                header_y = None
-                qty_col_x = None
-                for y in sorted(lines.keys())[:15]:
-                    for w in lines[y]:
-                        if any(h in w['text'].lower() for h in QTY_HEADERS):
-                            header_y = y
-                            qty_col_x = w['x0']
-                            break
-                    if header_y:
-                        break
-                
-                for y in sorted(lines.keys()):
-                    if header_y and y <= header_y:
-                        continue
-                    line_words = sorted(lines[y], key=lambda w: w['x0'])
-                    tag = None
-                    qty = None
-                    for w in line_words:
-                        if TAG_PATTERN.match(w['text']):
-                            tag = TAG_PATTERN.match(w['text']).group(1).upper().replace("_", "-")
-                        if w['text'].isdigit():
-                            if qty_col_x and abs(w['x0'] - qty_col_x) < 30:
-                                qty = int(w['text'])
-                            elif qty is None:
-                                qty = int(w['text'])
-                    if tag and qty is not None and tag not in tag_qty:
-                        tag_qty[tag] = qty
+        # Entete et colonne Qty: gabarit deja vu, detecte, ou suite de la page precedente
+        tag_qty = header_column_pages(iter_pdfplumber_words(PDF_PATH),
+                                      TemplateCache(QTY_HEADERS, TAG_HEADERS, max_lines=15))
     except Exception as e:
         print(f"    [-] Erreur: {e}")
     return tag_qty
@@ -94,9 +52,7 @@ def test_multi_strategy():
         with pdfplumber.open(PDF_PATH) as pdf:
             for page in pdf.pages:
                 words = page.extract_words()
-                lines = defaultdict(list)
-                for w in words:
-                    lines[round(w['top'], 0)].append(w)
+                lines = row_lines(words, plumber_box)
                 
                 for y in sorted(lines.keys()):
                     line_words = sorted(lines[y], key=lambda w: w['x0'])
@@ -106,7 +62,7 @@ def test_multi_strategy():
                     tag_match = TAG_PATTERN.search(line_text)
                     if not tag_match:
                         continue
-                    tag = tag_match.group(1).upper().replace("_", "-")
+                    tag = tag_from_match(tag_match)
                     tag_idx = None
                     for i, w in enumerate(line_words):
                         if TAG_PATTERN.match(w['text']):
@@ -132,155 +88,92 @@ def test_multi_strategy():
         print(f"    [-] Erreur: {e}")
     return tag_qty
 
+def _smart_tables_tag_qty(tables, tag_qty):
+    """Ajoute a tag_qty les paires des tableaux (lignes de cellules, entete en premiere ligne)"""
+    for table in tables:
+        if not table or len(table) < 2:
+            continue
+        header = table[0] if table else []
+        tag_col = qty_col = None
+        for i, cell in enumerate(header):
+            if cell:
+                cl = str(cell).lower()
+                if any(h in cl for h in TAG_HEADERS) and tag_col is None:
+                    tag_col = i
+                if any(h in cl for h in QTY_HEADERS) and qty_col is None:
+                    qty_col = i
+        if tag_col is None:
+            for row in table[1:5]:
+                for i, cell in enumerate(row):
+                    if cell and TAG_PATTERN.match(str(cell)):
+                        tag_col = i
+                        qty_col = i - 1 if i > 0 else i + 1
+                        break
+                if tag_col is not None:
+                    break
+        for row in table[1:]:
+            if not row:
+                continue
+            tag = qty = None
+            if tag_col is not None and tag_col < len(row) and row[tag_col]:
+                m = TAG_PATTERN.search(str(row[tag_col]))
+                if m:
+                    tag = tag_from_match(m)
+            if not tag:
+                for cell in row:
+                    if cell:
+                        m = TAG_PATTERN.search(str(cell))
+                        if m:
+                            tag = tag_from_match(m)
+                            break
+            if qty_col is not None and qty_col < len(row) and row[qty_col]:
+                if str(row[qty_col]).strip().isdigit():
+                    qty = int(row[qty_col])
+            if qty is None:
+                for cell in row:
+                    if cell and str(cell).strip().isdigit():
+                        qty = int(cell)
+                        break
+            if tag and qty is not None and tag not in tag_qty:
+                tag_qty[tag] = qty
+
 def test_smart_tables():
     import pdfplumber
     tag_qty = {}
     try:
         with pdfplumber.open(PDF_PATH) as pdf:
             for page in pdf.pages:
-                for table in page.extract_tables():
-                    if not table or len(table) < 2:
-                        continue
-                    header = table[0] if table else []
-                    tag_col = qty_col = None
-                    for i, cell in enumerate(header):
-                        if cell:
-                            cl = str(cell).lower()
-                            if any(h in cl for h in TAG_HEADERS) and tag_col is None:
-                                tag_col = i
-                            if any(h in cl for h in QTY_HEADERS) and qty_col is None:
-                                qty_col = i
-                    if tag_col is None:
-                        for row in table[1:5]:
-                            for i, cell in enumerate(row):
-                                if cell and TAG_PATTERN.match(str(cell)):
-                                    tag_col = i
-                                    qty_col = i - 1 if i > 0 else i + 1
-                                    break
-                            if tag_col is not None:
-                                break
-                    for row in table[1:]:
-                        if not row:
-                            continue
-                        tag = qty = None
-                        if tag_col is not None and tag_col < len(row) and row[tag_col]:
-                            m = TAG_PATTERN.search(str(row[tag_col]))
-                            if m:
-                                tag = m.group(1).upper().replace("_", "-")
-                        if not tag:
-                            for cell in row:
-                                if cell:
-                                    m = TAG_PATTERN.search(str(cell))
-                                    if m:
-                                        tag = m.group(1).upper().replace("_", "-")
-                                        break
-                        if qty_col is not None and qty_col < len(row) and row[qty_col]:
-                            if str(row[qty_col]).strip().isdigit():
-                                qty = int(row[qty_col])
-                        if qty is None:
-                            for cell in row:
-                                if cell and str(cell).strip().isdigit():
-                                    qty = int(cell)
-                                    break
-                        if tag and qty is not None and tag not in tag_qty:
-                            tag_qty[tag] = qty
+                _smart_tables_tag_qty(page.extract_tables(), tag_qty)
+    except Exception as e:
+        print(f"    [-] Erreur: {e}")
+    return tag_qty
+
+def test_lattice_tables():
+    """Smart Tables sur les tableaux reconstruits depuis les traits vectoriels (sans Camelot)"""
+    tag_qty = {}
+    try:
+        for _, tables in iter_lattice_tables(PDF_PATH):
+            _smart_tables_tag_qty(tables, tag_qty)
     except Exception as e:
         print(f"    [-] Erreur: {e}")
     return tag_qty
 
 def test_pymupdf_grid():
-    import fitz
     tag_qty = {}
     try:
-        doc = fitz.open(PDF_PATH)
-        for page in doc:
-            words = page.get_text("words")
-            lines = defaultdict(list)
-            for w in words:
-                lines[round(w[1], 0)].append(w)
-            all_x = [round(w[0], -1) for w in words]
-            x_counts = defaultdict(int)
-            for x in all_x:
-                x_counts[x] += 1
-            columns = sorted([x for x, c in x_counts.items() if c >= 3])
-            def get_col(wx):
-                for i, cx in enumerate(columns):
-                    if abs(wx - cx) < 15:
-                        return i
-                return None
-            qty_col = header_y = None
-            for y in sorted(lines.keys())[:15]:
-                for w in lines[y]:
-                    if any(h in w[4].lower() for h in QTY_HEADERS):
-                        qty_col = get_col(w[0])
-                        header_y = y
-                        break
-                if header_y:
-                    break
-            for y in sorted(lines.keys()):
-                if header_y and y <= header_y:
-                    continue
-                line_words = sorted(lines[y], key=lambda w: w[0])
-                tag = qty = None
-                for w in line_words:
-                    word = w[4]
-                    col_idx = get_col(w[0])
-                    if TAG_PATTERN.match(word):
-                        tag = TAG_PATTERN.match(word).group(1).upper().replace("_", "-")
-                    if word.isdigit():
-                        if qty_col is not None and col_idx == qty_col:
-                            qty = int(word)
-                        elif qty is None:
-                            qty = int(word)
-                if tag and qty is not None and tag not in tag_qty:
-                    tag_qty[tag] = qty
-        doc.close()
+        # Colonnes du gabarit (reutilisees d'une page a l'autre), sinon celles de la page
+        tag_qty = grid_pages(iter_fitz_words(PDF_PATH), TemplateCache(QTY_HEADERS, TAG_HEADERS, max_lines=15))
     except Exception as e:
         print(f"    [-] Erreur: {e}")
     return tag_qty
 
-def test_scoring():
-    import pdfplumber
+def test_scoring(one_to_one=False):
     tag_qty = {}
     try:
-        with pdfplumber.open(PDF_PATH) as pdf:
-            for page in pdf.pages:
-                words = page.extract_words()
-                lines = defaultdict(list)
-                for w in words:
-                    lines[round(w['top'], 0)].append(w)
-                for y in sorted(lines.keys()):
-                    line_words = sorted(lines[y], key=lambda w: w['x0'])
-                    tags_found = []
-                    numbers_found = []
-                    for i, w in enumerate(line_words):
-                        if TAG_PATTERN.match(w['text']):
-                            tags_found.append((i, w['text'], w['x0']))
-                        if w['text'].isdigit():
-                            numbers_found.append((i, int(w['text']), w['x0']))
-                    if not tags_found or not numbers_found:
-                        continue
-                    for tag_idx, tag_text, tag_x in tags_found:
-                        tag = TAG_PATTERN.match(tag_text).group(1).upper().replace("_", "-")
-                        if tag in tag_qty:
-                            continue
-                        best_qty = None
-                        best_score = -999
-                        for num_idx, num_val, num_x in numbers_found:
-                            score = 0
-                            col_dist = abs(num_idx - tag_idx)
-                            score -= col_dist * 10
-                            if num_idx == tag_idx - 1:
-                                score += 50
-                            if num_idx == tag_idx + 1:
-                                score += 30
-                            if col_dist > 3:
-                                score -= 100
-                            if score > best_score:
-                                best_score = score
-                                best_qty = num_val
-                        if best_qty is not None:
-                            tag_qty[tag] = best_qty
+        for _, words in iter_pdfplumber_words(PDF_PATH):
+            for tag, qty, _ in score_page_matrix(words, one_to_one=one_to_one):
+                if tag not in tag_qty:
+                    tag_qty[tag] = qty
     except Exception as e:
         print(f"    [-] Erreur: {e}")
     return tag_qty
@@ -288,13 +181,13 @@ def test_scoring():
 def test_qty_tag_pattern():
     import fitz
     tag_qty = {}
-    pattern = re.compile(r'(\d+)\s+([A-Z]{2,4}\d{3,4}[-_]\d{3,4})', re.IGNORECASE)
+    pattern = QTY_TAG_PATTERN
     try:
         doc = fitz.open(PDF_PATH)
         for page in doc:
-            for match in pattern.findall(page.get_text()):
-                qty = int(match[0])
-                tag = match[1].upper().replace("_", "-")
+            for match in pattern.finditer(page.get_text()):
+                qty = int(match.group('qty'))
+                tag = tag_from_match(match)
                 if tag not in tag_qty:
                     tag_qty[tag] = qty
         doc.close()
@@ -307,13 +200,13 @@ def test_tag_qty_pattern():
     import fitz
     tag_qty = {}
     # Pattern plus flexible: Tag puis Qty avec possibles colonnes entre
-    pattern = re.compile(r'([A-Z]{2,4}\d{3,4}[-_]\d{3,4})\s+(\d+)', re.IGNORECASE)
+    pattern = TAG_QTY_PATTERN
     try:
         doc = fitz.open(PDF_PATH)
         for page in doc:
-            for match in pattern.findall(page.get_text()):
-                tag = match[0].upper().replace("_", "-")
-                qty = int(match[1])
+            for match in pattern.finditer(page.get_text()):
+                tag = tag_from_match(match)
+                qty = int(match.group('qty'))
                 if tag not in tag_qty:
                     tag_qty[tag] = qty
         doc.close()
@@ -323,32 +216,12 @@ def test_tag_qty_pattern():
 
 def test_column_based():
     """Extraction basee sur colonnes: Tag en col 1, Qty en col 2"""
-    import pdfplumber
     tag_qty = {}
     try:
-        with pdfplumber.open(PDF_PATH) as pdf:
-            for page in pdf.pages:
-                words = page.extract_words()
-                lines = defaultdict(list)
-                for w in words:
-                    lines[round(w['top'], 0)].append(w)
-                
-                for y in sorted(lines.keys()):
-                    line_words = sorted(lines[y], key=lambda w: w['x0'])
-                    if len(line_words) < 2:
-                        continue
-                    
-                    # Chercher Tag dans les premiers mots
-                    for i, w in enumerate(line_words):
-                        if TAG_PATTERN.match(w['text']):
-                            tag = TAG_PATTERN.match(w['text']).group(1).upper().replace("_", "-")
-                            # Qty est le mot suivant
-                            if i + 1 < len(line_words):
-                                next_text = line_words[i + 1]['text']
-                                if next_text.isdigit():
-                                    if tag not in tag_qty:
-                                        tag_qty[tag] = int(next_text)
-                            break
+        for _, words in iter_pdfplumber_words(PDF_PATH):
+            for tag, qty, _ in next_word_pairs(words):
+                if tag not in tag_qty:
+                    tag_qty[tag] = qty
     except Exception as e:
         print(f"    [-] Erreur: {e}")
     return tag_qty
@@ -369,52 +242,75 @@ def main():
         return
     
     results = []
+    recorder = ResultRecorder()
     
     print("[>] Methode 1: Auto Structure")
-    r = test_auto_structure()
+    r, ms = timed(test_auto_structure)
     e = evaluate("Auto Structure", r, reference)
+    recorder.add(PDF_PATH, "Auto Structure", r, reference, ms)
     print(f"    => {e['correct']}/{e['total']} ({e['accuracy']}%)")
     results.append(e)
     
     print("[>] Methode 2: Multi-Strategy")
-    r = test_multi_strategy()
+    r, ms = timed(test_multi_strategy)
     e = evaluate("Multi-Strategy", r, reference)
+    recorder.add(PDF_PATH, "Multi-Strategy", r, reference, ms)
     print(f"    => {e['correct']}/{e['total']} ({e['accuracy']}%)")
     results.append(e)
     
     print("[>] Methode 3: Smart Tables")
-    r = test_smart_tables()
+    r, ms = timed(test_smart_tables)
     e = evaluate("Smart Tables", r, reference)
+    recorder.add(PDF_PATH, "Smart Tables", r, reference, ms)
+    print(f"    => {e['correct']}/{e['total']} ({e['accuracy']}%)")
+    results.append(e)
+    
+    print("[>] Methode 3b: Lattice vectoriel (traits PyMuPDF)")
+    r, ms = timed(test_lattice_tables)
+    e = evaluate("Lattice Tables", r, reference)
+    recorder.add(PDF_PATH, "Lattice Tables", r, reference, ms)
     print(f"    => {e['correct']}/{e['total']} ({e['accuracy']}%)")
     results.append(e)
     
     print("[>] Methode 4: PyMuPDF Grid")
-    r = test_pymupdf_grid()
+    r, ms = timed(test_pymupdf_grid)
     e = evaluate("PyMuPDF Grid", r, reference)
+    recorder.add(PDF_PATH, "PyMuPDF Grid", r, reference, ms)
     print(f"    => {e['correct']}/{e['total']} ({e['accuracy']}%)")
     results.append(e)
     
     print("[>] Methode 5: Scoring")
-    r = test_scoring()
+    r, ms = timed(test_scoring)
     e = evaluate("Scoring", r, reference)
+    recorder.add(PDF_PATH, "Scoring", r, reference, ms)
+    print(f"    => {e['correct']}/{e['total']} ({e['accuracy']}%)")
+    results.append(e)
+    
+    print("[>] Methode 5b: Scoring 1-1 (un nombre par tag)")
+    r, ms = timed(test_scoring, one_to_one=True)
+    e = evaluate("Scoring 1-1", r, reference)
+    recorder.add(PDF_PATH, "Scoring 1-1", r, reference, ms)
     print(f"    => {e['correct']}/{e['total']} ({e['accuracy']}%)")
     results.append(e)
     
     print("[>] Methode 6: Pattern Qty+Tag")
-    r = test_qty_tag_pattern()
+    r, ms = timed(test_qty_tag_pattern)
     e = evaluate("Qty+Tag", r, reference)
+    recorder.add(PDF_PATH, "Qty+Tag", r, reference, ms)
     print(f"    => {e['correct']}/{e['total']} ({e['accuracy']}%)")
     results.append(e)
     
     print("[>] Methode 7: Pattern Tag+Qty (XNRGY Standard)")
-    r = test_tag_qty_pattern()
+    r, ms = timed(test_tag_qty_pattern)
     e = evaluate("Tag+Qty", r, reference)
+    recorder.add(PDF_PATH, "Tag+Qty", r, reference, ms)
     print(f"    => {e['correct']}/{e['total']} ({e['accuracy']}%)")
     results.append(e)
     
     print("[>] Methode 8: Column Based (Tag col1, Qty col2)")
-    r = test_column_based()
+    r, ms = timed(test_column_based)
     e = evaluate("Column Based", r, reference)
+    recorder.add(PDF_PATH, "Column Based", r, reference, ms)
     print(f"    => {e['correct']}/{e['total']} ({e['accuracy']}%)")
     results.append(e)
     
@@ -446,6 +342,10 @@ def main():
         for tag in best['missing_tags'][:5]:
             print(f"      - {tag}")
     
+    results_path = recorder.close()
+    if results_path:
+        print(f"\n[+] Resultats detailles: {results_path}")
+    
     print()
     print("=" * 80)
 
@@ -1,19 +1,15 @@
 # Debug WPA1302-0101
 import fitz
-import re
-from collections import defaultdict
 
-TAG_PATTERN = re.compile(r'([A-Z]{2,4}\d{3,4}[-_]\d{3,4})', re.IGNORECASE)
+from pdf_extraction.rows import row_lines
+from pdf_extraction.tags import TAG_PATTERN, tag_from_match
 
 pdf_path = r'C:\Vault\Engineering\Projects\10381\REF13\M02\6-Shop Drawing PDF\Production\BatchPrint\02-Machines-.pdf'
 doc = fitz.open(pdf_path)
 page = doc[16]  # Page 17
 
 words = page.get_text('words')
-lines = defaultdict(list)
-for w in words:
-    y_key = round(w[1] / 5) * 5
-    lines[y_key].append({'text': w[4], 'x': w[0]})
+lines = {y: [{'text': w[4], 'x': w[0]} for w in ws] for y, ws in row_lines(words).items()}
 
 # Trouver la ligne avec WPA1302-0101
 target_y = None
@@ -23,8 +19,8 @@ for y_key, line_words in lines.items():
             target_y = y_key
             break
 
-if target_y:
-    print(f'Ligne Y={target_y}:')
+if target_y is not None:
+    print(f'Ligne Y={target_y:.1f}:')
     line_words = sorted(lines[target_y], key=lambda w: w['x'])
     
     tags = []
@@ -32,7 +28,7 @@ if target_y:
     for w in line_words:
         m = TAG_PATTERN.match(w['text'])
         if m:
-            tags.append({'tag': m.group(1).upper().replace('_','-'), 'x': w['x'], 'text': w['text']})
+            tags.append({'tag': tag_from_match(m), 'x': w['x'], 'text': w['text']})
             print(f'  TAG: {w["text"]} @ x={w["x"]:.0f}')
         if w['text'].isdigit() and len(w['text']) <= 3:
             numbers.append({'qty': int(w['text']), 'x': w['x']})
@@ -8,41 +8,24 @@ PDF: 02-Machines.pdf
 =============================================================================
 """
 
-import re
 import os
-from collections import defaultdict
+import time
 from typing import Dict, Set, List, Tuple
 
+from pdf_extraction.csv_reference import load_tag_qty, nesting_dir_for
+from pdf_extraction.rows import plumber_box, row_lines
+from pdf_extraction.streaming import find_tags_in_raw_text, iter_fitz_pages, iter_pdfplumber_pages
+from pdf_extraction.tags import find_tags, match_tag
+
 # Fichiers de reference
 PDF_PATH = r"C:\Vault\Engineering\Projects\10381\REF13\M02\6-Shop Drawing PDF\Production\BatchPrint\02-Machines.pdf"
 CSV_PATH = r"C:\Vault\Engineering\Projects\10381\REF13\M02\5_Exportation\Sheet_Metal_Nesting\Punch\10381-13-M02.csv"
 
-# Pattern pour les tags XNRGY (2-4 lettres + 3-4 chiffres + tiret/underscore + 3-4 chiffres)
-TAG_PATTERN = re.compile(r'([A-Z]{2,4}\d{3,4}[-_]\d{3,4})', re.IGNORECASE)
-
 def load_csv_reference() -> Set[str]:
-    """Charge les tags de reference depuis le CSV"""
-    tags = set()
-    
-    if not os.path.exists(CSV_PATH):
-        print(f"[-] ERREUR: CSV non trouve: {CSV_PATH}")
-        return tags
-    
-    with open(CSV_PATH, 'r', encoding='utf-8-sig') as f:
-        lines = f.readlines()  # Pas de header dans ce CSV
-        
-    for line in lines:
-        parts = re.split(r'[;,]', line)
-        # Format: Qty, Filename.dxf, Material, ...
-        # Le tag est dans le nom de fichier (colonne 2)
-        if len(parts) >= 2:
-            filename = parts[1].strip()
-            # Extraire le tag du nom de fichier (sans .dxf)
-            match = TAG_PATTERN.search(filename)
-            if match:
-                tag = match.group(1).upper().replace("_", "-")
-                tags.add(tag)
-    
+    """Charge les tags de reference depuis tous les CSV de nesting (Punch, Laser, ...)"""
+    tags = set(load_tag_qty(nesting_dir_for(CSV_PATH)))
+    if not tags:
+        print(f"[-] ERREUR: aucun CSV de reference sous: {nesting_dir_for(CSV_PATH)}")
     return tags
 
 def evaluate_result(method_name: str, extracted_tags: Set[str], reference_tags: Set[str]) -> Dict:
@@ -93,18 +76,12 @@ def print_result(result: Dict):
 # =============================================================================
 def test_pymupdf_raw_text() -> Set[str]:
     """Extraction avec PyMuPDF - texte brut simple"""
-    import fitz
-    
     tags = set()
     try:
-        doc = fitz.open(PDF_PATH)
-        for page in doc:
+        for page in iter_fitz_pages(PDF_PATH):
             text = page.get_text()
-            matches = TAG_PATTERN.findall(text)
-            for match in matches:
-                tag = match.upper().replace("_", "-")
+            for tag in find_tags(text):
                 tags.add(tag)
-        doc.close()
     except Exception as e:
         print(f"    [-] Erreur: {e}")
     
@@ -115,21 +92,15 @@ def test_pymupdf_raw_text() -> Set[str]:
 # =============================================================================
 def test_pymupdf_blocks() -> Set[str]:
     """Extraction avec PyMuPDF - blocs de texte"""
-    import fitz
-    
     tags = set()
     try:
-        doc = fitz.open(PDF_PATH)
-        for page in doc:
+        for page in iter_fitz_pages(PDF_PATH):
             blocks = page.get_text("blocks")
             for block in blocks:
                 if len(block) >= 5:  # Bloc de texte
                     text = block[4]
-                    matches = TAG_PATTERN.findall(text)
-                    for match in matches:
-                        tag = match.upper().replace("_", "-")
+                    for tag in find_tags(text):
                         tags.add(tag)
-        doc.close()
     except Exception as e:
         print(f"    [-] Erreur: {e}")
     
@@ -140,19 +111,15 @@ def test_pymupdf_blocks() -> Set[str]:
 # =============================================================================
 def test_pymupdf_words() -> Set[str]:
     """Extraction avec PyMuPDF - mots individuels"""
-    import fitz
-    
     tags = set()
     try:
-        doc = fitz.open(PDF_PATH)
-        for page in doc:
+        for page in iter_fitz_pages(PDF_PATH):
             words = page.get_text("words")
             for word_info in words:
                 word = word_info[4]  # Le texte est a l'index 4
-                if TAG_PATTERN.match(word):
-                    tag = TAG_PATTERN.match(word).group(1).upper().replace("_", "-")
+                tag = match_tag(word)
+                if tag:
                     tags.add(tag)
-        doc.close()
     except Exception as e:
         print(f"    [-] Erreur: {e}")
     
@@ -163,12 +130,9 @@ def test_pymupdf_words() -> Set[str]:
 # =============================================================================
 def test_pymupdf_dict() -> Set[str]:
     """Extraction avec PyMuPDF - dictionnaire structure"""
-    import fitz
-    
     tags = set()
     try:
-        doc = fitz.open(PDF_PATH)
-        for page in doc:
+        for page in iter_fitz_pages(PDF_PATH):
             text_dict = page.get_text("dict")
             for block in text_dict.get("blocks", []):
                 for line in block.get("lines", []):
@@ -176,11 +140,8 @@ def test_pymupdf_dict() -> Set[str]:
                     for span in line.get("spans", []):
                         line_text += span.get("text", "")
                     
-                    matches = TAG_PATTERN.findall(line_text)
-                    for match in matches:
-                        tag = match.upper().replace("_", "-")
+                    for tag in find_tags(line_text):
                         tags.add(tag)
-        doc.close()
     except Exception as e:
         print(f"    [-] Erreur: {e}")
     
@@ -191,17 +152,12 @@ def test_pymupdf_dict() -> Set[str]:
 # =============================================================================
 def test_pdfplumber_text() -> Set[str]:
     """Extraction avec pdfplumber - texte brut"""
-    import pdfplumber
-    
     tags = set()
     try:
-        with pdfplumber.open(PDF_PATH) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text() or ""
-                matches = TAG_PATTERN.findall(text)
-                for match in matches:
-                    tag = match.upper().replace("_", "-")
-                    tags.add(tag)
+        for page in iter_pdfplumber_pages(PDF_PATH):
+            text = page.extract_text() or ""
+            for tag in find_tags(text):
+                tags.add(tag)
     except Exception as e:
         print(f"    [-] Erreur: {e}")
     
@@ -212,21 +168,16 @@ def test_pdfplumber_text() -> Set[str]:
 # =============================================================================
 def test_pdfplumber_tables() -> Set[str]:
     """Extraction avec pdfplumber - detection de tableaux"""
-    import pdfplumber
-    
     tags = set()
     try:
-        with pdfplumber.open(PDF_PATH) as pdf:
-            for page in pdf.pages:
-                tables = page.extract_tables()
-                for table in tables:
-                    for row in table:
-                        for cell in row:
-                            if cell:
-                                matches = TAG_PATTERN.findall(str(cell))
-                                for match in matches:
-                                    tag = match.upper().replace("_", "-")
-                                    tags.add(tag)
+        for page in iter_pdfplumber_pages(PDF_PATH):
+            tables = page.extract_tables()
+            for table in tables:
+                for row in table:
+                    for cell in row:
+                        if cell:
+                            for tag in find_tags(str(cell)):
+                                tags.add(tag)
     except Exception as e:
         print(f"    [-] Erreur: {e}")
     
@@ -237,18 +188,15 @@ def test_pdfplumber_tables() -> Set[str]:
 # =============================================================================
 def test_pdfplumber_words() -> Set[str]:
     """Extraction avec pdfplumber - mots individuels"""
-    import pdfplumber
-    
     tags = set()
     try:
-        with pdfplumber.open(PDF_PATH) as pdf:
-            for page in pdf.pages:
-                words = page.extract_words()
-                for word_info in words:
-                    word = word_info.get('text', '')
-                    if TAG_PATTERN.match(word):
-                        tag = TAG_PATTERN.match(word).group(1).upper().replace("_", "-")
-                        tags.add(tag)
+        for page in iter_pdfplumber_pages(PDF_PATH):
+            words = page.extract_words()
+            for word_info in words:
+                word = word_info.get('text', '')
+                tag = match_tag(word)
+                if tag:
+                    tags.add(tag)
     except Exception as e:
         print(f"    [-] Erreur: {e}")
     
@@ -259,31 +207,23 @@ def test_pdfplumber_words() -> Set[str]:
 # =============================================================================
 def test_pdfplumber_lines_by_y() -> Set[str]:
     """Extraction avec pdfplumber - reconstruction des lignes par position Y"""
-    import pdfplumber
-    
     tags = set()
     try:
-        with pdfplumber.open(PDF_PATH) as pdf:
-            for page in pdf.pages:
-                chars = page.chars
-                if not chars:
-                    continue
+        for page in iter_pdfplumber_pages(PDF_PATH):
+            chars = page.chars
+            if not chars:
+                continue
                 
-                # Grouper par position Y (arrondie)
-                lines_dict = defaultdict(list)
-                for char in chars:
-                    y = round(char['top'], 0)
-                    lines_dict[y].append(char)
+            # Grouper par ligne (balayage vertical, rows.py)
+            lines_dict = row_lines(chars, plumber_box)
                 
-                # Reconstruire les lignes
-                for y in sorted(lines_dict.keys()):
-                    chars_in_line = sorted(lines_dict[y], key=lambda c: c['x0'])
-                    line_text = ''.join(c['text'] for c in chars_in_line)
+            # Reconstruire les lignes
+            for y in sorted(lines_dict.keys()):
+                chars_in_line = sorted(lines_dict[y], key=lambda c: c['x0'])
+                line_text = ''.join(c['text'] for c in chars_in_line)
                     
-                    matches = TAG_PATTERN.findall(line_text)
-                    for match in matches:
-                        tag = match.upper().replace("_", "-")
-                        tags.add(tag)
+                for tag in find_tags(line_text):
+                    tags.add(tag)
     except Exception as e:
         print(f"    [-] Erreur: {e}")
     
@@ -294,8 +234,6 @@ def test_pdfplumber_lines_by_y() -> Set[str]:
 # =============================================================================
 def test_pdfplumber_tables_optimized() -> Set[str]:
     """Extraction avec pdfplumber - tableaux avec parametres optimises"""
-    import pdfplumber
-    
     tags = set()
     try:
         table_settings = {
@@ -308,24 +246,19 @@ def test_pdfplumber_tables_optimized() -> Set[str]:
             "min_words_horizontal": 2,
         }
         
-        with pdfplumber.open(PDF_PATH) as pdf:
-            for page in pdf.pages:
-                tables = page.extract_tables(table_settings)
-                for table in tables:
-                    for row in table:
-                        for cell in row:
-                            if cell:
-                                matches = TAG_PATTERN.findall(str(cell))
-                                for match in matches:
-                                    tag = match.upper().replace("_", "-")
-                                    tags.add(tag)
+        for page in iter_pdfplumber_pages(PDF_PATH):
+            tables = page.extract_tables(table_settings)
+            for table in tables:
+                for row in table:
+                    for cell in row:
+                        if cell:
+                            for tag in find_tags(str(cell)):
+                                tags.add(tag)
                 
-                # Aussi extraire le texte hors tableaux
-                text = page.extract_text() or ""
-                matches = TAG_PATTERN.findall(text)
-                for match in matches:
-                    tag = match.upper().replace("_", "-")
-                    tags.add(tag)
+            # Aussi extraire le texte hors tableaux
+            text = page.extract_text() or ""
+            for tag in find_tags(text):
+                tags.add(tag)
     except Exception as e:
         print(f"    [-] Erreur: {e}")
     
@@ -464,25 +397,22 @@ def main():
             print(f"  - {tag}")
         print()
         
-        # Verifier si les tags manquants existent dans le PDF
+        # Verifier si les tags manquants existent dans le PDF (une passe par page, quel que soit leur nombre)
         print("Verification dans le PDF brut (PyMuPDF):")
-        import fitz
-        doc = fitz.open(PDF_PATH)
-        full_text = ""
-        for page in doc:
-            full_text += page.get_text()
-        doc.close()
+        start = time.time()
+        raw_pages = find_tags_in_raw_text(PDF_PATH, best['missing_tags'])
+        raw_time = time.time() - start
         
         found_in_raw = 0
         for tag in best['missing_tags']:
-            if tag.lower() in full_text.lower():
+            if raw_pages[tag]:
                 found_in_raw += 1
-                print(f"  [+] '{tag}' existe dans le PDF brut")
+                print(f"  [+] '{tag}' existe dans le PDF brut (pages {', '.join(map(str, raw_pages[tag]))})")
             else:
                 print(f"  [-] '{tag}' N'EXISTE PAS dans le PDF brut")
         
         print()
-        print(f"Resultat: {found_in_raw}/{len(best['missing_tags'])} tags manquants sont dans le PDF brut")
+        print(f"Resultat: {found_in_raw}/{len(best['missing_tags'])} tags manquants sont dans le PDF brut ({raw_time:.2f}s)")
         vraiment_absents = len(best['missing_tags']) - found_in_raw
         print(f"=> {vraiment_absents} tags sont VRAIMENT ABSENTS du PDF")
     
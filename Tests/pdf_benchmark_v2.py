@@ -12,39 +12,21 @@ import os
 from collections import defaultdict
 from typing import Dict, Set, List, Tuple
 
+from pdf_extraction.csv_reference import load_tag_qty, nesting_dir_for
+from pdf_extraction.results_store import ResultRecorder, timed
+from pdf_extraction.rows import plumber_box, row_lines
+from pdf_extraction.templates import TemplateCache
+from pdf_extraction.tags import QTY_TAG_PATTERN, TAG_PATTERN, TAG_QTY_PATTERN, match_tag, tag_from_match
+
 # Fichiers de reference
 PDF_PATH = r"C:\Vault\Engineering\Projects\10381\REF13\M02\6-Shop Drawing PDF\Production\BatchPrint\02-Machines.pdf"
 CSV_PATH = r"C:\Vault\Engineering\Projects\10381\REF13\M02\5_Exportation\Sheet_Metal_Nesting\Punch\10381-13-M02.csv"
 
-# Pattern pour les tags XNRGY
-TAG_PATTERN = re.compile(r'([A-Z]{2,4}\d{3,4}[-_]\d{3,4})', re.IGNORECASE)
-
 def load_csv_reference() -> Dict[str, int]:
-    """Charge les paires (Tag, Quantité) depuis le CSV"""
-    tag_qty = {}
-    
-    if not os.path.exists(CSV_PATH):
-        print(f"[-] ERREUR: CSV non trouve: {CSV_PATH}")
-        return tag_qty
-    
-    with open(CSV_PATH, 'r', encoding='utf-8-sig') as f:
-        lines = f.readlines()
-        
-    for line in lines:
-        parts = re.split(r'[;,]', line)
-        # Format CSV: Qty, Filename.dxf, Material, ...
-        if len(parts) >= 2:
-            try:
-                qty = int(parts[0].strip())
-            except:
-                continue
-            
-            filename = parts[1].strip()
-            match = TAG_PATTERN.search(filename)
-            if match:
-                tag = match.group(1).upper().replace("_", "-")
-                tag_qty[tag] = qty
-    
+    """Charge les paires (Tag, Quantité) depuis tous les CSV de nesting (Punch, Laser, ...)"""
+    tag_qty = load_tag_qty(nesting_dir_for(CSV_PATH))
+    if not tag_qty:
+        print(f"[-] ERREUR: aucun CSV de reference sous: {nesting_dir_for(CSV_PATH)}")
     return tag_qty
 
 def evaluate_tag_qty_result(method_name: str, extracted: Dict[str, int], reference: Dict[str, int]) -> Dict:
@@ -119,11 +101,8 @@ def test_pymupdf_lines() -> Dict[str, int]:
             words = page.get_text("words")
             # Format: (x0, y0, x1, y1, "word", block_no, line_no, word_no)
             
-            # Grouper par ligne (position Y)
-            lines = defaultdict(list)
-            for w in words:
-                y = round(w[1], 0)  # y0 arrondi
-                lines[y].append(w)
+            # Grouper par ligne (balayage vertical, rows.py)
+            lines = row_lines(words)
             
             # Pour chaque ligne, chercher Tag + Quantité
             for y in sorted(lines.keys()):
@@ -133,7 +112,7 @@ def test_pymupdf_lines() -> Dict[str, int]:
                 # Chercher un tag
                 tag_match = TAG_PATTERN.search(line_text)
                 if tag_match:
-                    tag = tag_match.group(1).upper().replace("_", "-")
+                    tag = tag_from_match(tag_match)
                     
                     # Chercher la quantité (premier nombre dans la ligne)
                     # Stratégie: Le premier nombre AVANT ou APRÈS le tag
@@ -181,7 +160,7 @@ def test_pymupdf_dict_spans() -> Dict[str, int]:
                     # Chercher Tag + Qty
                     tag_match = TAG_PATTERN.search(line_text)
                     if tag_match:
-                        tag = tag_match.group(1).upper().replace("_", "-")
+                        tag = tag_from_match(tag_match)
                         
                         # Chercher nombre
                         numbers = re.findall(r'\b(\d+)\b', line_text)
@@ -220,7 +199,7 @@ def test_pdfplumber_tables() -> Dict[str, int]:
                         tag_match = TAG_PATTERN.search(row_text)
                         
                         if tag_match:
-                            tag = tag_match.group(1).upper().replace("_", "-")
+                            tag = tag_from_match(tag_match)
                             
                             # Chercher la quantité dans les cellules
                             for cell in row:
@@ -264,7 +243,7 @@ def test_pdfplumber_tables_text_strategy() -> Dict[str, int]:
                         tag_match = TAG_PATTERN.search(row_text)
                         
                         if tag_match:
-                            tag = tag_match.group(1).upper().replace("_", "-")
+                            tag = tag_from_match(tag_match)
                             
                             for cell in row:
                                 if cell and str(cell).strip().isdigit():
@@ -291,11 +270,8 @@ def test_pdfplumber_y_clustering() -> Dict[str, int]:
             for page in pdf.pages:
                 words = page.extract_words()
                 
-                # Grouper par Y
-                lines = defaultdict(list)
-                for word in words:
-                    y = round(word['top'], 0)
-                    lines[y].append(word)
+                # Grouper par ligne (balayage vertical, rows.py)
+                lines = row_lines(words, plumber_box)
                 
                 for y in sorted(lines.keys()):
                     line_words = sorted(lines[y], key=lambda w: w['x0'])
@@ -303,7 +279,7 @@ def test_pdfplumber_y_clustering() -> Dict[str, int]:
                     
                     tag_match = TAG_PATTERN.search(line_text)
                     if tag_match:
-                        tag = tag_match.group(1).upper().replace("_", "-")
+                        tag = tag_from_match(tag_match)
                         
                         # Premier nombre
                         for w in line_words:
@@ -341,10 +317,7 @@ def test_pdfplumber_column_detection() -> Dict[str, int]:
                 columns = sorted([x for x, count in x_counts.items() if count > 5])
                 
                 # Grouper les mots par ligne
-                lines = defaultdict(list)
-                for word in words:
-                    y = round(word['top'], 0)
-                    lines[y].append(word)
+                lines = row_lines(words, plumber_box)
                 
                 # Pour chaque ligne
                 for y in sorted(lines.keys()):
@@ -365,7 +338,7 @@ def test_pdfplumber_column_detection() -> Dict[str, int]:
                             break
                     
                     if tag_word:
-                        tag = TAG_PATTERN.match(tag_word['text']).group(1).upper().replace("_", "-")
+                        tag = match_tag(tag_word['text'])
                         
                         # Chercher le nombre dans les autres colonnes
                         for w in line_words:
@@ -387,6 +360,8 @@ def test_pymupdf_table_structure() -> Dict[str, int]:
     import fitz
     
     tag_qty = {}
+    templates = TemplateCache(['qty', 'quantity', 'qte', 'quantite'], ['item', 'tag', 'part', 'piece'],
+                              max_lines=10, exact=True)
     
     try:
         doc = fitz.open(PDF_PATH)
@@ -394,25 +369,12 @@ def test_pymupdf_table_structure() -> Dict[str, int]:
         for page in doc:
             words = page.get_text("words")
             
-            # Identifier la colonne "Qty" ou nombre entête
-            qty_column_x = None
-            tag_column_x = None
-            
             # Grouper par lignes
-            lines = defaultdict(list)
-            for w in words:
-                y = round(w[1], 0)
-                lines[y].append(w)
+            lines = row_lines(words)
             
-            # Chercher l'entête (ligne avec "QTY", "QUANTITY", "Item" etc.)
-            for y in sorted(lines.keys())[:10]:  # Premières lignes
-                line_words = lines[y]
-                for w in line_words:
-                    word_lower = w[4].lower()
-                    if word_lower in ['qty', 'quantity', 'qte', 'quantite']:
-                        qty_column_x = w[0]  # x0
-                    if word_lower in ['item', 'tag', 'part', 'piece']:
-                        tag_column_x = w[0]
+            # Colonne "Qty": gabarit deja vu sur une page precedente, sinon
+            # recherche de l'entête ("QTY", "QUANTITY", "Item"...) dans les premières lignes
+            template, _ = templates.for_page(words, lines)
             
             # Extraire les données
             for y in sorted(lines.keys()):
@@ -427,11 +389,11 @@ def test_pymupdf_table_structure() -> Dict[str, int]:
                     
                     # Tag
                     if TAG_PATTERN.match(word):
-                        tag = TAG_PATTERN.match(word).group(1).upper().replace("_", "-")
+                        tag = match_tag(word)
                     
                     # Quantité - soit dans la colonne Qty, soit premier nombre
                     if word.isdigit():
-                        if qty_column_x and abs(x - qty_column_x) < 30:
+                        if template and template.in_qty_column(x):
                             qty = int(word)
                         elif qty is None:
                             qty = int(word)
@@ -455,7 +417,7 @@ def test_tag_qty_pattern() -> Dict[str, int]:
     tag_qty = {}
     
     # Pattern: Tag puis espace(s) puis nombre
-    pattern = re.compile(r'([A-Z]{2,4}\d{3,4}[-_]\d{3,4})\s+(\d+)', re.IGNORECASE)
+    pattern = TAG_QTY_PATTERN
     
     try:
         doc = fitz.open(PDF_PATH)
@@ -463,10 +425,9 @@ def test_tag_qty_pattern() -> Dict[str, int]:
         for page in doc:
             text = page.get_text()
             
-            matches = pattern.findall(text)
-            for match in matches:
-                tag = match[0].upper().replace("_", "-")
-                qty = int(match[1])
+            for match in pattern.finditer(text):
+                tag = tag_from_match(match)
+                qty = int(match.group('qty'))
                 if tag not in tag_qty:
                     tag_qty[tag] = qty
         
@@ -486,7 +447,7 @@ def test_qty_tag_pattern() -> Dict[str, int]:
     tag_qty = {}
     
     # Pattern: Nombre puis espace(s) puis Tag
-    pattern = re.compile(r'(\d+)\s+([A-Z]{2,4}\d{3,4}[-_]\d{3,4})', re.IGNORECASE)
+    pattern = QTY_TAG_PATTERN
     
     try:
         doc = fitz.open(PDF_PATH)
@@ -494,10 +455,9 @@ def test_qty_tag_pattern() -> Dict[str, int]:
         for page in doc:
             text = page.get_text()
             
-            matches = pattern.findall(text)
-            for match in matches:
-                qty = int(match[0])
-                tag = match[1].upper().replace("_", "-")
+            for match in pattern.finditer(text):
+                qty = int(match.group('qty'))
+                tag = tag_from_match(match)
                 if tag not in tag_qty:
                     tag_qty[tag] = qty
         
@@ -516,8 +476,8 @@ def test_combined_patterns() -> Dict[str, int]:
     
     tag_qty = {}
     
-    pattern1 = re.compile(r'([A-Z]{2,4}\d{3,4}[-_]\d{3,4})\s+(\d+)', re.IGNORECASE)
-    pattern2 = re.compile(r'(\d+)\s+([A-Z]{2,4}\d{3,4}[-_]\d{3,4})', re.IGNORECASE)
+    pattern1 = TAG_QTY_PATTERN
+    pattern2 = QTY_TAG_PATTERN
     
     try:
         doc = fitz.open(PDF_PATH)
@@ -526,16 +486,16 @@ def test_combined_patterns() -> Dict[str, int]:
             text = page.get_text()
             
             # Pattern 1: Tag puis Qty
-            for match in pattern1.findall(text):
-                tag = match[0].upper().replace("_", "-")
-                qty = int(match[1])
+            for match in pattern1.finditer(text):
+                tag = tag_from_match(match)
+                qty = int(match.group('qty'))
                 if tag not in tag_qty:
                     tag_qty[tag] = qty
             
             # Pattern 2: Qty puis Tag
-            for match in pattern2.findall(text):
-                qty = int(match[0])
-                tag = match[1].upper().replace("_", "-")
+            for match in pattern2.finditer(text):
+                qty = int(match.group('qty'))
+                tag = tag_from_match(match)
                 if tag not in tag_qty:
                     tag_qty[tag] = qty
         
@@ -572,64 +532,75 @@ def main():
     
     # 2. Exécuter les tests
     results = []
+    recorder = ResultRecorder()
     
     print("[>] Test: Méthode 1 - PyMuPDF Lignes par Y")
-    tags1 = test_pymupdf_lines()
+    tags1, ms = timed(test_pymupdf_lines)
     result1 = evaluate_tag_qty_result("PyMuPDF - Lignes Y", tags1, reference)
+    recorder.add(PDF_PATH, "PyMuPDF - Lignes Y", tags1, reference, ms)
     print_result(result1)
     results.append(result1)
     
     print("[>] Test: Méthode 2 - PyMuPDF Dict Spans")
-    tags2 = test_pymupdf_dict_spans()
+    tags2, ms = timed(test_pymupdf_dict_spans)
     result2 = evaluate_tag_qty_result("PyMuPDF - Dict Spans", tags2, reference)
+    recorder.add(PDF_PATH, "PyMuPDF - Dict Spans", tags2, reference, ms)
     print_result(result2)
     results.append(result2)
     
     print("[>] Test: Méthode 3 - pdfplumber Tables")
-    tags3 = test_pdfplumber_tables()
+    tags3, ms = timed(test_pdfplumber_tables)
     result3 = evaluate_tag_qty_result("pdfplumber - Tables", tags3, reference)
+    recorder.add(PDF_PATH, "pdfplumber - Tables", tags3, reference, ms)
     print_result(result3)
     results.append(result3)
     
     print("[>] Test: Méthode 4 - pdfplumber Tables Text")
-    tags4 = test_pdfplumber_tables_text_strategy()
+    tags4, ms = timed(test_pdfplumber_tables_text_strategy)
     result4 = evaluate_tag_qty_result("pdfplumber - Tables Text", tags4, reference)
+    recorder.add(PDF_PATH, "pdfplumber - Tables Text", tags4, reference, ms)
     print_result(result4)
     results.append(result4)
     
     print("[>] Test: Méthode 5 - pdfplumber Y Clustering")
-    tags5 = test_pdfplumber_y_clustering()
+    tags5, ms = timed(test_pdfplumber_y_clustering)
     result5 = evaluate_tag_qty_result("pdfplumber - Y Cluster", tags5, reference)
+    recorder.add(PDF_PATH, "pdfplumber - Y Cluster", tags5, reference, ms)
     print_result(result5)
     results.append(result5)
     
     print("[>] Test: Méthode 6 - pdfplumber Column Detection")
-    tags6 = test_pdfplumber_column_detection()
+    tags6, ms = timed(test_pdfplumber_column_detection)
     result6 = evaluate_tag_qty_result("pdfplumber - Columns", tags6, reference)
+    recorder.add(PDF_PATH, "pdfplumber - Columns", tags6, reference, ms)
     print_result(result6)
     results.append(result6)
     
     print("[>] Test: Méthode 7 - PyMuPDF Table Structure")
-    tags7 = test_pymupdf_table_structure()
+    tags7, ms = timed(test_pymupdf_table_structure)
     result7 = evaluate_tag_qty_result("PyMuPDF - Table Struct", tags7, reference)
+    recorder.add(PDF_PATH, "PyMuPDF - Table Struct", tags7, reference, ms)
     print_result(result7)
     results.append(result7)
     
     print("[>] Test: Méthode 8 - Pattern Tag+Qty")
-    tags8 = test_tag_qty_pattern()
+    tags8, ms = timed(test_tag_qty_pattern)
     result8 = evaluate_tag_qty_result("Pattern Tag+Qty", tags8, reference)
+    recorder.add(PDF_PATH, "Pattern Tag+Qty", tags8, reference, ms)
     print_result(result8)
     results.append(result8)
     
     print("[>] Test: Méthode 9 - Pattern Qty+Tag")
-    tags9 = test_qty_tag_pattern()
+    tags9, ms = timed(test_qty_tag_pattern)
     result9 = evaluate_tag_qty_result("Pattern Qty+Tag", tags9, reference)
+    recorder.add(PDF_PATH, "Pattern Qty+Tag", tags9, reference, ms)
     print_result(result9)
     results.append(result9)
     
     print("[>] Test: Méthode 10 - Patterns Combinés")
-    tags10 = test_combined_patterns()
+    tags10, ms = timed(test_combined_patterns)
     result10 = evaluate_tag_qty_result("Patterns Combinés", tags10, reference)
+    recorder.add(PDF_PATH, "Patterns Combinés", tags10, reference, ms)
     print_result(result10)
     results.append(result10)
     
@@ -679,6 +650,11 @@ def main():
         for tag in best['missing_tags'][:20]:
             print(f"  - {tag}")
     
+    results_path = recorder.close()
+    if results_path:
+        print()
+        print(f"[+] Résultats détaillés: {results_path}")
+    
     print()
     print("=" * 80)
     print("FIN DU BENCHMARK")
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+PDF_EXTRACTION - Briques partagees des benchmarks DXF Verifier
+=============================================================================
+Modules communs aux scripts de Tests/ (pdf_benchmark*.py, benchmark_v3.py,
+table_extraction_benchmark.py, ...). Les moteurs lourds (fitz, pdfplumber,
+camelot, tabula) ne sont JAMAIS importes ici: chaque module les importe
+dans les fonctions qui en ont besoin.
+=============================================================================
+"""
+
+import os
+
+# Caches locaux des benchmarks (reference CSV, resultats, index...)
+CACHE_DIR = os.environ.get(
+    'XNRGY_PDF_CACHE',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache'),
+)
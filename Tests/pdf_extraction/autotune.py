@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+AUTOTUNE - Balayage parallele des parametres d'extraction
+=============================================================================
+Evalue une grille (ou un tirage aleatoire) de parametres de params.py sur
+un corpus de paires PDF/CSV. La couche de mots de chaque PDF est extraite
+UNE fois, empaquetee en memoire partagee (shared_words.PagePool) et lue par
+chaque worker a son premier essai: chaque essai ne fait que le couplage.
+
+Pour chaque methode, seuls ses parametres varient:
+    proximity : pairing_window, pairing_y_tolerance, qty_max_digits
+    scoring   : score_* (poids de test_scoring)
+    grid      : column_tolerance, column_min_words (test_pymupdf_grid)
+    header    : qty_column_tolerance (test_auto_structure)
+
+Objectif: score = correct / (total + extra). Un tag extrait absent de la
+reference (extra) coute autant qu'un tag manque: une fenetre plus large
+qui trouve un tag de plus mais en invente trois n'est pas retenue.
+
+Sortie: front de Pareto score / latence (aucun essai n'a a la fois un
+meilleur score et une latence plus faible), avec precision et extras de
+chaque essai, puis le reglage retenu (meilleur score; a egalite, les
+valeurs par defaut sauf gain de latence >= 10%).
+--write l'enregistre dans extraction_params.json.
+
+Usage:
+    python -m pdf_extraction.autotune --pair <pdf> <csv|dossier> [--pair ...]
+    python -m pdf_extraction.autotune --corpus corpus.json --method scoring --random 200 --write
+        corpus.json = [{"pdf": "...", "reference": "csv ou dossier nesting"}, ...]
+=============================================================================
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from pdf_extraction.params import DEFAULTS, PARAMS_FILE, apply_params, save_params
+
+SEARCH_SPACE = {
+    'pairing_window': [75, 100, 125, 150, 175, 200, 250],
+    'pairing_y_tolerance': [1, 2, 3, 5, 8],
+    'qty_max_digits': [2, 3, 4],
+    'qty_column_tolerance': [10, 20, 30, 40, 60],
+    'column_tolerance': [5, 10, 15, 20, 30],
+    'column_min_words': [2, 3, 4, 5],
+    'score_left_adjacent': [0, 25, 50, 75],
+    'score_right_adjacent': [0, 15, 30, 60],
+    'score_per_column': [-20, -10, -5],
+    'score_far_penalty': [-200, -100, -50],
+    'score_far_columns': [2, 3, 4],
+}
+
+LATENCY_MARGIN = 0.10     # Gain de latence minimal pour quitter les valeurs par defaut a precision egale
+
+
+def _run_proximity(pages):
+    from pdf_extraction.proximity import extract_proximity_pages
+    return extract_proximity_pages(pages)
+
+
+def _run_scoring(pages):
+    from pdf_extraction.neighbors import score_page_matrix
+    tag_qty = {}
+    for _, words in pages:
+        for tag, qty, _ in score_page_matrix(words):
+            tag_qty.setdefault(tag, qty)
+    return tag_qty
+
+
+def _run_grid(pages):
+    from pdf_extraction.templates import grid_pages
+    return grid_pages(pages)
+
+
+def _run_header(pages):
+    from pdf_extraction.templates import header_column_pages
+    return header_column_pages(pages)
+
+
+# methode -> (fonction, parametres balayes, moteur de la couche de mots d'origine)
+METHODS = {
+    'proximity': (_run_proximity, ['pairing_window', 'pairing_y_tolerance', 'qty_max_digits'], 'fitz'),
+    'scoring': (_run_scoring, ['score_left_adjacent', 'score_right_adjacent', 'score_per_column',
+                               'score_far_penalty', 'score_far_columns'], 'pdfplumber'),
+    'grid': (_run_grid, ['column_tolerance', 'column_min_words'], 'fitz'),
+    'header': (_run_header, ['qty_column_tolerance'], 'pdfplumber'),
+}
+
+# (nom, pages [(numero, mots)], reference {tag: qty})
+Corpus = List[Tuple[str, list, Dict[str, int]]]
+
+_CORPUS: Corpus = []
+
+
+# =============================================================================
+# ESSAIS (dans les workers)
+# =============================================================================
+def _worker_corpus() -> Corpus:
+    """Corpus du worker, relu une fois depuis la couche partagee du PagePool"""
+    global _CORPUS
+    if not _CORPUS:
+        from pdf_extraction.shared_words import worker_context, worker_layer
+        layer = worker_layer()
+        _CORPUS = [(name, [(int(layer.page_numbers[i]), layer.page_words(i)) for i in range(start, stop)], reference)
+                   for name, start, stop, reference in worker_context()]
+    return _CORPUS
+
+
+def evaluate(method: str, values: Dict) -> Dict:
+    """Precision, extras, score cumules et latence d'une methode pour un jeu de parametres"""
+    from pdf_extraction.evaluation import compare
+
+    apply_params(values)
+    run = METHODS[method][0]
+    correct = total = extra = 0
+    elapsed = 0.0
+    for _, pages, reference in _worker_corpus():
+        start = time.perf_counter()
+        extracted = run(pages)
+        elapsed += time.perf_counter() - start
+        result = compare(extracted, reference)
+        correct += result['correct']
+        total += result['total']
+        extra += result['extra']
+    return {
+        'params': values,
+        'correct': correct,
+        'total': total,
+        'extra': extra,
+        'accuracy': round(correct / total * 100, 2) if total else 0.0,
+        'score': round(correct / (total + extra) * 100, 2) if total + extra else 0.0,
+        'ms': elapsed * 1000,
+    }
+
+
+def candidates(method: str, samples: int = 0, seed: int = 0) -> List[Dict]:
+    """Grille complete des parametres de la methode, ou `samples` tirages aleatoires
+
+    Les valeurs par defaut sont toujours evaluees en premier (reference).
+    """
+    names = METHODS[method][1]
+    default = {n: DEFAULTS[n] for n in names}
+    grid = [dict(zip(names, combo)) for combo in itertools.product(*(SEARCH_SPACE[n] for n in names))]
+    if samples and samples < len(grid):
+        grid = random.Random(seed).sample(grid, samples)
+    return [default] + [c for c in grid if c != default]
+
+
+def pareto_front(results: List[Dict]) -> List[Dict]:
+    """Essais non domines (aucun autre n'a un meilleur score ET une latence plus faible),
+    du plus rapide au plus lent"""
+    front = []
+    best_score = -1.0
+    for r in sorted(results, key=lambda r: (r['ms'], -r['score'])):
+        if r['score'] > best_score:
+            front.append(r)
+            best_score = r['score']
+    return front
+
+
+def choose(results: List[Dict], margin: float = LATENCY_MARGIN) -> Dict:
+    """Meilleur score; a egalite, les valeurs par defaut (results[0]) sauf si un
+    essai est plus rapide d'au moins `margin` (le bruit de mesure ne change rien)"""
+    best = max(r['score'] for r in results)
+    tied = sorted((r for r in results if r['score'] == best), key=lambda r: r['ms'])
+    default = results[0]
+    if default['score'] == best and tied[0]['ms'] > default['ms'] * (1 - margin):
+        return default
+    return tied[0]
+
+
+def sweep(method: str, corpus: Corpus, samples: int = 0, workers: int = None, seed: int = 0) -> List[Dict]:
+    """Evalue tous les candidats en parallele (un processus par coeur par defaut)
+
+    Toutes les pages du corpus forment une seule couche partagee; chaque
+    worker recoit seulement les bornes de chaque document et sa reference.
+    """
+    from pdf_extraction.shared_words import PagePool
+
+    todo = candidates(method, samples, seed)
+    documents = []
+    start = 0
+    for name, pages, reference in corpus:
+        documents.append((name, start, start + len(pages), reference))
+        start += len(pages)
+    all_pages = [page for _, pages, _ in corpus for page in pages]
+    with PagePool(all_pages, workers or os.cpu_count() or 1, context=documents) as pool:
+        return pool.run(evaluate, [method] * len(todo), todo, chunksize=max(1, len(todo) // 64))
+
+
+# =============================================================================
+# CORPUS
+# =============================================================================
+def load_corpus(pairs: List[Tuple[str, str]], engine: str = 'fitz') -> Corpus:
+    """Couche de mots + reference CSV de chaque paire (pdf, csv ou dossier nesting)"""
+    from pdf_extraction.csv_reference import load_tag_qty, nesting_dir_for
+    from pdf_extraction.streaming import iter_page_words
+
+    corpus = []
+    for pdf_path, reference_path in pairs:
+        nesting_dir = reference_path if os.path.isdir(reference_path) else nesting_dir_for(reference_path)
+        reference = load_tag_qty(nesting_dir)
+        pages = list(iter_page_words(pdf_path, engine))
+        corpus.append((os.path.basename(pdf_path), pages, reference))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Balayage parallele des parametres d'extraction")
+    parser.add_argument('--pair', nargs=2, action='append', default=[], metavar=('PDF', 'REF'),
+                        help="PDF et son CSV nesting (ou dossier Sheet_Metal_Nesting)")
+    parser.add_argument('--corpus', help="Fichier JSON [{\"pdf\": ..., \"reference\": ...}]")
+    parser.add_argument('--method', default='proximity', choices=sorted(METHODS))
+    parser.add_argument('--random', type=int, default=0, help="Nombre de tirages (defaut: grille complete)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--engine', choices=('fitz', 'pdfplumber'), help="Defaut: moteur d'origine de la methode")
+    parser.add_argument('--write', action='store_true', help=f"Ecrire le reglage retenu dans {PARAMS_FILE}")
+    args = parser.parse_args()
+
+    pairs = [tuple(p) for p in args.pair]
+    if args.corpus:
+        with open(args.corpus, 'r', encoding='utf-8') as f:
+            pairs.extend((item['pdf'], item['reference']) for item in json.load(f))
+    if not pairs:
+        parser.error("au moins une paire --pair PDF REF ou un --corpus")
+
+    print("=" * 80)
+    print(f"AUTOTUNE - methode '{args.method}'")
+    print("=" * 80)
+    start = time.perf_counter()
+    corpus = load_corpus(pairs, args.engine or METHODS[args.method][2])
+    for name, pages, reference in corpus:
+        print(f"    {name:<40} {len(pages)} pages, {len(reference)} tags de reference")
+    print(f"[+] Couche de mots chargee en {time.perf_counter() - start:.1f} s")
+
+    start = time.perf_counter()
+    results = sweep(args.method, corpus, args.random, args.workers, args.seed)
+    print(f"[+] {len(results)} essais en {time.perf_counter() - start:.1f} s")
+    print()
+
+    default = results[0]
+    print(f"Defaut: {default['correct']}/{default['total']} ({default['accuracy']}%), "
+          f"{default['extra']} extra, score {default['score']}  {default['ms']:.0f} ms  {default['params']}")
+    print()
+    print("Front de Pareto (score / latence):")
+    print(f"    {'Score':<8} {'Precision':<11} {'Correct':<12} {'Extra':<7} {'ms':<9} Parametres")
+    for r in pareto_front(results):
+        print(f"    {r['score']:<8} {r['accuracy']:<11} {str(r['correct']) + '/' + str(r['total']):<12} "
+              f"{r['extra']:<7} {r['ms']:<9.0f} {r['params']}")
+
+    chosen = choose(results)
+    print()
+    print(f"[+] Retenu: score {chosen['score']} ({chosen['accuracy']}%, {chosen['extra']} extra) "
+          f"en {chosen['ms']:.0f} ms  {chosen['params']}")
+    if args.write:
+        print(f"[+] Ecrit dans: {save_params(chosen['params'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
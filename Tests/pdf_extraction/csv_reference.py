@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+REFERENCE CSV - Chargeur unique et cache des exports de nesting
+=============================================================================
+Lit TOUS les CSV sous 5_Exportation/Sheet_Metal_Nesting/* (Punch, Laser, ...)
+avec le module csv (dialecte detecte), fusionne les quantites par tag en
+gardant la provenance de chaque source.
+
+Tags en double (une seule regle partout):
+    - dans un meme CSV: la PREMIERE ligne du tag compte, les suivantes sont
+      ignorees (comme ExcelManagerService.ReadCsvFile de DXFVerifier);
+    - entre CSV (Punch + Laser): les quantites sont additionnees, chaque
+      export decoupant une partie des pieces.
+
+Format des CSV (pas d'entete): Qty, Filename.dxf, Material, Thickness, ...
+
+L'unite de la 4e colonne n'est ecrite nulle part (les lecteurs C# de
+DXFVerifier s'arretent au materiau): elle est fixee par
+XNRGY_CSV_THICKNESS_UNIT = mm | in | auto (defaut). En auto, une valeur
+avec unite ("1.52 mm", "0.0598 in") la garde; sinon un fichier dont toutes
+les epaisseurs sont < INCH_MAX_THICKNESS est en pouces (0.0598 = 16GA),
+le reste en mm (1.52). Les epaisseurs retournees sont toujours en mm.
+
+Le resultat de chaque fichier est mis en cache (memoire + disque) avec sa
+date de modification, sa taille et pairing_digest (grammaire des tags):
+un export inchange n'est jamais reparse.
+
+Usage:
+    python -m pdf_extraction.csv_reference <dossier Sheet_Metal_Nesting>
+=============================================================================
+"""
+
+import csv
+import glob
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from pdf_extraction import CACHE_DIR
+from pdf_extraction.params import pairing_digest
+from pdf_extraction.tags import search_tag
+
+NESTING_SUBDIR = os.path.join('5_Exportation', 'Sheet_Metal_Nesting')
+
+CACHE_FILE = os.path.join(CACHE_DIR, 'csv_reference.json')
+# A incrementer si les regles de lecture changent (doublons, colonnes)
+CACHE_VERSION = 2
+
+# Echantillon lu pour detecter le dialecte (separateur ; ou ,)
+SNIFF_SIZE = 4096
+
+# Unite de la colonne Thickness: 'mm', 'in' ou 'auto'
+CSV_THICKNESS_UNIT = os.environ.get('XNRGY_CSV_THICKNESS_UNIT', 'auto')
+THICKNESS_UNITS = ('auto', 'mm', 'in')
+# En auto: aucune tole n'atteint 0.5 po (12.7 mm), aucune n'est sous 0.5 mm
+INCH_MAX_THICKNESS = 0.5
+_THICKNESS_CELL = re.compile(r'^(\d+(?:[.,]\d+)?)\s*(mm|in|")?$', re.IGNORECASE)
+
+# path -> (mtime_ns, size, digest, {tag: qty})
+_memory_cache: Dict[str, Tuple[int, int, str, Dict[str, int]]] = {}
+_disk_cache_loaded = False
+_lock = threading.Lock()
+
+
+def nesting_dir_for(csv_path: str) -> str:
+    """Dossier Sheet_Metal_Nesting d'un CSV (ex: .../Sheet_Metal_Nesting/Punch/x.csv)"""
+    return os.path.dirname(os.path.dirname(csv_path))
+
+
+def nesting_dir_for_pdf(pdf_path: str) -> Optional[str]:
+    """Dossier Sheet_Metal_Nesting du module d'un PDF (premier parent qui en contient un)
+
+    Ex: .../M02/6-Shop Drawing PDF/Production/BatchPrint/02-Machines.pdf
+        -> .../M02/5_Exportation/Sheet_Metal_Nesting
+    """
+    parent = os.path.dirname(os.path.abspath(pdf_path))
+    while True:
+        candidate = os.path.join(parent, NESTING_SUBDIR)
+        if os.path.isdir(candidate):
+            return candidate
+        up = os.path.dirname(parent)
+        if up == parent:
+            return None
+        parent = up
+
+
+def find_nesting_csvs(nesting_dir: str) -> List[str]:
+    """Tous les CSV des sous-dossiers de nesting (Punch, Laser, ...), tries"""
+    return sorted(glob.glob(os.path.join(nesting_dir, '*', '*.csv')))
+
+
+# =============================================================================
+# PARSING D'UN FICHIER
+# =============================================================================
+def _sniff_dialect(sample: str):
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=';,')
+    except csv.Error:
+        # Une seule colonne ou echantillon ambigu: separateur le plus frequent
+        delimiter = ';' if sample.count(';') > sample.count(',') else ','
+        return type('FallbackDialect', (csv.excel,), {'delimiter': delimiter})
+
+
+def _thickness_cell(text: str) -> Tuple[Optional[float], Optional[str]]:
+    """(valeur, unite ecrite ou None) d'une cellule Thickness; (None, None) si illisible"""
+    match = _THICKNESS_CELL.match(text.strip())
+    if not match:
+        return None, None
+    unit = (match.group(2) or '').lower().replace('"', 'in') or None
+    return float(match.group(1).replace(',', '.')), unit
+
+
+def parse_csv_rows(path: str, thickness_unit: Optional[str] = None) -> List[Dict]:
+    """Lignes d'un CSV de nesting: {'tag', 'qty', 'filename', 'material', 'thickness', 'thickness_unit'}
+
+    thickness: 4e colonne convertie en mm (None si absente ou illisible);
+    thickness_unit: unite retenue pour la cellule ('mm' ou 'in').
+    thickness_unit (argument): mm | in | auto, defaut CSV_THICKNESS_UNIT.
+    """
+    thickness_unit = thickness_unit or CSV_THICKNESS_UNIT
+    if thickness_unit not in THICKNESS_UNITS:
+        raise ValueError(f"Unite d'epaisseur inconnue: {thickness_unit} ({', '.join(THICKNESS_UNITS)})")
+    rows = []
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        dialect = _sniff_dialect(f.read(SNIFF_SIZE))
+        f.seek(0)
+        for row in csv.reader(f, dialect):
+            if len(row) < 2:
+                continue
+            try:
+                qty = int(row[0].strip())
+            except ValueError:
+                continue
+            # Le tag est dans le nom de fichier (colonne 2)
+            filename = row[1].strip()
+            tag = search_tag(filename)
+            if not tag:
+                continue
+            thickness, unit = _thickness_cell(row[3]) if len(row) > 3 else (None, None)
+            rows.append({'tag': tag, 'qty': qty, 'filename': filename,
+                         'material': row[2].strip() if len(row) > 2 else '',
+                         'thickness': thickness, 'thickness_unit': unit})
+
+    # Cellules sans unite: reglage, ou detection sur l'ensemble du fichier
+    bare = [r for r in rows if r['thickness'] is not None and r['thickness_unit'] is None]
+    if thickness_unit == 'auto':
+        thickness_unit = 'in' if bare and max(r['thickness'] for r in bare) < INCH_MAX_THICKNESS else 'mm'
+    for r in bare:
+        r['thickness_unit'] = thickness_unit
+    for r in rows:
+        if r['thickness_unit'] == 'in':
+            r['thickness'] = round(r['thickness'] * 25.4, 4)
+    return rows
+
+
+def parse_csv(path: str) -> Dict[str, int]:
+    """Paires (Tag, Qty) d'un CSV de nesting; la premiere ligne d'un tag l'emporte"""
+    tag_qty = {}
+    for row in parse_csv_rows(path):
+        tag_qty.setdefault(row['tag'], row['qty'])
+    return tag_qty
+
+
+# =============================================================================
+# CACHE (cle: chemin + mtime + taille)
+# =============================================================================
+def _read_disk_cache() -> Dict[str, Tuple[int, int, str, Dict[str, int]]]:
+    """Entrees du fichier cache (vide s'il est absent ou illisible)"""
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {path: (entry['mtime_ns'], entry['size'], entry.get('digest'), entry['tags'])
+            for path, entry in data.items()}
+
+
+def _load_disk_cache() -> None:
+    global _disk_cache_loaded
+    _disk_cache_loaded = True
+    for path, entry in _read_disk_cache().items():
+        _memory_cache.setdefault(path, entry)
+
+
+def _save_disk_cache(updated: str) -> None:
+    """Ecrit le cache disque avec l'entree `updated`
+
+    Le fichier est relu juste avant: les entrees ecrites entre-temps par
+    d'autres processus (meme CACHE_DIR) sont gardees, pas ecrasees.
+    """
+    entries = _read_disk_cache()
+    entries[updated] = _memory_cache[updated]
+    _memory_cache.update(entries)
+    data = {
+        path: {'mtime_ns': mtime_ns, 'size': size, 'digest': digest, 'tags': tags}
+        for path, (mtime_ns, size, digest, tags) in _memory_cache.items()
+    }
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Fichier temporaire propre a l'ecriture (plusieurs processus partagent CACHE_DIR)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix='csv_reference.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, CACHE_FILE)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def load_csv_cached(path: str) -> Dict[str, int]:
+    """parse_csv() avec cache: reparse seulement si mtime, taille ou grammaire ont change"""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    digest = f"{CACHE_VERSION}:{pairing_digest()}"
+    with _lock:
+        if not _disk_cache_loaded:
+            _load_disk_cache()
+        cached = _memory_cache.get(path)
+        if cached and cached[:3] == (stat.st_mtime_ns, stat.st_size, digest):
+            return cached[3]
+
+    tag_qty = parse_csv(path)
+    with _lock:
+        _memory_cache[path] = (stat.st_mtime_ns, stat.st_size, digest, tag_qty)
+        try:
+            _save_disk_cache(path)
+        except OSError:
+            pass  # Cache disque optionnel (dossier en lecture seule)
+    return tag_qty
+
+
+# =============================================================================
+# REFERENCE FUSIONNEE
+# =============================================================================
+def load_reference(nesting_dir: str) -> Dict[str, Dict]:
+    """Reference fusionnee de tous les CSV de nesting
+
+    Retourne {tag: {'qty': total, 'sources': {'Punch/10381-13-M02.csv': qty, ...}}}.
+    Les quantites d'un meme tag present dans plusieurs exports sont additionnees.
+    """
+    reference = {}
+    for path in find_nesting_csvs(nesting_dir):
+        source = os.path.relpath(path, nesting_dir).replace(os.sep, '/')
+        for tag, qty in load_csv_cached(path).items():
+            entry = reference.setdefault(tag, {'qty': 0, 'sources': {}})
+            entry['qty'] += qty
+            entry['sources'][source] = qty
+    return reference
+
+
+def load_tag_qty(nesting_dir: str) -> Dict[str, int]:
+    """Reference {tag: quantite totale} de tous les CSV de nesting"""
+    return {tag: entry['qty'] for tag, entry in load_reference(nesting_dir).items()}
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python -m pdf_extraction.csv_reference <dossier Sheet_Metal_Nesting>")
+        return 1
+    nesting_dir = sys.argv[1]
+    csv_files = find_nesting_csvs(nesting_dir)
+    if not csv_files:
+        print(f"[-] Aucun CSV sous: {nesting_dir}")
+        return 1
+
+    reference = load_reference(nesting_dir)
+    print(f"[+] {len(csv_files)} CSV | {len(reference)} tags")
+    for path in csv_files:
+        print(f"    {os.path.relpath(path, nesting_dir)}: {len(load_csv_cached(path))} tags")
+    multi = {t: e for t, e in reference.items() if len(e['sources']) > 1}
+    if multi:
+        print(f"\n[!] {len(multi)} tags presents dans plusieurs exports:")
+        for tag, entry in sorted(multi.items())[:20]:
+            print(f"    {tag}: total={entry['qty']} {entry['sources']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,416 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+INVENTAIRE DXF - Colonne Filename.dxf des CSV contre les DXF exportes
+=============================================================================
+La 2e colonne des CSV de nesting nomme le DXF de chaque tag, mais rien ne
+verifiait que ce fichier existe, qu'il s'agit bien de la piece du tag, ni
+que son epaisseur est celle du CSV (4e colonne, unite: csv_reference
+CSV_THICKNESS_UNIT ou --csv-unit; comparee en mm). Ici:
+
+1. Scan des dossiers d'export du module (5_Exportation, recursif): tous les
+   .dxf, indexes par nom de fichier.
+2. Lecture en flux (read_dxf), en parallele (ProcessPoolExecutor): paires
+   code / valeur ligne par ligne, sans charger le dessin.
+     - HEADER: $INSUNITS, $THICKNESS, proprietes $CUSTOMPROPERTYTAG /
+       $CUSTOMPROPERTY (numero de piece, epaisseur)
+     - ENTITIES: seulement TEXT / MTEXT (tag, "THK 1.52") et le code 39
+       (epaisseur d'extrusion). TABLES et BLOCKS sont sautes; la lecture
+       s'arrete des que tag et epaisseur sont connus.
+   Un DXF binaire n'est pas lu (statut unreadable).
+3. Jointure CSV / DXF / PDF (dxf_report): une ligne par ligne CSV et par
+   DXF orphelin. La qty PDF est comparee au total de reference du tag
+   (somme Punch + Laser, comme load_reference), une seule fois par tag.
+
+Statuts: ok | missing_dxf | identity | thickness | unreadable | orphan
+Les lectures sont gardees en memoire (chemin + mtime + taille): une
+nouvelle verification ne relit que les DXF modifies.
+
+Usage:
+    python -m pdf_extraction.dxf_inventory <dossier Sheet_Metal_Nesting|csv> [--pdf X.pdf] [--workers 4]
+                                          [--csv-unit auto|mm|in]
+    python -m pdf_extraction.dxf_inventory <...> --dxf-dir <dossier DXF> [--all]
+=============================================================================
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pdf_extraction.tags import find_tags, search_tag
+
+# Tolerance de comparaison des epaisseurs (mm)
+THICKNESS_TOLERANCE = 0.02
+# En dessous, la lecture reste dans le processus (demarrage du pool plus cher)
+PARALLEL_MIN_FILES = 64
+CHUNK_SIZE = 32
+
+# Proprietes personnalisees de l'en-tete (noms compares en minuscules, sans espaces)
+PART_PROPERTIES = ('partnumber', 'numerodepiece', 'tag', 'part')
+THICKNESS_PROPERTIES = ('thickness', 'sheetmetalthickness', 'epaisseur', 'thk')
+
+# "THK 1.52", "THICKNESS: 0.060 in", "EP. 1,52 mm"
+_THICKNESS_TEXT = re.compile(
+    r'\b(?:THK|THICKNESS|EP(?:AISSEUR)?\.?)\s*[:=]?\s*(\d+(?:[.,]\d+)?)\s*(mm|in|")?', re.IGNORECASE)
+# Codes de mise en forme MTEXT (\\P saut de paragraphe, \\fArial|b0; ...) et accolades
+_MTEXT_CODES = re.compile(r'\\P|\\[A-Za-z][^;\\]*;|[{}]')
+
+# $INSUNITS -> facteur vers mm (1 pouce, 4 mm, 5 cm, 6 m)
+_UNIT_TO_MM = {1: 25.4, 4: 1.0, 5: 10.0, 6: 1000.0}
+_BINARY_SENTINEL = b'AutoCAD Binary DXF'
+
+DxfKey = Tuple[str, int, int]
+
+# (chemin, mtime_ns, taille) -> lecture
+_read_cache: Dict[DxfKey, Dict] = {}
+
+
+# =============================================================================
+# LECTURE EN FLUX D'UN DXF
+# =============================================================================
+def _number(text: str) -> Optional[float]:
+    try:
+        return float(text.replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def _thickness_from_text(text: str) -> Optional[float]:
+    """Epaisseur en mm d'un texte "THK 1.52" (None si absente)"""
+    match = _THICKNESS_TEXT.search(text)
+    if not match:
+        return None
+    value = _number(match.group(1))
+    if value is not None and match.group(2) and match.group(2).lower() in ('in', '"'):
+        value *= 25.4
+    return value
+
+
+def read_dxf(path: str) -> Dict:
+    """Identite et epaisseur d'un DXF ASCII, lu en flux
+
+    {'path', 'tags' (tags trouves dans le dessin), 'thickness' (mm ou None),
+     'thickness_source', 'units', 'error'}
+    """
+    info = {'path': path, 'tags': [], 'thickness': None, 'thickness_source': None, 'units': None, 'error': None}
+    header, props, texts, extrusions = {}, {}, [], Counter()
+    # Arret anticipe: tag et epaisseur explicite (propriete ou texte) deja lus
+    has_tag = has_thickness = False
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(_BINARY_SENTINEL)) == _BINARY_SENTINEL:
+                info['error'] = "DXF binaire"
+                return info
+            f.seek(0)
+            lines = iter(f)
+            section = entity = variable = prop_name = None
+            for code in lines:
+                code = code.strip()
+                value = next(lines, b'').strip()
+                if code == b'0':
+                    if value == b'SECTION':
+                        next(lines, None)
+                        section = next(lines, b'').strip()
+                    elif value == b'ENDSEC':
+                        if section == b'ENTITIES' or (has_tag and has_thickness):
+                            break
+                        section = None
+                    elif section == b'ENTITIES':
+                        if has_tag and has_thickness:
+                            break
+                        entity = value
+                    continue
+                if section == b'HEADER':
+                    if code == b'9':
+                        variable = value
+                    elif variable == b'$CUSTOMPROPERTYTAG':
+                        prop_name = re.sub(r'[\s_.-]', '', value.decode('utf-8', 'replace')).lower()
+                    elif variable == b'$CUSTOMPROPERTY' and prop_name:
+                        text = props[prop_name] = value.decode('utf-8', 'replace')
+                        has_tag = has_tag or (prop_name in PART_PROPERTIES and search_tag(text) is not None)
+                        has_thickness = has_thickness or (prop_name in THICKNESS_PROPERTIES
+                                                          and _thickness_from_text(f"THK {text}") is not None)
+                        prop_name = None
+                    elif variable in (b'$INSUNITS', b'$THICKNESS'):
+                        header[variable] = value.decode('ascii', 'replace')
+                elif section == b'ENTITIES':
+                    if code in (b'1', b'3') and entity in (b'TEXT', b'MTEXT'):
+                        text = _MTEXT_CODES.sub(' ', value.decode('utf-8', 'replace'))
+                        texts.append(text)
+                        has_tag = has_tag or search_tag(text) is not None
+                        has_thickness = has_thickness or _thickness_from_text(text) is not None
+                    elif code == b'39':
+                        number = _number(value.decode('ascii', 'replace'))
+                        if number:
+                            extrusions[round(number, 4)] += 1
+    except OSError as e:
+        info['error'] = f"{type(e).__name__}: {e}"
+        return info
+
+    units = header.get(b'$INSUNITS', '')
+    info['units'] = int(units) if units.lstrip('-').isdigit() else None
+    to_mm = _UNIT_TO_MM.get(info['units'], 1.0)
+
+    tags = [tag for name in PART_PROPERTIES if name in props for tag in find_tags(props[name])]
+    for text in texts:
+        tags.extend(find_tags(text))
+    info['tags'] = sorted(set(tags))
+
+    for source, value in _thickness_candidates(props, header, texts, extrusions, to_mm):
+        info['thickness'], info['thickness_source'] = round(value, 4), source
+        break
+    return info
+
+
+def _thickness_candidates(props: Dict[str, str], header: Dict[bytes, str], texts: List[str],
+                          extrusions: Counter, to_mm: float) -> Iterable[Tuple[str, float]]:
+    """(source, epaisseur mm) par ordre de confiance: propriete, texte, extrusion, $THICKNESS"""
+    for name in THICKNESS_PROPERTIES:
+        if name in props:
+            value = _thickness_from_text(f"THK {props[name]}")
+            if value:
+                # Sans unite explicite, la propriete suit $INSUNITS
+                yield 'property', value if re.search(r'mm|in|"', props[name], re.IGNORECASE) else value * to_mm
+    for text in texts:
+        value = _thickness_from_text(text)
+        if value:
+            yield 'text', value
+    if extrusions:
+        yield 'extrusion', extrusions.most_common(1)[0][0] * to_mm
+    value = _number(header.get(b'$THICKNESS') or '0')
+    if value:
+        yield 'header', value * to_mm
+
+
+def read_dxf_cached(path: str) -> Dict:
+    """read_dxf() avec cache memoire (chemin + mtime + taille)"""
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    info = _read_cache.get(key)
+    if info is None:
+        info = _read_cache[key] = read_dxf(path)
+    return info
+
+
+# =============================================================================
+# SCAN DES DOSSIERS D'EXPORT
+# =============================================================================
+def export_dir_for(nesting_dir: str) -> str:
+    """Dossier d'export du module (5_Exportation) d'un dossier Sheet_Metal_Nesting"""
+    return os.path.dirname(os.path.abspath(nesting_dir))
+
+
+def scan_dxf_files(folders: Iterable[str]) -> Dict[str, List[str]]:
+    """{nom de fichier en minuscules: [chemins]} de tous les .dxf (recursif, os.scandir)"""
+    found = {}
+    stack = [f for f in folders if os.path.isdir(f)]
+    seen = set()
+    while stack:
+        folder = os.path.abspath(stack.pop())
+        if folder in seen:
+            continue
+        seen.add(folder)
+        try:
+            entries = list(os.scandir(folder))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+            elif entry.name.lower().endswith('.dxf'):
+                found.setdefault(entry.name.lower(), []).append(entry.path)
+    for paths in found.values():
+        paths.sort()
+    return found
+
+
+def _read_many(paths: List[str]) -> List[Dict]:
+    return [read_dxf(p) for p in paths]
+
+
+def read_dxfs(paths: List[str], workers: Optional[int] = None) -> Dict[str, Dict]:
+    """{chemin: lecture} en parallele; seuls les DXF absents du cache sont relus"""
+    results, todo = {}, []
+    for path in paths:
+        st = os.stat(path)
+        info = _read_cache.get((path, st.st_mtime_ns, st.st_size))
+        if info is None:
+            todo.append((path, st.st_mtime_ns, st.st_size))
+        else:
+            results[path] = info
+    workers = workers or os.cpu_count() or 1
+    if len(todo) < PARALLEL_MIN_FILES or workers <= 1:
+        fresh = _read_many([t[0] for t in todo])
+    else:
+        chunks = [[t[0] for t in todo[i:i + CHUNK_SIZE]] for i in range(0, len(todo), CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fresh = [info for batch in pool.map(_read_many, chunks) for info in batch]
+    for key, info in zip(todo, fresh):
+        _read_cache[key] = info
+        results[key[0]] = info
+    return results
+
+
+# =============================================================================
+# JOINTURE CSV / DXF / PDF
+# =============================================================================
+def _csv_rows(nesting_dir: str, csv_unit: Optional[str] = None) -> List[Dict]:
+    from pdf_extraction.csv_reference import find_nesting_csvs, parse_csv_rows
+    rows = []
+    for path in find_nesting_csvs(nesting_dir):
+        source = os.path.relpath(path, nesting_dir).replace(os.sep, '/')
+        for row in parse_csv_rows(path, csv_unit):
+            row['source'] = source
+            rows.append(row)
+    return rows
+
+
+def _dxf_name(filename: str) -> str:
+    name = os.path.basename(filename.replace('\\', '/'))
+    return name if name.lower().endswith('.dxf') else name + '.dxf'
+
+
+def pick_dxf(row: Dict, candidates: List[str]) -> Optional[str]:
+    """DXF retenu pour une ligne CSV: copie du dossier du CSV (Punch/, Laser/...) d'abord"""
+    if not candidates:
+        return None
+    csv_folder = os.path.dirname(row['source'])
+    return next((p for p in candidates if os.path.basename(os.path.dirname(p)) == csv_folder), candidates[0])
+
+
+def check_row(row: Dict, candidates: List[str], readings: Dict[str, Dict]) -> Dict:
+    """Statut d'une ligne CSV contre son DXF"""
+    entry = {'tag': row['tag'], 'filename': row['filename'], 'source': row['source'], 'csv_qty': row['qty'],
+             'csv_thickness': row['thickness'], 'csv_unit': row['thickness_unit'], 'dxf': None, 'dxf_tags': [], 'dxf_thickness': None,
+             'duplicates': max(0, len(candidates) - 1), 'status': 'ok', 'detail': ''}
+    path = pick_dxf(row, candidates)
+    if path is None:
+        entry.update(status='missing_dxf', detail="DXF introuvable dans les dossiers d'export")
+        return entry
+    info = readings[path]
+    entry.update(dxf=path, dxf_tags=info['tags'], dxf_thickness=info['thickness'])
+    if info['error']:
+        entry.update(status='unreadable', detail=info['error'])
+    elif info['tags'] and row['tag'] not in info['tags']:
+        entry.update(status='identity', detail=f"piece du DXF: {', '.join(info['tags']) or os.path.basename(path)}")
+    elif (info['thickness'] is not None and row['thickness'] is not None
+          and abs(info['thickness'] - row['thickness']) > THICKNESS_TOLERANCE):
+        entry.update(status='thickness',
+                     detail=f"DXF {info['thickness']:g} mm ({info['thickness_source']}) vs CSV {row['thickness']:g} mm"
+                            f"{' (po)' if row['thickness_unit'] == 'in' else ''}")
+    return entry
+
+
+def dxf_inventory(nesting_dir: str, dxf_dirs: Optional[List[str]] = None, workers: Optional[int] = None,
+                  csv_unit: Optional[str] = None) -> Dict:
+    """Inventaire des DXF du module contre la colonne Filename.dxf des CSV
+
+    {'rows': [une entree par ligne CSV puis par DXF orphelin], 'counts': {statut: n},
+     'reference': {tag: qty totale (load_tag_qty)}, 'files': DXF trouves, 'elapsed_ms'}
+    """
+    from pdf_extraction.csv_reference import load_tag_qty
+    start = time.perf_counter()
+    rows = _csv_rows(nesting_dir, csv_unit)
+    files = scan_dxf_files(dxf_dirs or [export_dir_for(nesting_dir)])
+    candidates = [files.get(_dxf_name(row['filename']).lower(), []) for row in rows]
+    # Seul le DXF retenu pour chaque ligne est lu (pas les copies du meme nom)
+    chosen = {pick_dxf(row, paths) for row, paths in zip(rows, candidates)} - {None}
+    readings = read_dxfs(sorted(chosen), workers)
+
+    entries = [check_row(row, paths, readings) for row, paths in zip(rows, candidates)]
+    wanted = {_dxf_name(row['filename']).lower() for row in rows}
+    for name in sorted(set(files) - wanted):
+        for path in files[name]:
+            entries.append({'tag': search_tag(name), 'filename': os.path.basename(path), 'source': None,
+                            'csv_qty': None, 'csv_thickness': None, 'csv_unit': None, 'dxf': path, 'dxf_tags': [],
+                            'dxf_thickness': None, 'duplicates': len(files[name]) - 1,
+                            'status': 'orphan', 'detail': "DXF absent des CSV"})
+    return {
+        'rows': entries,
+        'counts': dict(Counter(e['status'] for e in entries)),
+        'reference': load_tag_qty(nesting_dir),
+        'files': sum(len(p) for p in files.values()),
+        'read': len(readings),
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 1),
+    }
+
+
+def dxf_report(inventory: Dict, extracted: Optional[Dict[str, int]] = None) -> Dict:
+    """Rapport PDF vs CSV vs DXF: ajoute les qty PDF et de reference a chaque entree
+
+    ref_qty est le total du tag sur tous les CSV (un tag a la fois en Punch et
+    en Laser compte pour la somme). 'problems' garde les entrees en erreur DXF
+    et, une fois par tag (premiere ligne CSV), les qty PDF != ref_qty.
+    """
+    reference = inventory['reference']
+    rows, compared = [], set()
+    for entry in inventory['rows']:
+        row = dict(entry)
+        row['ref_qty'] = reference.get(entry['tag']) if entry['csv_qty'] is not None else None
+        qty_mismatch = False
+        if extracted is not None:
+            row['pdf_qty'] = extracted.get(entry['tag'])
+            if row['ref_qty'] is not None and entry['tag'] not in compared:
+                compared.add(entry['tag'])
+                qty_mismatch = row['pdf_qty'] != row['ref_qty']
+        row['qty_mismatch'] = qty_mismatch
+        rows.append(row)
+    problems = [r for r in rows if r['status'] != 'ok' or r['qty_mismatch']]
+    return {'counts': inventory['counts'], 'files': inventory['files'], 'elapsed_ms': inventory['elapsed_ms'],
+            'rows': rows, 'problems': problems}
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+def main():
+    parser = argparse.ArgumentParser(description="Inventaire DXF: colonne Filename.dxf des CSV vs DXF exportes")
+    parser.add_argument('reference', help="Dossier Sheet_Metal_Nesting ou un de ses CSV")
+    parser.add_argument('--pdf', help="PDF a joindre au rapport (qty PDF par tag)")
+    parser.add_argument('--method', default='proximity')
+    parser.add_argument('--dxf-dir', action='append', help="Dossier DXF (defaut: 5_Exportation du module)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--csv-unit', choices=('auto', 'mm', 'in'), default=None,
+                        help="Unite de la colonne Thickness des CSV (defaut: XNRGY_CSV_THICKNESS_UNIT ou auto)")
+    parser.add_argument('--all', action='store_true', help="Afficher aussi les tags sans erreur")
+    parser.add_argument('--limit', type=int, default=50, help="Lignes affichees au plus")
+    args = parser.parse_args()
+
+    from pdf_extraction.csv_reference import nesting_dir_for
+    nesting_dir = args.reference if os.path.isdir(args.reference) else nesting_dir_for(args.reference)
+
+    print("=" * 80)
+    print("INVENTAIRE DXF - CSV (Filename.dxf) vs DXF exportes vs PDF")
+    print("=" * 80)
+    inventory = dxf_inventory(nesting_dir, args.dxf_dir, args.workers, args.csv_unit)
+    extracted = None
+    if args.pdf:
+        from pdf_extraction.service import METHODS
+        extracted = METHODS[args.method](args.pdf)
+    report = dxf_report(inventory, extracted)
+
+    print(f"[>] {report['files']} DXF trouves, {inventory['read']} lus en {report['elapsed_ms']:.0f} ms")
+    print("    " + ' | '.join(f"{status}: {n}" for status, n in sorted(report['counts'].items())))
+    shown = report['rows'] if args.all else report['problems']
+    if shown:
+        print(f"\n{'Tag':<18} {'Statut':<12} {'PDF':<5} {'Ref':<5} {'CSV':<5} {'Ep. CSV':<8} {'Ep. DXF':<8} Detail")
+        for r in sorted(shown, key=lambda r: (r['status'] == 'ok', r['tag'] or ''))[:args.limit]:
+            pdf_qty = r.get('pdf_qty')
+            print(f"{r['tag'] or '-':<18} {r['status']:<12} {'-' if pdf_qty is None else pdf_qty:<5} "
+                  f"{'-' if r['ref_qty'] is None else r['ref_qty']:<5} "
+                  f"{'-' if r['csv_qty'] is None else r['csv_qty']:<5} "
+                  f"{'-' if r['csv_thickness'] is None else r['csv_thickness']:<8} "
+                  f"{'-' if r['dxf_thickness'] is None else r['dxf_thickness']:<8} {r['detail']}")
+    if len(shown) > args.limit:
+        print(f"... {len(shown) - args.limit} autre(s) (--limit)")
+    print(f"\n[{'+' if not report['problems'] else '!'}] {len(report['problems'])} tag(s) a verifier")
+    return 1 if report['problems'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
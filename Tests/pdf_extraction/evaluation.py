@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+EVALUATION - Comparaison extraction PDF vs reference CSV (Tag + Qty)
+=============================================================================
+"""
+
+from typing import Dict
+
+
+def compare(extracted: Dict[str, int], reference: Dict[str, int]) -> Dict:
+    """Comparaison complete (sans troncature) d'une extraction avec la reference"""
+    correct = [t for t, q in extracted.items() if reference.get(t) == q]
+    wrong = [(t, reference[t], q) for t, q in extracted.items() if t in reference and reference[t] != q]
+    missing = [t for t in reference if t not in extracted]
+    extra = [t for t in extracted if t not in reference]
+    total = len(reference)
+    return {
+        'total': total,
+        'correct': len(correct),
+        'wrong': len(wrong),
+        'missing': len(missing),
+        'extra': len(extra),
+        'accuracy': round(len(correct) / total * 100, 1) if total > 0 else 0,
+        'wrong_details': sorted(wrong),
+        'missing_tags': sorted(missing),
+        'extra_tags': sorted(extra),
+    }
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+FAST PATH - Proximite PyMuPDF seule (fitz + re, aucun moteur lourd)
+=============================================================================
+Point d'entree minimal quand seule la methode de proximite est voulue:
+pas de pdfplumber, pandas, camelot (OpenCV, Ghostscript) ni tabula (JVM).
+
+Le controle de demarrage lance un interpreteur neuf, mesure le temps
+d'import + extraction d'un PDF d'une page et echoue si le budget est depasse ou
+si un moteur lourd a ete importe.
+
+Usage:
+    python -m pdf_extraction.fastpath <fichier.pdf> [csv|dossier nesting]
+    python -m pdf_extraction.fastpath --check-startup [--budget-ms 400]
+=============================================================================
+"""
+
+import sys
+
+from pdf_extraction.proximity import pair_page_words
+
+# Budget de demarrage du fast path (import + ouverture), en millisecondes
+STARTUP_BUDGET_MS = 400
+
+# Modules qui ne doivent JAMAIS etre charges par le fast path
+HEAVY_MODULES = ('pdfplumber', 'pdfminer', 'pandas', 'numpy', 'camelot', 'cv2', 'ghostscript', 'tabula', 'jpype')
+
+
+def extract(pdf_path: str) -> dict:
+    """{tag: qty} par proximite, directement via fitz"""
+    import fitz
+
+    tag_qty = {}
+    doc = fitz.open(pdf_path)
+    try:
+        for page in doc:
+            for tag, qty, _ in pair_page_words(page.get_text("words")):
+                if tag not in tag_qty:
+                    tag_qty[tag] = qty
+    finally:
+        doc.close()
+    return tag_qty
+
+
+# =============================================================================
+# CONTROLE DU BUDGET DE DEMARRAGE
+# =============================================================================
+_STARTUP_PROBE = r'''
+import sys, time, json
+start = time.perf_counter()
+import fitz
+from pdf_extraction import fastpath
+fastpath.extract(sys.argv[1])
+elapsed = (time.perf_counter() - start) * 1000
+heavy = sorted({m.split('.')[0] for m in sys.modules} & set(fastpath.HEAVY_MODULES))
+print(json.dumps({"elapsed_ms": elapsed, "heavy": heavy}))
+'''
+
+
+def check_startup(budget_ms: float = STARTUP_BUDGET_MS, runs: int = 5) -> bool:
+    """Mesure le demarrage a froid du fast path dans des interpreteurs neufs"""
+    import json
+    import os
+    import subprocess
+    import tempfile
+
+    import fitz
+
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=package_root + os.pathsep + os.environ.get('PYTHONPATH', ''))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        probe_pdf = os.path.join(tmp, 'probe.pdf')
+        doc = fitz.open()
+        doc.new_page().insert_text((50, 50), "WPA1302-0101 4")
+        doc.save(probe_pdf)
+        doc.close()
+
+        timings = []
+        heavy = set()
+        for _ in range(runs):
+            out = subprocess.run([sys.executable, '-W', 'ignore', '-c', _STARTUP_PROBE, probe_pdf],
+                                 env=env, capture_output=True, text=True, check=True)
+            probe = json.loads(out.stdout.strip().splitlines()[-1])
+            timings.append(probe['elapsed_ms'])
+            heavy.update(probe['heavy'])
+
+    timings.sort()
+    median = timings[len(timings) // 2]
+    print(f"[>] Demarrage fast path ({runs} essais): median {median:.0f} ms | "
+          f"min {timings[0]:.0f} ms | max {timings[-1]:.0f} ms | budget {budget_ms:.0f} ms")
+
+    ok = True
+    if heavy:
+        print(f"[-] Moteurs lourds importes: {', '.join(sorted(heavy))}")
+        ok = False
+    if median > budget_ms:
+        print(f"[-] Budget depasse: {median:.0f} ms > {budget_ms:.0f} ms")
+        ok = False
+    if ok:
+        print("[+] Budget respecte, aucun moteur lourd importe")
+    return ok
+
+
+def main():
+    args = sys.argv[1:]
+    if '--check-startup' in args:
+        budget = STARTUP_BUDGET_MS
+        if '--budget-ms' in args:
+            budget = float(args[args.index('--budget-ms') + 1])
+        return 0 if check_startup(budget) else 1
+
+    if not args:
+        print("Usage: python -m pdf_extraction.fastpath <fichier.pdf> [csv|dossier nesting]")
+        print("       python -m pdf_extraction.fastpath --check-startup [--budget-ms N]")
+        return 1
+
+    tag_qty = extract(args[0])
+    print(f"[+] {len(tag_qty)} tags extraits")
+    if len(args) > 1:
+        import os
+        from pdf_extraction.csv_reference import load_tag_qty, nesting_dir_for
+        from pdf_extraction.evaluation import compare
+        nesting_dir = args[1] if os.path.isdir(args[1]) else nesting_dir_for(args[1])
+        result = compare(tag_qty, load_tag_qty(nesting_dir))
+        print(f"    => {result['correct']}/{result['total']} ({result['accuracy']}%) | "
+              f"Wrong: {result['wrong']} | Missing: {result['missing']}")
+    else:
+        for tag in sorted(tag_qty):
+            print(f"    {tag:<20} {tag_qty[tag]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+HISTORIQUE DES VERIFICATIONS - Projet / REF / module / PDF / methode / tag
+=============================================================================
+Les resultats de evaluate() ne vivent que dans la console: savoir quels tags
+ont echoue dans REF13 le mois dernier demande de tout relancer. Chaque
+verification (service, file de jobs, benchmarks via ResultRecorder) est
+ajoutee ici, dans une base SQLite locale (CACHE_DIR/history.sqlite):
+
+    runs:    une ligne par verification (date, projet, REF, module, PDF,
+             methode, compteurs, duree)
+    results: une ligne par tag (statut, qty PDF / CSV, page)
+
+Projet / REF / module sont lus dans le chemin du Vault
+(...\\Projects\\10381\\REF13\\M02\\...) ou, a defaut, dans le nom du CSV de
+reference (10381-13-M02.csv). Index sur la date, le module (REF, module,
+date), le projet et le tag: les rapports sur des annees de verifications
+restent de l'ordre de la milliseconde. Le store Parquet (results_store)
+reste l'outil des analyses colonnaires; ici, aucune dependance.
+
+Usage:
+    python -m pdf_extraction.history failures --ref REF13 [--since 30d]
+    python -m pdf_extraction.history tag WPA1302-0101 [--since 2026-01-01]
+    python -m pdf_extraction.history modules [--project 10381] [--since 90d]
+    python -m pdf_extraction.history runs [--module M02] [--limit 20]
+=============================================================================
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from pdf_extraction import CACHE_DIR
+
+HISTORY_PATH = os.path.join(CACHE_DIR, 'history.sqlite')
+
+FAILED_STATUSES = ('wrong', 'missing')
+
+# ...\Projects\10381\REF13\M02\... (separateurs Windows ou POSIX)
+_VAULT_PATH = re.compile(r'[\\/](?P<project>\d{4,6})[\\/](?P<ref>REF\d+)[\\/](?P<module>M\d+)(?=[\\/]|$)',
+                         re.IGNORECASE)
+# 10381-13-M02.csv
+_CSV_NAME = re.compile(r'^(?P<project>\d{4,6})-(?P<ref>\d+)-(?P<module>M\d+)', re.IGNORECASE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    batch TEXT,
+    run_time REAL NOT NULL,
+    project TEXT,
+    ref TEXT,
+    module TEXT,
+    pdf TEXT NOT NULL,
+    method TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    wrong INTEGER NOT NULL,
+    missing INTEGER NOT NULL,
+    extra INTEGER NOT NULL,
+    elapsed_ms REAL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_time ON runs(run_time);
+CREATE INDEX IF NOT EXISTS idx_runs_module ON runs(ref, module, run_time);
+CREATE INDEX IF NOT EXISTS idx_runs_project ON runs(project, run_time);
+CREATE TABLE IF NOT EXISTS results (
+    run INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    status TEXT NOT NULL,
+    extracted_qty INTEGER,
+    reference_qty INTEGER,
+    page INTEGER,
+    PRIMARY KEY (run, tag)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_results_tag ON results(tag);
+"""
+
+
+def module_info(pdf_path: str, reference_path: Optional[str] = None) -> Dict[str, Optional[str]]:
+    """{'project', 'ref', 'module'} du chemin du PDF, sinon du CSV de reference"""
+    for path in (pdf_path, reference_path):
+        match = path and _VAULT_PATH.search(path)
+        if match:
+            return {'project': match['project'], 'ref': match['ref'].upper(), 'module': match['module'].upper()}
+    if reference_path:
+        names = [os.path.basename(reference_path)]
+        if os.path.isdir(reference_path):
+            from pdf_extraction.csv_reference import find_nesting_csvs
+            names = [os.path.basename(p) for p in find_nesting_csvs(reference_path)]
+        for name in names:
+            match = _CSV_NAME.match(name)
+            if match:
+                return {'project': match['project'], 'ref': f"REF{match['ref']}", 'module': match['module'].upper()}
+    return {'project': None, 'ref': None, 'module': None}
+
+
+def parse_since(value: Optional[str]) -> Optional[float]:
+    """'30d', '12w', '6m', '1y' ou une date AAAA-MM-JJ -> epoch (None: depuis toujours)"""
+    if not value:
+        return None
+    match = re.fullmatch(r'(\d+)([dwmy])', value.strip().lower())
+    if match:
+        days = int(match[1]) * {'d': 1, 'w': 7, 'm': 30, 'y': 365}[match[2]]
+        return (datetime.now() - timedelta(days=days)).timestamp()
+    return datetime.strptime(value, '%Y-%m-%d').timestamp()
+
+
+def _status(got: Optional[int], expected: Optional[int]) -> str:
+    if expected is None:
+        return 'extra'
+    if got is None:
+        return 'missing'
+    return 'correct' if got == expected else 'wrong'
+
+
+class HistoryDB:
+    """Historique des verifications dans SQLite (une connexion par appelant)"""
+
+    def __init__(self, path: str = HISTORY_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        self._conn.executescript(_SCHEMA)
+
+    # -------------------------------------------------------------------------
+    # Enregistrement
+    # -------------------------------------------------------------------------
+    def record(self, pdf: str, method: str, extracted: Dict[str, int], reference: Dict[str, int],
+               elapsed_ms: Optional[float] = None, reference_path: Optional[str] = None,
+               pages: Optional[Dict[str, int]] = None, batch: Optional[str] = None,
+               run_time: Optional[float] = None) -> int:
+        """Ajoute une verification (une ligne par tag de la reference et par tag en trop)"""
+        rows = []
+        for tag in list(reference) + [t for t in extracted if t not in reference]:
+            got, expected = extracted.get(tag), reference.get(tag)
+            rows.append((tag, _status(got, expected), got, expected, (pages or {}).get(tag)))
+        counts = {s: 0 for s in ('correct', 'wrong', 'missing', 'extra')}
+        for row in rows:
+            counts[row[1]] += 1
+
+        info = module_info(pdf, reference_path)
+        with self._conn:
+            run_id = self._conn.execute(
+                'INSERT INTO runs (batch, run_time, project, ref, module, pdf, method, '
+                'total, correct, wrong, missing, extra, elapsed_ms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (batch, run_time or time.time(), info['project'], info['ref'], info['module'],
+                 os.path.abspath(pdf) if os.path.exists(pdf) else pdf, method, len(reference),
+                 counts['correct'], counts['wrong'], counts['missing'], counts['extra'], elapsed_ms)).lastrowid
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO results (run, tag, status, extracted_qty, reference_qty, page) '
+                'VALUES (?, ?, ?, ?, ?, ?)', [(run_id,) + row for row in rows])
+        return run_id
+
+    # -------------------------------------------------------------------------
+    # Rapports
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _where(project=None, ref=None, module=None, method=None, pdf=None, since=None, until=None,
+               alias: str = 'u') -> Tuple[str, List]:
+        clauses, params = [], []
+        for column, value in (('project', project), ('ref', ref and ref.upper()),
+                              ('module', module and module.upper()), ('method', method)):
+            if value:
+                clauses.append(f'{alias}.{column} = ?')
+                params.append(value)
+        if pdf:
+            clauses.append(f'{alias}.pdf LIKE ?')
+            params.append(f'%{pdf}%')
+        if since is not None:
+            clauses.append(f'{alias}.run_time >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append(f'{alias}.run_time < ?')
+            params.append(until)
+        return (' AND '.join(clauses) or '1'), params
+
+    def failures(self, **filters) -> List[sqlite3.Row]:
+        """Tags en erreur (wrong / missing): nombre d'echecs, verifications, dernier echec"""
+        where, params = self._where(**filters)
+        return self._conn.execute(f"""
+            SELECT r.tag, COUNT(*) AS failures,
+                   SUM(r.status = 'wrong') AS wrong, SUM(r.status = 'missing') AS missing,
+                   MAX(u.run_time) AS last_failure,
+                   GROUP_CONCAT(DISTINCT u.ref || '/' || u.module) AS modules,
+                   GROUP_CONCAT(DISTINCT u.method) AS methods
+            FROM runs u JOIN results r ON r.run = u.id
+            WHERE {where} AND r.status IN ({','.join('?' * len(FAILED_STATUSES))})
+            GROUP BY r.tag ORDER BY failures DESC, r.tag""", params + list(FAILED_STATUSES)).fetchall()
+
+    def tag_history(self, tag: str, **filters) -> List[sqlite3.Row]:
+        """Toutes les verifications d'un tag, de la plus recente a la plus ancienne"""
+        from pdf_extraction.tags import normalize_tag
+        where, params = self._where(**filters)
+        return self._conn.execute(f"""
+            SELECT u.run_time, u.ref, u.module, u.pdf, u.method, r.status, r.extracted_qty, r.reference_qty, r.page
+            FROM results r JOIN runs u ON u.id = r.run
+            WHERE r.tag = ? AND {where} ORDER BY u.run_time DESC""", [normalize_tag(tag)] + params).fetchall()
+
+    def modules(self, **filters) -> List[sqlite3.Row]:
+        """Par module et methode: verifications, precision moyenne / derniere, date"""
+        where, params = self._where(**filters)
+        return self._conn.execute(f"""
+            SELECT u.project, u.ref, u.module, u.method, COUNT(*) AS runs,
+                   ROUND(AVG(CASE WHEN u.total THEN 100.0 * u.correct / u.total END), 1) AS avg_accuracy,
+                   MAX(u.run_time) AS last_run,
+                   -- Colonne nue: valeurs de la ligne retenue par MAX(run_time) (SQLite)
+                   ROUND(100.0 * u.correct / NULLIF(u.total, 0), 1) AS last_accuracy
+            FROM runs u WHERE {where}
+            GROUP BY u.project, u.ref, u.module, u.method
+            ORDER BY u.project, u.ref, u.module, u.method""", params).fetchall()
+
+    def runs(self, limit: int = 20, **filters) -> List[sqlite3.Row]:
+        where, params = self._where(**filters)
+        return self._conn.execute(f"SELECT * FROM runs u WHERE {where} ORDER BY u.run_time DESC LIMIT ?",
+                                  params + [limit]).fetchall()
+
+    def stats(self) -> Dict:
+        runs, first, last = self._conn.execute('SELECT COUNT(*), MIN(run_time), MAX(run_time) FROM runs').fetchone()
+        results = self._conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        return {'runs': runs, 'results': results, 'first': first, 'last': last,
+                'bytes': os.path.getsize(self.path) if os.path.exists(self.path) else 0}
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+def _name(path: str) -> str:
+    """Nom du fichier, chemin Windows ou POSIX"""
+    return re.split(r'[\\/]', path)[-1]
+
+
+def _date(ts: Optional[float]) -> str:
+    return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M') if ts else '-'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Historique des verifications PDF vs CSV")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--project')
+    common.add_argument('--ref', help="Ex: REF13")
+    common.add_argument('--module', help="Ex: M02")
+    common.add_argument('--method')
+    common.add_argument('--pdf', help="Partie du chemin du PDF")
+    common.add_argument('--since', help="30d, 12w, 6m, 1y ou AAAA-MM-JJ")
+    common.add_argument('--until', help="AAAA-MM-JJ (exclu)")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_fail = sub.add_parser('failures', parents=[common], help="Tags en erreur (wrong / missing)")
+    p_fail.set_defaults(since_default='30d')
+    p_tag = sub.add_parser('tag', parents=[common], help="Historique d'un tag")
+    p_tag.add_argument('tag')
+    sub.add_parser('modules', parents=[common], help="Precision par module et methode")
+    p_runs = sub.add_parser('runs', parents=[common], help="Dernieres verifications")
+    p_runs.add_argument('--limit', type=int, default=20)
+    sub.add_parser('stats', help="Taille de l'historique")
+    args = parser.parse_args()
+
+    if not os.path.exists(HISTORY_PATH):
+        print(f"[-] Aucun historique dans: {HISTORY_PATH}")
+        return 1
+
+    with HistoryDB() as history:
+        if args.command == 'stats':
+            s = history.stats()
+            print(f"Historique: {HISTORY_PATH}")
+            print(f"Verifications: {s['runs']} | Tags: {s['results']} | Du {_date(s['first'])} au {_date(s['last'])} | "
+                  f"{s['bytes'] / 1024 / 1024:.1f} Mo")
+            return 0
+
+        filters = {
+            'project': args.project, 'ref': args.ref, 'module': args.module, 'method': args.method, 'pdf': args.pdf,
+            'since': parse_since(args.since or getattr(args, 'since_default', None)),
+            'until': parse_since(args.until),
+        }
+        start = time.perf_counter()
+        if args.command == 'failures':
+            rows = history.failures(**filters)
+            print(f"{'Tag':<20} {'Echecs':<7} {'Wrong':<6} {'Missing':<8} {'Dernier echec':<17} {'Modules':<16} Methodes")
+            for r in rows:
+                print(f"{r['tag']:<20} {r['failures']:<7} {r['wrong']:<6} {r['missing']:<8} "
+                      f"{_date(r['last_failure']):<17} {r['modules'] or '-':<16} {r['methods']}")
+            found = f"{len(rows)} tag(s) en erreur"
+        elif args.command == 'tag':
+            rows = history.tag_history(args.tag, **filters)
+            for r in rows:
+                page = f"p{r['page']}" if r['page'] is not None else '-'
+                print(f"{_date(r['run_time']):<17} {r['ref'] or '-'}/{r['module'] or '-':<4} {r['method']:<12} "
+                      f"{r['status']:<8} pdf={r['extracted_qty']} csv={r['reference_qty']} {page:<5} "
+                      f"{_name(r['pdf'])}")
+            found = f"{len(rows)} verification(s)"
+        elif args.command == 'modules':
+            rows = history.modules(**filters)
+            print(f"{'Projet':<8} {'REF':<7} {'Module':<7} {'Methode':<12} {'Verif.':<7} {'Moy. %':<7} "
+                  f"{'Dern. %':<8} Derniere")
+            for r in rows:
+                print(f"{r['project'] or '-':<8} {r['ref'] or '-':<7} {r['module'] or '-':<7} {r['method']:<12} "
+                      f"{r['runs']:<7} {r['avg_accuracy'] if r['avg_accuracy'] is not None else '-':<7} "
+                      f"{r['last_accuracy'] if r['last_accuracy'] is not None else '-':<8} {_date(r['last_run'])}")
+            found = f"{len(rows)} module(s) / methode(s)"
+        else:
+            rows = history.runs(args.limit, **filters)
+            for r in rows:
+                elapsed = f"{r['elapsed_ms']:.0f} ms" if r['elapsed_ms'] is not None else '-'
+                print(f"{_date(r['run_time']):<17} {r['ref'] or '-'}/{r['module'] or '-':<4} {r['method']:<12} "
+                      f"{r['correct']}/{r['total']} | W {r['wrong']} M {r['missing']} E {r['extra']} | "
+                      f"{elapsed:<9} {_name(r['pdf'])}")
+            found = f"{len(rows)} verification(s)"
+    print(f"\n[+] {found} | Requete: {(time.perf_counter() - start) * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+EXPORTS INVENTOR (IDW -> PDF) - Pre-classification et lecture directe
+=============================================================================
+Les PDF du Vault sortent presque tous de l'export IDW d'Inventor: chaque
+ligne de la liste de pieces y est un bloc de texte dont les lignes sont les
+cellules, toujours dans le meme ordre de colonnes, par exemple:
+
+    bloc 37: '5' | 'WPA1300-0105' | '6' | 'PANEL SHEET 16GA'   (ITEM | TAG | QTE | DESCRIPTION)
+
+1. Pre-classification (classify): producteur / createur du PDF, puis
+   echantillon de SAMPLE_PAGES pages. L'ordre des colonnes le plus frequent
+   des blocs-lignes devient le gabarit; il doit couvrir au moins
+   MIN_AGREEMENT des blocs portant un tag et lire au moins une page de
+   l'echantillon sans repli.
+2. Lecture (extract_inventor): mots regroupes par bloc / ligne fitz, tag et
+   quantite lus a leur rang dans le bloc, sans index spatial. Seuls les
+   nombres de 1 a 3 chiffres sont tries en Y pour le controle.
+
+Controle par page: la cellule quantite doit etre le nombre que choisirait
+la proximite (aucun nombre isole plus proche sur la bande Y du tag) et
+chaque tag de la page doit etre dans un bloc-ligne. Sinon la page repasse
+par pair_page_words: le resultat reste celui de la proximite. Un document
+non reconnu passe entierement par la methode generique.
+
+Usage:
+    python -m pdf_extraction.inventor <pdf|dossier> [...] [--verify]
+=============================================================================
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pdf_extraction.proximity import (QTY_MAX_DIGITS, X_MAX_DISTANCE, Y_TOLERANCE, extract_proximity,
+                                      pair_page_words)
+from pdf_extraction.tags import TAG_PATTERN, tag_from_match
+
+INVENTOR_PRODUCER = re.compile(r'\binventor\b', re.IGNORECASE)
+SAMPLE_PAGES = 4          # Pages echantillonnees (reparties dans le document)
+MIN_SAMPLE_ROWS = 3       # Blocs-lignes minimum dans l'echantillon
+MIN_AGREEMENT = 0.9       # Part des blocs a tag qui suivent le gabarit
+
+# Gabarit: (nombre de cellules, rang du tag, rang de la quantite)
+Layout = Tuple[int, int, int]
+
+
+def _is_qty(text: str) -> bool:
+    return text.isdigit() and len(text) <= QTY_MAX_DIGITS
+
+
+def page_blocks(words: List[tuple]) -> List[List[List[tuple]]]:
+    """Blocs de la page: [cellules], une cellule = les mots d'une ligne du bloc
+
+    Regroupement par (block_no, line_no) du format compact fitz.
+    """
+    lines = {}
+    for w in words:
+        lines.setdefault((w[5], w[6]), []).append(w)
+    blocks = {}
+    for (block_no, _), cell in lines.items():
+        blocks.setdefault(block_no, []).append(cell)
+    return list(blocks.values())
+
+
+def _row_layout(cells: List[List[tuple]]) -> Optional[Layout]:
+    """Gabarit d'un bloc-ligne: un seul tag (cellule d'un mot), quantite a droite sinon a gauche"""
+    single = [cell[0][4] if len(cell) == 1 else None for cell in cells]
+    tag_cols = [i for i, text in enumerate(single) if text and TAG_PATTERN.fullmatch(text)]
+    if len(tag_cols) != 1:
+        return None
+    tag_col = tag_cols[0]
+    right = [i for i in range(tag_col + 1, len(cells)) if single[i] and _is_qty(single[i])]
+    left = [i for i in range(tag_col - 1, -1, -1) if single[i] and _is_qty(single[i])]
+    qty_col = right[0] if right else left[0] if left else None
+    return None if qty_col is None else (len(cells), tag_col, qty_col)
+
+
+def _proximity_choice(tag_word: tuple, ys: List[float], numbers: List[tuple]) -> Optional[tuple]:
+    """Nombre que retiendrait pair_page_words (None si egalite de X)"""
+    x, y = tag_word[0], tag_word[1]
+    band = numbers[bisect_left(ys, y - Y_TOLERANCE):bisect_right(ys, y + Y_TOLERANCE)]
+    right = [w for w in band if x < w[0] < x + X_MAX_DISTANCE]
+    if right:
+        best = min(right, key=itemgetter(0))
+    else:
+        left = [w for w in band if x - X_MAX_DISTANCE < w[0] < x]
+        if not left:
+            return None
+        best = max(left, key=itemgetter(0))
+    ties = right or left
+    return best if sum(1 for w in ties if w[0] == best[0]) == 1 else None
+
+
+def read_page_words(words: List[tuple], layout: Layout) -> Optional[List[Tuple[str, int]]]:
+    """(tag, qty) des blocs-lignes d'une page, dans l'ordre de lecture
+
+    Tag et quantite sont lus au rang du gabarit. None si la page sort du
+    gabarit: tag hors d'un bloc-ligne, ou nombre que la proximite
+    prefererait a la cellule quantite (nombre isole sur la bande Y).
+    """
+    size, tag_col, qty_col = layout
+    numbers, tag_count = [], 0
+    for w in words:
+        if _is_qty(w[4]):
+            numbers.append(w)
+        elif TAG_PATTERN.match(w[4]):
+            tag_count += 1
+
+    rows = []
+    for cells in page_blocks(words):
+        if len(cells) != size:
+            continue
+        tag_cell, qty_cell = cells[tag_col], cells[qty_col]
+        if len(tag_cell) == 1 and len(qty_cell) == 1 and _is_qty(qty_cell[0][4]):
+            match = TAG_PATTERN.fullmatch(tag_cell[0][4])
+            if match:
+                rows.append((tag_cell[0], qty_cell[0], tag_from_match(match)))
+    if len(rows) != tag_count:
+        return None
+
+    numbers.sort(key=itemgetter(1))
+    ys = [w[1] for w in numbers]
+    for tag_word, qty_word, _ in rows:
+        if _proximity_choice(tag_word, ys, numbers) is not qty_word:
+            return None
+    rows.sort(key=lambda r: (r[0][1], r[0][0]))
+    return [(tag, int(qty_word[4])) for _, qty_word, tag in rows]
+
+
+def _open(pdf_path):
+    import fitz
+    return pdf_path.open_fitz() if hasattr(pdf_path, 'open_fitz') else fitz.open(pdf_path)
+
+
+# =============================================================================
+# PRE-CLASSIFICATION
+# =============================================================================
+def classify(pdf_path) -> Dict:
+    """{'kind': 'inventor' | 'generic', 'producer', 'layout', 'reason'}
+
+    `layout` (cellules, rang du tag, rang de la quantite) n'est fourni que
+    pour un export Inventor dont l'echantillon suit un gabarit unique.
+    """
+    with _open(pdf_path) as doc:
+        meta = doc.metadata or {}
+        producer = ' / '.join(v for v in (meta.get('creator'), meta.get('producer')) if v)
+        info = {'kind': 'generic', 'producer': producer, 'layout': None, 'reason': ''}
+        if not INVENTOR_PRODUCER.search(producer):
+            info['reason'] = "producteur non Inventor"
+            return info
+
+        step = max(1, doc.page_count // SAMPLE_PAGES)
+        sample = [doc.load_page(i).get_text('words')
+                  for i in range(0, doc.page_count, step)][:SAMPLE_PAGES]
+
+    layouts = Counter()
+    tag_blocks = 0
+    for words in sample:
+        for cells in page_blocks(words):
+            if any(TAG_PATTERN.match(w[4]) for cell in cells for w in cell):
+                tag_blocks += 1
+                layout = _row_layout(cells)
+                if layout:
+                    layouts[layout] += 1
+    if not layouts:
+        info['reason'] = "aucune liste de pieces dans l'echantillon"
+        return info
+    layout, rows = layouts.most_common(1)[0]
+    if rows < MIN_SAMPLE_ROWS or rows < MIN_AGREEMENT * tag_blocks:
+        info['reason'] = f"gabarit minoritaire ({rows}/{tag_blocks} blocs)"
+        return info
+    # Inutile de router si le gabarit ne lit aucune page de l'echantillon
+    read = sum(read_page_words(words, layout) is not None for words in sample)
+    if not read:
+        info['reason'] = "gabarit ecarte sur toutes les pages echantillonnees"
+        return info
+
+    info.update(kind='inventor', layout=layout,
+                reason=f"{rows}/{tag_blocks} blocs-lignes, {read}/{len(sample)} pages lues")
+    return info
+
+
+# =============================================================================
+# EXTRACTION
+# =============================================================================
+def extract_inventor_pages(pages: Iterable[Tuple[int, List[tuple]]], layout: Layout,
+                           stats: Optional[Dict] = None) -> Dict[str, int]:
+    """{tag: qty} d'une couche de mots, blocs lus au rang du gabarit
+
+    `stats` recoit {'pages', 'fallback_pages'} (pages relues par proximite).
+    """
+    tag_qty = {}
+    count = fallback = 0
+    for _, words in pages:
+        count += 1
+        pairs = read_page_words(words, layout)
+        if pairs is None:
+            fallback += 1
+            pairs = [(tag, qty) for tag, qty, _ in pair_page_words(words)]
+        for tag, qty in pairs:
+            tag_qty.setdefault(tag, qty)
+    if stats is not None:
+        stats.update(pages=count, fallback_pages=fallback)
+    return tag_qty
+
+
+def extract_inventor(pdf_path, layout: Layout, stats: Optional[Dict] = None) -> Dict[str, int]:
+    """{tag: qty} d'un export Inventor (chemin ou PdfBuffer), page par page via fitz"""
+    from pdf_extraction.streaming import iter_fitz_words
+    return extract_inventor_pages(iter_fitz_words(pdf_path), layout, stats)
+
+
+def extract_auto(pdf_path, info: Optional[Dict] = None) -> Dict[str, int]:
+    """Export Inventor reconnu -> lecture par gabarit; sinon proximite generique
+
+    `info` recoit le resultat de classify (plus les stats d'extraction).
+    """
+    preflight = classify(pdf_path)
+    if info is not None:
+        info.update(preflight)
+    if preflight['kind'] == 'inventor':
+        return extract_inventor(pdf_path, preflight['layout'], info)
+    return extract_proximity(pdf_path)
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+def _pdf_paths(targets: List[str]) -> List[str]:
+    from pdf_extraction.tag_index import _pdf_paths as expand
+    return expand(targets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-classification des PDF et lecture directe des exports Inventor")
+    parser.add_argument('targets', nargs='+', help="PDF ou dossiers")
+    parser.add_argument('--verify', action='store_true', help="Comparer au resultat et au temps de la proximite")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("PRE-CLASSIFICATION DES PDF")
+    print("=" * 80)
+    different = 0
+    for path in _pdf_paths(args.targets):
+        start = time.perf_counter()
+        preflight = classify(path)
+        t_classify = time.perf_counter() - start
+        info = {}
+        start = time.perf_counter()
+        result = extract_auto(path, info)
+        t_auto = time.perf_counter() - start
+        label = f"{preflight['kind']} {preflight['layout'] or ''}".strip()
+        print(f"[>] {os.path.basename(path)}: {label} - {preflight['reason']} "
+              f"(producteur: {preflight['producer'] or '-'}, classement {t_classify * 1000:.0f} ms)")
+        line = f"    {len(result)} tags en {t_auto:.2f}s"
+        if 'fallback_pages' in info:
+            line += f" | pages relues par proximite: {info['fallback_pages']}/{info['pages']}"
+        if args.verify:
+            start = time.perf_counter()
+            expected = extract_proximity(path)
+            t_prox = time.perf_counter() - start
+            same = result == expected
+            different += not same
+            line += (f" | proximite {t_prox:.2f}s (x{t_prox / max(t_auto, 1e-9):.1f}) "
+                     f"{'[+] identique' if same else '[-] DIFFERENT'}")
+        print(line)
+    return 1 if different else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
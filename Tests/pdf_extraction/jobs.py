@@ -0,0 +1,556 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+FILE DE VERIFICATIONS - Priorites, reprise apres arret, points de reprise
+=============================================================================
+Un lot de modules lance a la main passe dans l'ordre et repart de zero
+apres un plantage; une mise en production urgente attend la fin du lot.
+Ici chaque verification (pdf, reference, methode) est un job dans une
+base SQLite locale (CACHE_DIR/jobs.sqlite):
+
+    queued -> extracting -> evaluated      (ou failed, avec l'erreur)
+
+- Priorite: les workers prennent toujours le job en attente de plus haute
+  priorite (puis le plus ancien). Un job urgent qui attend depuis plus de
+  PREEMPT_GRACE s fait ceder un job moins prioritaire a son prochain point
+  de reprise: celui-ci retourne en file avec ses pages deja faites.
+- Points de reprise par page (proximity, auto): les couples (tag, qty) de
+  chaque page sont ecrits par paquets; un job repris ne relit que les pages
+  manquantes. Un PDF modifie depuis (ou d'autres reglages de couplage,
+  pairing_digest) invalide ses points de reprise. Les
+  autres methodes (camelot, tabula...) reprennent le document entier.
+- Reprise apres plantage: un job 'extracting' dont le worker ne donne plus
+  signe de vie depuis STALE_AFTER s revient en file (MAX_ATTEMPTS essais).
+- Pool borne: `run --workers N` lance N processus qui se servent dans la
+  file jusqu'a ce qu'elle soit vide (ou en continu avec --watch).
+- Lecture anticipee: chaque worker lit les PDF des prochains jobs en
+  attente (loader.PdfPrefetcher) pendant qu'il traite le courant.
+
+Usage:
+    python -m pdf_extraction.jobs add <pdf|dossier> [...] [--csv <csv|dossier nesting>] [--urgent]
+    python -m pdf_extraction.jobs run [--workers 2] [--watch]
+    python -m pdf_extraction.jobs status [--all]
+    python -m pdf_extraction.jobs priority <job> <valeur>
+    python -m pdf_extraction.jobs retry [<job> ...]
+=============================================================================
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from pdf_extraction import CACHE_DIR
+from pdf_extraction.params import pairing_digest
+
+JOBS_PATH = os.path.join(CACHE_DIR, 'jobs.sqlite')
+
+DEFAULT_WORKERS = 2
+URGENT_PRIORITY = 100
+CHECKPOINT_PAGES = 25         # Pages par ecriture de points de reprise
+CHECKPOINT_SECONDS = 2.0      # ... ou au plus tard toutes les 2 s
+HEARTBEAT_INTERVAL = 5.0      # Signe de vie du worker (aussi pendant une methode non paginee)
+STALE_AFTER = 30.0            # Job 'extracting' sans signe de vie => remis en file
+PREEMPT_GRACE = 1.0           # Attente d'un job urgent avant de faire ceder un job en cours
+POLL_INTERVAL = 0.5           # Attente d'un worker quand la file est vide (--watch)
+MAX_ATTEMPTS = 3
+PREFETCH_JOBS = 8             # Jobs en attente dont les PDF sont lus d'avance, par tour
+
+# Methodes couplees page par page (points de reprise par page)
+PAGED_METHODS = ('proximity', 'auto')
+
+STATES = ('queued', 'extracting', 'evaluated', 'failed')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    pdf TEXT NOT NULL,
+    reference TEXT NOT NULL,
+    method TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'queued',
+    pages INTEGER,
+    pages_done INTEGER NOT NULL DEFAULT 0,
+    pdf_size INTEGER,
+    pdf_mtime_ns INTEGER,
+    digest TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    heartbeat_at REAL,
+    created_at REAL NOT NULL,
+    queued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    error TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs(state, priority DESC, id);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    job_id INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    page INTEGER NOT NULL,
+    pairs TEXT NOT NULL,
+    PRIMARY KEY (job_id, page)
+) WITHOUT ROWID;
+"""
+
+Pairs = List[Tuple[str, int]]
+
+
+class JobQueue:
+    """File de jobs de verification dans SQLite (une connexion par processus)"""
+
+    def __init__(self, path: str = JOBS_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        self._conn.executescript(_SCHEMA)
+        # Base anterieure a la colonne digest: ses points de reprise seront refaits
+        if 'digest' not in {row[1] for row in self._conn.execute('PRAGMA table_info(jobs)')}:
+            self._write('ALTER TABLE jobs ADD COLUMN digest TEXT')
+
+    def _write(self, sql: str, params: Iterable = ()) -> sqlite3.Cursor:
+        return self._conn.execute(sql, tuple(params))
+
+    # -------------------------------------------------------------------------
+    # File
+    # -------------------------------------------------------------------------
+    def add(self, pdf: str, reference: str, method: str = 'proximity', priority: int = 0) -> int:
+        """Ajoute un job (ou redonne l'id d'un job identique encore en attente / en cours)
+
+        ValueError si la methode n'existe pas (sinon le job echouerait au traitement).
+        """
+        from pdf_extraction.service import METHODS
+        if method not in METHODS:
+            raise ValueError(f"Methode inconnue: {method} (disponibles: {', '.join(sorted(METHODS))})")
+        pdf, reference = os.path.abspath(pdf), os.path.abspath(reference)
+        self._write('BEGIN IMMEDIATE')
+        try:
+            row = self._write(
+                "SELECT id, priority FROM jobs WHERE pdf = ? AND reference = ? AND method = ? "
+                "AND state IN ('queued', 'extracting')", (pdf, reference, method)).fetchone()
+            if row:
+                if priority > row['priority']:
+                    self._write('UPDATE jobs SET priority = ? WHERE id = ?', (priority, row['id']))
+                job_id = row['id']
+            else:
+                now = time.time()
+                job_id = self._write(
+                    'INSERT INTO jobs (pdf, reference, method, priority, created_at, queued_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)', (pdf, reference, method, priority, now, now)).lastrowid
+            self._write('COMMIT')
+        except BaseException:
+            self._write('ROLLBACK')
+            raise
+        return job_id
+
+    def requeue_stale(self, stale_after: Optional[float] = None) -> int:
+        """Remet en file les jobs dont le worker ne donne plus signe de vie"""
+        now = time.time()
+        stale_after = STALE_AFTER if stale_after is None else stale_after
+        return self._write(
+            "UPDATE jobs SET state = 'queued', worker = NULL, queued_at = ? "
+            "WHERE state = 'extracting' AND COALESCE(heartbeat_at, 0) < ?", (now, now - stale_after)).rowcount
+
+    def claim(self, worker: str) -> Optional[sqlite3.Row]:
+        """Prend le job en attente le plus prioritaire (None si la file est vide)"""
+        self.requeue_stale()
+        while True:
+            self._write('BEGIN IMMEDIATE')
+            try:
+                row = self._write("SELECT * FROM jobs WHERE state = 'queued' "
+                                  "ORDER BY priority DESC, id LIMIT 1").fetchone()
+                if row is None:
+                    self._write('COMMIT')
+                    return None
+                now = time.time()
+                if row['attempts'] >= MAX_ATTEMPTS:
+                    self._write("UPDATE jobs SET state = 'failed', finished_at = ?, error = ? WHERE id = ?",
+                                (now, f"Abandon apres {row['attempts']} tentatives interrompues", row['id']))
+                    self._write('COMMIT')
+                    continue
+                self._write("UPDATE jobs SET state = 'extracting', worker = ?, heartbeat_at = ?, "
+                            "started_at = COALESCE(started_at, ?), attempts = attempts + 1 WHERE id = ?",
+                            (worker, now, now, row['id']))
+                self._write('COMMIT')
+                return self.job(row['id'])
+            except BaseException:
+                self._write('ROLLBACK')
+                raise
+
+    def upcoming(self, limit: int) -> List[sqlite3.Row]:
+        """Prochains jobs en attente, dans l'ordre ou claim les prendra (sans les prendre)"""
+        return self._write("SELECT * FROM jobs WHERE state = 'queued' ORDER BY priority DESC, id LIMIT ?",
+                           (limit,)).fetchall()
+
+    def job(self, job_id: int) -> Optional[sqlite3.Row]:
+        return self._write('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+
+    def jobs(self, states: Optional[Iterable[str]] = None) -> List[sqlite3.Row]:
+        """Jobs dans l'ordre de passage (en cours, puis en attente par priorite)"""
+        sql = 'SELECT * FROM jobs'
+        params = []
+        if states:
+            states = list(states)
+            sql += f" WHERE state IN ({','.join('?' * len(states))})"
+            params = states
+        sql += (" ORDER BY CASE state WHEN 'extracting' THEN 0 WHEN 'queued' THEN 1 ELSE 2 END, "
+                "CASE WHEN state IN ('extracting', 'queued') THEN -priority ELSE 0 END, "
+                "COALESCE(finished_at, 0) DESC, id")
+        return self._write(sql, params).fetchall()
+
+    def counts(self) -> Dict[str, int]:
+        found = dict(self._write('SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall())
+        return {state: found.get(state, 0) for state in STATES}
+
+    def set_priority(self, job_id: int, priority: int) -> bool:
+        return self._write("UPDATE jobs SET priority = ? WHERE id = ? AND state IN ('queued', 'extracting')",
+                           (priority, job_id)).rowcount > 0
+
+    def retry(self, job_ids: Optional[Iterable[int]] = None) -> int:
+        """Remet en file des jobs en echec (tous si aucun id)"""
+        sql = ("UPDATE jobs SET state = 'queued', attempts = 0, error = NULL, finished_at = NULL, "
+               "queued_at = ? WHERE state = 'failed'")
+        params = [time.time()]
+        if job_ids:
+            job_ids = list(job_ids)
+            sql += f" AND id IN ({','.join('?' * len(job_ids))})"
+            params += job_ids
+        return self._write(sql, params).rowcount
+
+    # -------------------------------------------------------------------------
+    # Execution (appele par le worker qui tient le job)
+    # -------------------------------------------------------------------------
+    def heartbeat(self, job_id: int) -> None:
+        self._write('UPDATE jobs SET heartbeat_at = ? WHERE id = ?', (time.time(), job_id))
+
+    def start_pages(self, job_id: int, pdf_size: int, pdf_mtime_ns: int, pages: int,
+                    digest: str) -> Dict[int, Pairs]:
+        """Points de reprise du job; effaces si le PDF ou les reglages (digest) ont change"""
+        job = self.job(job_id)
+        if (job['pdf_size'], job['pdf_mtime_ns'], job['digest']) != (pdf_size, pdf_mtime_ns, digest):
+            self._write('BEGIN IMMEDIATE')
+            self._write('DELETE FROM checkpoints WHERE job_id = ?', (job_id,))
+            self._write('UPDATE jobs SET pdf_size = ?, pdf_mtime_ns = ?, digest = ?, pages = ?, pages_done = 0 '
+                        'WHERE id = ?', (pdf_size, pdf_mtime_ns, digest, pages, job_id))
+            self._write('COMMIT')
+            return {}
+        rows = self._write('SELECT page, pairs FROM checkpoints WHERE job_id = ?', (job_id,))
+        return {page: [tuple(p) for p in json.loads(pairs)] for page, pairs in rows}
+
+    def save_pages(self, job_id: int, pages: List[Tuple[int, Pairs]]) -> None:
+        """Ecrit un paquet de points de reprise (une transaction)"""
+        self._write('BEGIN IMMEDIATE')
+        try:
+            self._conn.executemany('INSERT OR REPLACE INTO checkpoints (job_id, page, pairs) VALUES (?, ?, ?)',
+                                   [(job_id, page, json.dumps(pairs)) for page, pairs in pages])
+            self._write('UPDATE jobs SET pages_done = pages_done + ?, heartbeat_at = ? WHERE id = ?',
+                        (len(pages), time.time(), job_id))
+            self._write('COMMIT')
+        except BaseException:
+            self._write('ROLLBACK')
+            raise
+
+    def should_yield(self, job_id: int, priority: int) -> bool:
+        """Vrai si un job plus prioritaire attend depuis plus de PREEMPT_GRACE s"""
+        row = self._write("SELECT 1 FROM jobs WHERE state = 'queued' AND priority > ? AND queued_at < ? LIMIT 1",
+                          (priority, time.time() - PREEMPT_GRACE)).fetchone()
+        return row is not None
+
+    def release(self, job_id: int) -> None:
+        """Rend le job a la file (cede la place ou interruption), points de reprise gardes"""
+        self._write("UPDATE jobs SET state = 'queued', worker = NULL, queued_at = ?, attempts = MAX(0, attempts - 1) "
+                    "WHERE id = ? AND state = 'extracting'", (time.time(), job_id))
+
+    def finish(self, job_id: int, result: Dict) -> None:
+        self._write('BEGIN IMMEDIATE')
+        self._write("UPDATE jobs SET state = 'evaluated', finished_at = ?, error = NULL, result = ? WHERE id = ?",
+                    (time.time(), json.dumps(result), job_id))
+        self._write('DELETE FROM checkpoints WHERE job_id = ?', (job_id,))
+        self._write('COMMIT')
+
+    def fail(self, job_id: int, error: str) -> None:
+        self._write("UPDATE jobs SET state = 'failed', finished_at = ?, error = ? WHERE id = ?",
+                    (time.time(), error, job_id))
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# =============================================================================
+# TRAITEMENT D'UN JOB
+# =============================================================================
+class Preempted(Exception):
+    """Le job cede sa place a un job plus prioritaire"""
+
+
+def _page_pairer(pdf_path, method: str) -> Callable[[List[tuple]], Pairs]:
+    """Couplage d'une page pour une methode paginee: mots -> [(tag, qty)]
+
+    `pdf_path` = chemin ou buffer deja lu (loader.PdfBuffer).
+    """
+    from pdf_extraction.proximity import pair_page_words
+
+    def proximity(words):
+        return [(tag, qty) for tag, qty, _ in pair_page_words(words)]
+
+    if method == 'auto':
+        from pdf_extraction.inventor import classify, read_page_words
+        preflight = classify(pdf_path)
+        if preflight['kind'] == 'inventor':
+            layout = preflight['layout']
+            return lambda words: read_page_words(words, layout) or proximity(words)
+    return proximity
+
+
+def _extract_paged(queue: JobQueue, job: sqlite3.Row, buffer=None) -> Dict[str, int]:
+    import fitz
+
+    pairer = _page_pairer(buffer if buffer is not None else job['pdf'], job['method'])
+    st = os.stat(job['pdf'])
+    with (buffer.open_fitz() if buffer is not None else fitz.open(job['pdf'])) as doc:
+        done = queue.start_pages(job['id'], st.st_size, st.st_mtime_ns, doc.page_count, pairing_digest())
+        pending = []
+        last_flush = time.perf_counter()
+        for index in range(doc.page_count):
+            page_num = index + 1
+            if page_num in done:
+                continue
+            pairs = pairer(doc.load_page(index).get_text('words'))
+            done[page_num] = pairs
+            pending.append((page_num, pairs))
+            if len(pending) >= CHECKPOINT_PAGES or time.perf_counter() - last_flush >= CHECKPOINT_SECONDS:
+                queue.save_pages(job['id'], pending)
+                pending = []
+                last_flush = time.perf_counter()
+                if queue.should_yield(job['id'], job['priority']):
+                    raise Preempted()
+        if pending:
+            queue.save_pages(job['id'], pending)
+
+    # Premiere occurrence d'un tag, dans l'ordre des pages (comme extract_proximity)
+    tag_qty = {}
+    for page_num in sorted(done):
+        for tag, qty in done[page_num]:
+            tag_qty.setdefault(tag, qty)
+    return tag_qty
+
+
+def process_job(queue: JobQueue, job: sqlite3.Row, buffer=None) -> str:
+    """Extrait et evalue un job deja pris; retourne son nouvel etat
+
+    `buffer` = PDF du job deja lu (loader.PdfBuffer), ferme ici; seules les
+    methodes paginees s'en servent, les autres relisent le fichier.
+    """
+    from pdf_extraction.csv_reference import load_tag_qty
+    from pdf_extraction.evaluation import compare
+    from pdf_extraction.history import HistoryDB
+
+    stop = threading.Event()
+
+    def beat():
+        # Connexion propre au thread: signe de vie pendant les methodes non paginees
+        with JobQueue(queue.path) as own:
+            while not stop.wait(HEARTBEAT_INTERVAL):
+                own.heartbeat(job['id'])
+
+    beater = threading.Thread(target=beat, name=f"job-{job['id']}-heartbeat", daemon=True)
+    beater.start()
+    start = time.perf_counter()
+    try:
+        if not os.path.exists(job['pdf']):
+            raise FileNotFoundError(f"PDF non trouve: {job['pdf']}")
+        if job['method'] in PAGED_METHODS:
+            extracted = _extract_paged(queue, job, buffer)
+        else:
+            from pdf_extraction.service import METHODS
+            extracted = METHODS[job['method']](job['pdf'])
+        reference = load_tag_qty(job['reference'])
+        result = compare(extracted, reference)
+        result['extracted'] = extracted
+        result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        with HistoryDB() as history:
+            history.record(job['pdf'], job['method'], extracted, reference, result['elapsed_ms'],
+                           reference_path=job['reference'], batch=f"job-{job['id']}")
+        queue.finish(job['id'], result)
+        return 'evaluated'
+    except Preempted:
+        queue.release(job['id'])
+        return 'queued'
+    except KeyboardInterrupt:
+        queue.release(job['id'])
+        raise
+    except Exception as e:
+        queue.fail(job['id'], f"{type(e).__name__}: {e}")
+        return 'failed'
+    finally:
+        stop.set()
+        beater.join()
+        if buffer is not None:
+            buffer.close()
+
+
+# =============================================================================
+# POOL DE WORKERS
+# =============================================================================
+def worker_loop(path: str = JOBS_PATH, watch: bool = False) -> int:
+    """Prend et traite des jobs jusqu'a ce que la file soit vide (ou sans fin avec watch)
+
+    Par tours: les PDF des PREFETCH_JOBS prochains jobs en attente sont lus
+    d'avance pendant le traitement du courant. La file n'est que lue: si le
+    job pris n'est pas celui prevu (autre worker, job urgent), son buffer
+    est ferme, le job est traite depuis le fichier et le tour recommence.
+    """
+    from pdf_extraction.loader import PdfPrefetcher
+
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    processed = 0
+    with JobQueue(path) as queue:
+        try:
+            while True:
+                upcoming = queue.upcoming(PREFETCH_JOBS)
+                if not upcoming:
+                    if not watch:
+                        return processed
+                    time.sleep(POLL_INTERVAL)
+                    continue
+                for pdf, buffer, _ in PdfPrefetcher([j['pdf'] for j in upcoming]):
+                    job = queue.claim(worker)
+                    expected = job is not None and job['pdf'] == pdf
+                    if not expected and buffer is not None:
+                        buffer.close()
+                        buffer = None
+                    if job is None:
+                        break
+                    state = process_job(queue, job, buffer)
+                    processed += 1
+                    print(f"    [{'+' if state == 'evaluated' else '>' if state == 'queued' else '-'}] "
+                          f"#{job['id']} {os.path.basename(job['pdf'])} ({job['method']}): {state}", flush=True)
+                    if not expected:
+                        break
+        except KeyboardInterrupt:
+            return processed
+
+
+def run_workers(workers: int = DEFAULT_WORKERS, path: str = JOBS_PATH, watch: bool = False) -> None:
+    """Lance `workers` processus sur la file et attend qu'ils aient fini"""
+    if workers <= 1:
+        worker_loop(path, watch)
+        return
+    processes = [multiprocessing.Process(target=worker_loop, args=(path, watch), name=f'jobs-worker-{i}')
+                 for i in range(workers)]
+    for p in processes:
+        p.start()
+    try:
+        for p in processes:
+            p.join()
+    except KeyboardInterrupt:
+        # Les workers recoivent aussi le Ctrl+C et rendent leur job a la file
+        for p in processes:
+            p.join()
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+def _print_jobs(jobs: List[sqlite3.Row]) -> None:
+    print(f"{'Job':<6} {'Etat':<11} {'Prio':<5} {'Pages':<10} {'Methode':<10} {'Resultat':<22} PDF")
+    for job in jobs:
+        pages = f"{job['pages_done']}/{job['pages']}" if job['pages'] else '-'
+        if job['state'] == 'evaluated':
+            r = json.loads(job['result'])
+            outcome = f"{r['correct']}/{r['total']} ({r['accuracy']}%)"
+        elif job['state'] == 'failed':
+            outcome = (job['error'] or '')[:22]
+        else:
+            outcome = job['worker'] or ''
+        print(f"#{job['id']:<5} {job['state']:<11} {job['priority']:<5} {pages:<10} {job['method']:<10} "
+              f"{outcome:<22} {os.path.basename(job['pdf'])}")
+
+
+def main():
+    from pdf_extraction.csv_reference import nesting_dir_for, nesting_dir_for_pdf
+    from pdf_extraction.tag_index import _pdf_paths
+
+    from pdf_extraction.service import METHODS
+    parser = argparse.ArgumentParser(description="File SQLite des verifications PDF vs CSV (priorites, reprise)")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_add = sub.add_parser('add', help="Ajouter des PDF (dossiers parcourus recursivement)")
+    p_add.add_argument('targets', nargs='+')
+    p_add.add_argument('--csv', help="CSV ou dossier Sheet_Metal_Nesting (defaut: celui du module du PDF)")
+    p_add.add_argument('--method', default='proximity', choices=sorted(METHODS))
+    p_add.add_argument('--priority', type=int, default=0)
+    p_add.add_argument('--urgent', action='store_true', help=f"Priorite {URGENT_PRIORITY}: passe devant le lot en cours")
+    p_run = sub.add_parser('run', help="Traiter la file")
+    p_run.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    p_run.add_argument('--watch', action='store_true', help="Attendre les nouveaux jobs au lieu de s'arreter")
+    p_status = sub.add_parser('status', help="Etat de la file")
+    p_status.add_argument('--all', action='store_true', help="Inclure les jobs termines")
+    p_prio = sub.add_parser('priority', help="Changer la priorite d'un job")
+    p_prio.add_argument('job', type=int)
+    p_prio.add_argument('value', type=int)
+    p_retry = sub.add_parser('retry', help="Remettre en file des jobs en echec")
+    p_retry.add_argument('jobs', type=int, nargs='*')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        with JobQueue() as queue:
+            stale = queue.requeue_stale()
+            counts = queue.counts()
+        if stale:
+            print(f"[!] {stale} job(s) interrompu(s) remis en file (reprise aux points de reprise)")
+        print(f"[>] {counts['queued']} job(s) en attente, {args.workers} worker(s)")
+        start = time.perf_counter()
+        run_workers(args.workers, watch=args.watch)
+        with JobQueue() as queue:
+            counts = queue.counts()
+        print(f"[+] Termine en {time.perf_counter() - start:.1f}s | evalues: {counts['evaluated']} | "
+              f"echecs: {counts['failed']} | en attente: {counts['queued']}")
+        return 0
+
+    with JobQueue() as queue:
+        if args.command == 'add':
+            priority = URGENT_PRIORITY if args.urgent else args.priority
+            for pdf in _pdf_paths(args.targets):
+                if args.csv:
+                    reference = args.csv if os.path.isdir(args.csv) else nesting_dir_for(args.csv)
+                else:
+                    reference = nesting_dir_for_pdf(pdf)
+                if not reference:
+                    print(f"    [-] {pdf}: dossier Sheet_Metal_Nesting introuvable (utiliser --csv)")
+                    continue
+                job_id = queue.add(pdf, reference, args.method, priority)
+                print(f"    [+] #{job_id} {os.path.basename(pdf)} (priorite {priority})")
+        elif args.command == 'priority':
+            if not queue.set_priority(args.job, args.value):
+                print(f"[-] Job #{args.job} absent ou termine")
+                return 1
+            print(f"[+] Job #{args.job}: priorite {args.value}")
+        elif args.command == 'retry':
+            print(f"[+] {queue.retry(args.jobs)} job(s) remis en file")
+        else:
+            counts = queue.counts()
+            print(' | '.join(f"{state}: {n}" for state, n in counts.items()))
+            jobs = queue.jobs(None if args.all else ('queued', 'extracting', 'failed'))
+            if jobs:
+                _print_jobs(jobs)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+LATTICE VECTORIEL - Tableaux a partir des traits du PDF (PyMuPDF seul)
+=============================================================================
+Les listes de pieces Inventor sont tracees en traits vectoriels. Au lieu de
+rasteriser la page (Camelot lattice via Ghostscript) ou de passer par
+pdfplumber.extract_tables():
+
+    1. Segments horizontaux / verticaux lus dans page.get_drawings()
+       (lignes 'l' et rectangles 're'; un rectangle fin = un trait)
+    2. Segments qui se croisent regroupes en grilles (union-find)
+    3. X des verticaux et Y des horizontaux d'une grille fusionnes a
+       SNAP_TOLERANCE pres => bornes des cellules
+    4. Chaque mot va dans la cellule qui contient le centre de sa bbox
+
+Sortie: une liste de lignes par tableau, cellules str ou None, comme
+page.extract_tables() de pdfplumber (format consomme par test_smart_tables).
+=============================================================================
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Iterator, List, Optional, Tuple
+
+SNAP_TOLERANCE = 2.0       # Coordonnees a moins de 2 pt = meme trait
+RULE_MAX_THICKNESS = 2.0   # Rectangle plus fin que 2 pt = un trait
+MIN_SEGMENT = 5.0          # Segments plus courts ignores (hachures, fleches)
+MIN_ROWS = 2               # Un tableau = au moins entete + 1 ligne
+MIN_COLS = 2
+
+Table = List[List[Optional[str]]]
+
+
+def ruling_segments(page) -> Tuple[List[tuple], List[tuple]]:
+    """(horizontaux [(y, x0, x1)], verticaux [(x, y0, y1)]) des traits de la page"""
+    horizontal, vertical = [], []
+
+    def add(x0, y0, x1, y1):
+        if abs(y1 - y0) <= SNAP_TOLERANCE and abs(x1 - x0) >= MIN_SEGMENT:
+            horizontal.append(((y0 + y1) / 2, min(x0, x1), max(x0, x1)))
+        elif abs(x1 - x0) <= SNAP_TOLERANCE and abs(y1 - y0) >= MIN_SEGMENT:
+            vertical.append(((x0 + x1) / 2, min(y0, y1), max(y0, y1)))
+
+    for path in page.get_drawings():
+        for item in path['items']:
+            if item[0] == 'l':
+                add(item[1].x, item[1].y, item[2].x, item[2].y)
+            elif item[0] in ('re', 'qu'):
+                r = item[1] if item[0] == 're' else item[1].rect
+                if r.width <= RULE_MAX_THICKNESS:
+                    add((r.x0 + r.x1) / 2, r.y0, (r.x0 + r.x1) / 2, r.y1)
+                elif r.height <= RULE_MAX_THICKNESS:
+                    add(r.x0, (r.y0 + r.y1) / 2, r.x1, (r.y0 + r.y1) / 2)
+                else:
+                    add(r.x0, r.y0, r.x1, r.y0)
+                    add(r.x0, r.y1, r.x1, r.y1)
+                    add(r.x0, r.y0, r.x0, r.y1)
+                    add(r.x1, r.y0, r.x1, r.y1)
+    return horizontal, vertical
+
+
+def _snap(values: List[float]) -> List[float]:
+    """Valeurs triees fusionnees a SNAP_TOLERANCE pres (moyenne de chaque groupe)"""
+    groups = []
+    for v in sorted(values):
+        if groups and v - groups[-1][-1] <= SNAP_TOLERANCE:
+            groups[-1].append(v)
+        else:
+            groups.append([v])
+    return [sum(g) / len(g) for g in groups]
+
+
+def ruling_grids(horizontal: List[tuple], vertical: List[tuple]) -> List[Tuple[List[float], List[float]]]:
+    """Grilles (xs, ys) formees par les segments qui se croisent"""
+    vertical = sorted(vertical)
+    v_xs = [v[0] for v in vertical]
+    parent = list(range(len(horizontal) + len(vertical)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    offset = len(horizontal)
+    for hi, (y, x0, x1) in enumerate(horizontal):
+        lo = bisect_left(v_xs, x0 - SNAP_TOLERANCE)
+        up = bisect_right(v_xs, x1 + SNAP_TOLERANCE)
+        for vi in range(lo, up):
+            _, y0, y1 = vertical[vi]
+            if y0 - SNAP_TOLERANCE <= y <= y1 + SNAP_TOLERANCE:
+                a, b = find(hi), find(offset + vi)
+                if a != b:
+                    parent[a] = b
+
+    members = defaultdict(lambda: ([], []))
+    for hi, h in enumerate(horizontal):
+        members[find(hi)][1].append(h[0])
+    for vi, v in enumerate(vertical):
+        members[find(offset + vi)][0].append(v[0])
+
+    grids = []
+    for xs, ys in members.values():
+        xs, ys = _snap(xs), _snap(ys)
+        if len(xs) > MIN_COLS and len(ys) > MIN_ROWS:
+            grids.append((xs, ys))
+    grids.sort(key=lambda g: (g[1][0], g[0][0]))
+    return grids
+
+
+def grid_table(xs: List[float], ys: List[float], words: List[tuple]) -> Table:
+    """Lignes de cellules de la grille; un mot appartient a la cellule contenant son centre"""
+    cells = defaultdict(list)
+    for w in words:
+        cx, cy = (w[0] + w[2]) / 2, (w[1] + w[3]) / 2
+        if not (xs[0] < cx < xs[-1] and ys[0] < cy < ys[-1]):
+            continue
+        cells[(bisect_left(ys, cy) - 1, bisect_left(xs, cx) - 1)].append(w)
+
+    table = []
+    for r in range(len(ys) - 1):
+        row = []
+        for c in range(len(xs) - 1):
+            ws = cells.get((r, c))
+            if ws:
+                ws.sort(key=lambda w: (round(w[1]), w[0]))
+                row.append(' '.join(w[4] for w in ws))
+            else:
+                row.append(None)
+        table.append(row)
+    return table
+
+
+def page_tables(page, words: Optional[List[tuple]] = None) -> List[Table]:
+    """Tableaux reglees d'une page fitz, du haut vers le bas"""
+    horizontal, vertical = ruling_segments(page)
+    if not horizontal or not vertical:
+        return []
+    grids = ruling_grids(horizontal, vertical)
+    if not grids:
+        return []
+    if words is None:
+        words = page.get_text("words")
+    tables = []
+    for xs, ys in grids:
+        table = grid_table(xs, ys, words)
+        if any(cell for row in table for cell in row):
+            tables.append(table)
+    return tables
+
+
+def iter_lattice_tables(pdf_path) -> Iterator[Tuple[int, List[Table]]]:
+    """(numero_page, tableaux) pour chaque page, via fitz"""
+    from pdf_extraction.streaming import iter_fitz_pages
+    for page in iter_fitz_pages(pdf_path):
+        yield page.number + 1, page_tables(page)
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+CHARGEMENT PDF - Memory-map local + lecture anticipee depuis le partage reseau
+=============================================================================
+Le dossier de travail Vault est sur un partage reseau: `fitz.open(path)` /
+`pdfplumber.open(path)` bloquent sur l'I/O avant tout travail CPU.
+
+- Fichier local  : memory-map (mmap), le document est ouvert depuis le buffer
+- Fichier reseau : lu en entier en memoire par un thread I/O en arriere-plan
+- PdfPrefetcher  : charge les PDF suivants d'un lot pendant le traitement du
+                   courant, avec un nombre borne de documents en vol
+
+Usage (benchmark contre un dossier local bride qui simule le partage):
+    python -m pdf_extraction.loader <dossier> --throttle-mbps 20 --latency-ms 40
+=============================================================================
+"""
+
+import argparse
+import glob
+import mmap
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+# Taille des blocs lus sur le partage reseau
+READ_CHUNK_SIZE = 1024 * 1024
+
+# Nombre par defaut de PDF charges a l'avance (en plus du PDF en cours)
+DEFAULT_MAX_IN_FLIGHT = 2
+
+# Windows: GetDriveTypeW() == DRIVE_REMOTE pour un lecteur reseau mappe (ex: V:\)
+_DRIVE_REMOTE = 4
+
+
+def is_local_path(path: str) -> bool:
+    """Faux pour un chemin UNC (\\\\serveur\\partage) ou un lecteur reseau mappe"""
+    path = os.path.abspath(path)
+    if path.startswith('\\\\') or path.startswith('//'):
+        return False
+    if os.name == 'nt':
+        import ctypes
+        drive = os.path.splitdrive(path)[0]
+        if drive:
+            return ctypes.windll.kernel32.GetDriveTypeW(drive + '\\') != _DRIVE_REMOTE
+    return True
+
+
+# =============================================================================
+# BUFFER PDF
+# =============================================================================
+class PdfBuffer:
+    """Contenu d'un PDF en memoire: mmap (local) ou bytes (lu depuis le reseau)"""
+
+    def __init__(self, path: str, data, handle=None):
+        self.path = path
+        self.data = data
+        self._handle = handle
+
+    @property
+    def is_mapped(self) -> bool:
+        return isinstance(self.data, mmap.mmap)
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    def open_fitz(self):
+        """Document fitz ouvert depuis le buffer (sans nouvel acces disque)"""
+        import fitz
+        stream = memoryview(self.data) if self.is_mapped else self.data
+        return fitz.open(stream=stream, filetype='pdf')
+
+    def open_pdfplumber(self):
+        """Document pdfplumber ouvert depuis le buffer"""
+        import io
+        import pdfplumber
+        # mmap expose read/seek/tell: pdfminer le lit comme un fichier
+        return pdfplumber.open(self.data if self.is_mapped else io.BytesIO(self.data))
+
+    def close(self) -> None:
+        if self.is_mapped:
+            self.data.close()
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_file(path: str, chunk_size: int = READ_CHUNK_SIZE) -> bytes:
+    """Lit un fichier en entier par blocs (lecture sequentielle sur le partage)"""
+    chunks = []
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def load_pdf_buffer(path: str, local: Optional[bool] = None,
+                    reader: Callable[[str], bytes] = read_file) -> PdfBuffer:
+    """Charge un PDF: memory-map s'il est local, lecture complete sinon"""
+    if local is None:
+        local = is_local_path(path)
+    if local:
+        handle = open(path, 'rb')
+        try:
+            data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Fichier vide: mmap refuse une longueur nulle
+            handle.close()
+            return PdfBuffer(path, b'')
+        return PdfBuffer(path, data, handle)
+    return PdfBuffer(path, reader(path))
+
+
+# =============================================================================
+# LECTURE ANTICIPEE D'UN LOT
+# =============================================================================
+_END = object()
+
+
+class PdfPrefetcher:
+    """Charge les PDF d'un lot sur un thread I/O pendant le traitement du courant
+
+    Au plus `max_in_flight` buffers sont charges et non consommes a la fois
+    (y compris celui que le thread I/O vient de lire): le thread prend une
+    place avant de lire un PDF, la place est rendue quand le consommateur
+    recoit le buffer. Chaque element produit est (path, buffer, erreur); le
+    consommateur ferme le buffer quand il a fini (ou utilise `with buffer:`).
+
+        for path, buf, err in PdfPrefetcher(paths):
+            if err: ...
+            with buf:
+                doc = buf.open_fitz()
+    """
+
+    def __init__(self, paths: Iterable[str], max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 local: Optional[bool] = None, reader: Callable[[str], bytes] = read_file):
+        self.paths = list(paths)
+        self.max_in_flight = max(1, max_in_flight)
+        self.local = local
+        self.reader = reader
+        self._queue = queue.Queue()
+        self._slots = threading.Semaphore(self.max_in_flight)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _acquire(self) -> bool:
+        """Attend une place tant que max_in_flight buffers sont en vol (faux si arret)"""
+        while not self._stop.is_set():
+            if self._slots.acquire(timeout=0.1):
+                return True
+        return False
+
+    def _worker(self) -> None:
+        for path in self.paths:
+            if not self._acquire():
+                break
+            try:
+                item = (path, load_pdf_buffer(path, self.local, self.reader), None)
+            except Exception as e:
+                item = (path, None, e)
+            self._queue.put(item)
+        self._queue.put(_END)
+
+    def __iter__(self) -> Iterator[Tuple[str, Optional[PdfBuffer], Optional[Exception]]]:
+        self._thread = threading.Thread(target=self._worker, name='pdf-prefetch', daemon=True)
+        self._thread.start()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _END:
+                    break
+                self._slots.release()
+                yield item
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Arrete le thread I/O et ferme les buffers charges mais non consommes"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _END and item[1] is not None:
+                item[1].close()
+
+
+# =============================================================================
+# BENCHMARK: DOSSIER LOCAL BRIDE (SIMULE LE PARTAGE RESEAU)
+# =============================================================================
+def make_throttled_reader(mbps: float, latency_ms: float,
+                          chunk_size: int = READ_CHUNK_SIZE) -> Callable[[str], bytes]:
+    """Lecteur qui impose une latence d'ouverture et un debit max (Mo/s)"""
+    def reader(path: str) -> bytes:
+        time.sleep(latency_ms / 1000.0)
+        chunks = []
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                if mbps > 0:
+                    time.sleep(len(chunk) / (mbps * 1024 * 1024))
+                chunks.append(chunk)
+        return b''.join(chunks)
+    return reader
+
+
+def _process(buffer: PdfBuffer) -> int:
+    """Travail CPU type: couche de mots fitz de toutes les pages"""
+    doc = buffer.open_fitz()
+    try:
+        return sum(len(page.get_text("words")) for page in doc)
+    finally:
+        doc.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chargement PDF (sequentiel vs lecture anticipee)")
+    parser.add_argument('folder', help="Dossier contenant les PDF du lot")
+    parser.add_argument('--throttle-mbps', type=float, default=20.0, help="Debit simule du partage (Mo/s, 0 = illimite)")
+    parser.add_argument('--latency-ms', type=float, default=40.0, help="Latence simulee a l'ouverture")
+    parser.add_argument('--max-in-flight', type=int, default=DEFAULT_MAX_IN_FLIGHT)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.folder, '*.pdf')))
+    if not paths:
+        print(f"[-] Aucun PDF dans: {args.folder}")
+        return 1
+
+    total_mb = sum(os.path.getsize(p) for p in paths) / 1024 / 1024
+    reader = make_throttled_reader(args.throttle_mbps, args.latency_ms)
+
+    print("=" * 80)
+    print("BENCHMARK CHARGEMENT PDF - PARTAGE RESEAU SIMULE")
+    print("=" * 80)
+    print(f"PDF: {len(paths)} fichiers ({total_mb:.1f} Mo)")
+    print(f"Partage simule: {args.throttle_mbps} Mo/s, latence {args.latency_ms} ms")
+    print()
+
+    results = []
+
+    print("[>] Sequentiel (lecture bridee puis traitement)")
+    start = time.perf_counter()
+    words = 0
+    for path in paths:
+        with load_pdf_buffer(path, local=False, reader=reader) as buf:
+            words += _process(buf)
+    results.append(('Sequentiel', time.perf_counter() - start, words))
+
+    print(f"[>] Lecture anticipee (max {args.max_in_flight} en vol)")
+    start = time.perf_counter()
+    words = 0
+    for path, buf, err in PdfPrefetcher(paths, args.max_in_flight, local=False, reader=reader):
+        if err:
+            print(f"    [-] {os.path.basename(path)}: {err}")
+            continue
+        with buf:
+            words += _process(buf)
+    results.append(('Lecture anticipee', time.perf_counter() - start, words))
+
+    print("[>] Local memory-map (reference sans reseau)")
+    start = time.perf_counter()
+    words = 0
+    for path in paths:
+        with load_pdf_buffer(path, local=True) as buf:
+            words += _process(buf)
+    results.append(('Local mmap', time.perf_counter() - start, words))
+
+    print()
+    print(f"{'Mode':<20} {'Temps':<10} {'PDF/s':<10} {'Mo/s':<10} {'Mots':<10}")
+    print("-" * 65)
+    for name, elapsed, n_words in results:
+        print(f"{name:<20} {elapsed:>7.2f}s {len(paths) / elapsed:>8.1f} {total_mb / elapsed:>8.1f}   {n_words}")
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
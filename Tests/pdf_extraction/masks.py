@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+MASQUES DE FEUILLE - Cartouche, cadre et vues ecartes avant le couplage
+=============================================================================
+Sur une feuille de dessin, la liste de pieces n'est qu'une petite partie des
+mots: cotes, reperes de vues, numeros du cadre et du cartouche font le gros
+de la page et sont la principale source de fausses quantites.
+
+Un masque est appris UNE fois par format de feuille (largeur x hauteur x
+rotation), sur ses LEARN_PAGES premieres pages vues:
+    - zone liste de pieces: origines des tags, elargies de la fenetre de
+      couplage (X_MAX_DISTANCE en X, Y_TOLERANCE en Y)
+    - cartouche / cadre: mots identiques (texte + position arrondie) sur
+      toutes les pages d'apprentissage, hors des lignes de tags
+Un format dont les premieres pages n'ont aucun tag continue d'apprendre
+jusqu'a sa premiere page avec liste de pieces.
+
+Ensuite seuls les mots de la zone liste, hors cartouche, passent au
+couplage. Un tag trouve hors de la zone (liste plus longue, autre
+position) l'agrandit et la page est refiltree; un mot du cartouche sur la
+ligne d'un tag de la page (|dy| <= Y_TOLERANCE) est garde: aucun couple
+tag/qty de la proximite n'est perdu. Les masques restent en memoire (SHEET_MASKS) et
+servent a tous les PDF suivants du meme format.
+
+    for page_num, words in iter_masked_words(pdf):   # comme iter_fitz_words
+        ...
+    extract_proximity(pdf, masked=True)              # ou methode 'masked' du service
+
+Usage (mots par page avant / apres et gain par methode):
+    python -m pdf_extraction.masks <fichier.pdf> [...] [--repeat 3]
+=============================================================================
+"""
+
+import argparse
+import os
+import sys
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from pdf_extraction.proximity import X_MAX_DISTANCE, Y_TOLERANCE
+from pdf_extraction.tags import TAG_PATTERN
+
+LEARN_PAGES = 3           # Pages d'apprentissage par format de feuille
+POSITION_ROUNDING = 0     # Decimales des positions comparees (cartouche)
+
+SheetKey = Tuple[int, int, int]
+
+
+def sheet_key(page) -> SheetKey:
+    """Format de feuille d'une page fitz: (largeur, hauteur, rotation) arrondis"""
+    return round(page.rect.width), round(page.rect.height), page.rotation
+
+
+def _is_tag(text: str) -> bool:
+    return TAG_PATTERN.match(text) is not None
+
+
+def _position(w: tuple) -> tuple:
+    return (w[4], round(w[0], POSITION_ROUNDING), round(w[1], POSITION_ROUNDING))
+
+
+class SheetMask:
+    """Zone liste de pieces + mots fixes (cartouche, cadre) d'un format de feuille"""
+
+    def __init__(self):
+        self.region: Optional[List[float]] = None     # [x0, y0, x1, y1] des origines de tags
+        self.static = frozenset()                     # (texte, x0, y0) du cartouche et du cadre
+        self.learned_pages = 0
+        self._seen = Counter()
+
+    @property
+    def ready(self) -> bool:
+        return self.learned_pages >= LEARN_PAGES and self.region is not None
+
+    def _extend(self, tag_words: List[tuple]) -> None:
+        for w in tag_words:
+            if self.region is None:
+                self.region = [w[0], w[1], w[0], w[1]]
+            else:
+                r = self.region
+                r[0], r[1], r[2], r[3] = min(r[0], w[0]), min(r[1], w[1]), max(r[2], w[0]), max(r[3], w[1])
+
+    def learn(self, words: List[tuple]) -> None:
+        """Ajoute une page d'apprentissage (mots non filtres)"""
+        tag_words = [w for w in words if _is_tag(w[4])]
+        self._extend(tag_words)
+        tag_rows = [w[1] for w in tag_words]
+        for w in words:
+            if not any(abs(w[1] - y) <= Y_TOLERANCE for y in tag_rows):
+                self._seen[_position(w)] += 1
+        self.learned_pages += 1
+        # Comptage garde tant que la zone n'est pas connue (premieres pages sans tag)
+        if self.ready:
+            self.static = frozenset(p for p, n in self._seen.items() if n >= self.learned_pages)
+            self._seen = Counter()
+
+    def apply(self, words: List[tuple]) -> List[tuple]:
+        """Mots de la zone liste, hors cartouche (la zone s'agrandit si un tag en sort)
+
+        Un mot fixe sur la ligne d'un tag de CETTE page reste: il peut etre
+        la quantite du tag.
+        """
+        tag_ys = sorted(w[1] for w in words if _is_tag(w[4]))
+        static = self.static
+
+        def on_tag_row(y: float) -> bool:
+            i = bisect_left(tag_ys, y - Y_TOLERANCE)
+            return i < len(tag_ys) and tag_ys[i] <= y + Y_TOLERANCE
+
+        while True:
+            x0, y0, x1, y1 = self.region
+            x0, x1 = x0 - X_MAX_DISTANCE, x1 + X_MAX_DISTANCE
+            y0, y1 = y0 - Y_TOLERANCE, y1 + Y_TOLERANCE
+            kept, outside_tags = [], []
+            for w in words:
+                if x0 <= w[0] <= x1 and y0 <= w[1] <= y1:
+                    if not static or _position(w) not in static or on_tag_row(w[1]):
+                        kept.append(w)
+                elif _is_tag(w[4]):
+                    outside_tags.append(w)
+            if not outside_tags:
+                return kept
+            self._extend(outside_tags)
+
+
+# Masques appris, partages par tous les PDF du processus
+SHEET_MASKS: Dict[SheetKey, SheetMask] = {}
+
+
+def iter_masked_words(pdf_path, masks: Optional[Dict[SheetKey, SheetMask]] = None,
+                      stats: Optional[Dict] = None) -> Iterator[Tuple[int, List[tuple]]]:
+    """(numero_page, mots masques) via fitz, comme iter_fitz_words
+
+    Les pages d'apprentissage d'un format passent sans filtre. `stats`
+    recoit {'pages', 'words_before', 'words_after', 'sheets'}.
+    """
+    from pdf_extraction.streaming import iter_fitz_pages
+
+    masks = SHEET_MASKS if masks is None else masks
+    before = after = pages = 0
+    for page in iter_fitz_pages(pdf_path):
+        words = [tuple(w) for w in page.get_text("words")]
+        mask = masks.setdefault(sheet_key(page), SheetMask())
+        if mask.ready:
+            kept = mask.apply(words)
+        else:
+            mask.learn(words)
+            kept = words
+        pages += 1
+        before += len(words)
+        after += len(kept)
+        yield page.number + 1, kept
+    if stats is not None:
+        stats.update(pages=pages, words_before=before, words_after=after, sheets=len(masks))
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+def _methods():
+    from pdf_extraction.neighbors import next_word_pairs, score_page_matrix
+    from pdf_extraction.proximity import pair_page_words
+    return (('Proximite', pair_page_words), ('Scoring', score_page_matrix), ('Colonnes', next_word_pairs))
+
+
+def _run(method, pages: List[Tuple[int, List[tuple]]]) -> Dict[str, int]:
+    tag_qty = {}
+    for _, words in pages:
+        for tag, qty, _ in method(words):
+            tag_qty.setdefault(tag, qty)
+    return tag_qty
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Masques cartouche / zone liste: mots par page et gain de couplage")
+    parser.add_argument('pdfs', nargs='+')
+    parser.add_argument('--repeat', type=int, default=3, help="Passes par methode (meilleur temps retenu)")
+    args = parser.parse_args()
+
+    from pdf_extraction.streaming import iter_fitz_words
+
+    print("=" * 80)
+    print("MASQUES DE FEUILLE - Cartouche et vues ecartes avant le couplage")
+    print("=" * 80)
+    for pdf in args.pdfs:
+        if not os.path.exists(pdf):
+            print(f"[-] PDF non trouve: {pdf}")
+            continue
+        full = list(iter_fitz_words(pdf))
+        stats = {}
+        start = time.perf_counter()
+        masked = list(iter_masked_words(pdf, {}, stats))
+        t_mask = time.perf_counter() - start
+        pages = max(1, stats['pages'])
+        print(f"\n[>] {os.path.basename(pdf)}: {stats['pages']} pages, {stats['sheets']} format(s) de feuille "
+              f"(lecture + masque {t_mask:.2f}s)")
+        print(f"    Mots par page: {stats['words_before'] / pages:.0f} -> {stats['words_after'] / pages:.0f} "
+              f"({100 - stats['words_after'] * 100 / max(1, stats['words_before']):.0f}% ecartes)")
+        print(f"    {'Methode':<12} {'Sans masque (ms)':<18} {'Avec masque (ms)':<18} {'Gain':<8} identique")
+        for name, method in _methods():
+            timings = {}
+            results = {}
+            for label, layer in (('full', full), ('masked', masked)):
+                best = None
+                for _ in range(max(1, args.repeat)):
+                    start = time.perf_counter()
+                    results[label] = _run(method, layer)
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                timings[label] = best
+            same = 'oui' if results['full'] == results['masked'] else 'NON'
+            print(f"    {name:<12} {timings['full'] * 1000:<18.1f} {timings['masked'] * 1000:<18.1f} "
+                  f"x{timings['full'] / max(timings['masked'], 1e-9):<7.1f} {same}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
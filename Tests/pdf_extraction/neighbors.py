@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+METHODES DE VOISINAGE - Scoring et Column Based sur l'index spatial
+=============================================================================
+Memes regles que test_scoring / test_column_based (benchmark_v3.py), mais
+la ligne d'un tag et ses voisins viennent de WordGrid au lieu d'un
+regroupement par round(top, 0):
+
+    Scoring      : chaque nombre de la ligne est note selon son ecart de
+                   colonne avec le tag (+50 juste a gauche, +30 juste a
+                   droite, -10 par colonne, -100 au-dela de 3). La version
+                   matricielle (score_page_matrix) note toute la page d'un
+                   coup; score_page_words reste la reference tag par tag.
+    Column Based : le mot qui suit le premier tag de la ligne, si numerique
+
+Usage (benchmark matriciel vs tag par tag, pages densifiees):
+    python -m pdf_extraction.neighbors <fichier.pdf|.wsnap> [--engine fitz] [--dense 10] [--repeat 3]
+=============================================================================
+"""
+
+import argparse
+import math
+import re
+import sys
+import time
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pdf_extraction.params import param
+from pdf_extraction.spatial import ROW_TOLERANCE, WordGrid
+from pdf_extraction.tags import TAG_PATTERN, tag_from_match
+
+SCORE_LEFT_ADJACENT = param('score_left_adjacent')     # Nombre juste avant le tag (Qty | Tag), +50
+SCORE_RIGHT_ADJACENT = param('score_right_adjacent')   # Nombre juste apres le tag (Tag | Qty), +30
+SCORE_PER_COLUMN = param('score_per_column')           # Par colonne d'ecart, -10
+SCORE_FAR_PENALTY = param('score_far_penalty')         # Au-dela de SCORE_FAR_COLUMNS colonnes, -100
+SCORE_FAR_COLUMNS = param('score_far_columns')         # 3
+
+Pair = Tuple[str, int, tuple]
+
+# TAG_PATTERN.match sur chaque mot == ce motif en debut de ligne des textes joints par '\n'
+_LINE_TAG_PATTERN = re.compile('^(?:' + TAG_PATTERN.pattern + ')', TAG_PATTERN.flags | re.MULTILINE)
+
+
+def _tag_words(grid: WordGrid) -> List[Tuple[str, tuple]]:
+    """(tag normalise, mot) dans l'ordre de lecture"""
+    found = []
+    for w in grid.words:
+        match = TAG_PATTERN.match(w[4])
+        if match:
+            found.append((tag_from_match(match), w))
+    found.sort(key=lambda t: (t[1][1], t[1][0]))
+    return found
+
+
+def score_page_words(words: Iterable[tuple], grid: Optional[WordGrid] = None,
+                     y_tol: float = ROW_TOLERANCE) -> List[Pair]:
+    """Paires (tag, qty, mot_du_tag) par score de position dans la ligne"""
+    grid = grid or WordGrid(words)
+    pairs = []
+    for tag, tag_word in _tag_words(grid):
+        row = grid.row(tag_word, y_tol)
+        # Par identite: un mot en double (texte gras simule) a la meme valeur
+        tag_idx = next(i for i, w in enumerate(row) if w is tag_word)
+        best_qty = None
+        best_score = -999
+        for num_idx, w in enumerate(row):
+            if not w[4].isdigit():
+                continue
+            col_dist = abs(num_idx - tag_idx)
+            score = col_dist * SCORE_PER_COLUMN
+            if num_idx == tag_idx - 1:
+                score += SCORE_LEFT_ADJACENT
+            if num_idx == tag_idx + 1:
+                score += SCORE_RIGHT_ADJACENT
+            if col_dist > SCORE_FAR_COLUMNS:
+                score += SCORE_FAR_PENALTY
+            if score > best_score:
+                best_score = score
+                best_qty = int(w[4])
+        if best_qty is not None:
+            pairs.append((tag, best_qty, tag_word))
+    return pairs
+
+
+def score_page_matrix(words: Iterable[tuple], y_tol: float = ROW_TOLERANCE,
+                      one_to_one: bool = False) -> List[Pair]:
+    """Memes paires que score_page_words, calculees en matrices NumPy pour toute la page
+
+    Une ligne par tag: ses voisins (|dy0| <= y_tol) tries en X, puis dans
+    l'ordre de la page a X egal (comme WordGrid.row), donnent les colonnes;
+    les poids s'appliquent a la matrice tag x colonne et l'argmax (premier
+    maximum, comme `score > best_score`) designe la quantite.
+
+    one_to_one: un nombre ne sert qu'a un seul tag. Les couples sont
+    attribues par score decroissant (puis ordre de lecture): un tag dont le
+    meilleur nombre est deja pris se rabat sur le suivant.
+    """
+    import numpy as np
+
+    words = words if isinstance(words, list) else list(words)
+    n = len(words)
+    if not n:
+        return []
+    texts = list(map(itemgetter(4), words))
+    x0 = np.fromiter(map(itemgetter(0), words), dtype=float, count=n)
+    y0 = np.fromiter(map(itemgetter(1), words), dtype=float, count=n)
+    digit = np.fromiter(map(str.isdigit, texts), dtype=bool, count=n)
+
+    # Tags: une seule recherche sur les textes joints (un mot par ligne)
+    joined = '\n'.join(texts)
+    if joined.count('\n') == n - 1:
+        line_starts = np.zeros(n, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, texts), dtype=np.int64, count=n)[:-1] + 1, out=line_starts[1:])
+        found = [(m.start(), tag_from_match(m)) for m in _LINE_TAG_PATTERN.finditer(joined)]
+        tag_idx = np.searchsorted(line_starts, [start for start, _ in found], side='right') - 1
+        tag_names = [text for _, text in found]
+    else:
+        matches = [(i, TAG_PATTERN.match(t)) for i, t in enumerate(texts)]
+        tag_idx = np.array([i for i, m in matches if m], dtype=np.int64)
+        tag_names = [tag_from_match(m) for _, m in matches if m]
+    if not tag_names:
+        return []
+    # Ordre de lecture (y0, x0), stable comme _tag_words
+    reading = np.lexsort((x0[tag_idx], y0[tag_idx]))
+    tag_idx = tag_idx[reading]
+    tag_words = [(int(i), tag_names[r]) for i, r in zip(tag_idx.tolist(), reading.tolist())]
+    tag_y = y0[tag_idx]
+
+    # Bande Y de chaque tag (mots tries en Y), bornes elargies puis test exact |dy0| <= y_tol
+    by_y = np.argsort(y0, kind='stable')
+    sorted_y = y0[by_y]
+    lo = np.searchsorted(sorted_y, tag_y - y_tol - 1e-9, side='left')
+    hi = np.searchsorted(sorted_y, tag_y + y_tol + 1e-9, side='right')
+    band = lo[:, None] + np.arange(int((hi - lo).max()))
+    valid = band < hi[:, None]
+    members = by_y[np.minimum(band, n - 1)]
+    valid &= np.abs(y0[members] - tag_y[:, None]) <= y_tol
+
+    # Colonnes: rang en X puis ordre de la page (les cases vides, a +inf, finissent a droite)
+    order = np.lexsort((members, np.where(valid, x0[members], np.inf)), axis=1)
+    row = np.take_along_axis(members, order, axis=1)
+    in_row = np.take_along_axis(valid, order, axis=1)
+    cols = np.arange(row.shape[1])[None, :]
+    tag_col = np.argmax(row == tag_idx[:, None], axis=1)[:, None]
+    col_dist = np.abs(cols - tag_col)
+    score = (col_dist * SCORE_PER_COLUMN
+             + SCORE_LEFT_ADJACENT * (cols == tag_col - 1)
+             + SCORE_RIGHT_ADJACENT * (cols == tag_col + 1)
+             + SCORE_FAR_PENALTY * (col_dist > SCORE_FAR_COLUMNS))
+    candidate = in_row & digit[row] & (score > -999)
+    score = np.where(candidate, score, -np.inf)
+
+    pairs = []
+    if not one_to_one:
+        best = np.argmax(score, axis=1)[:, None]
+        found = np.take_along_axis(candidate, best, axis=1)[:, 0].tolist()
+        chosen = np.take_along_axis(row, best, axis=1)[:, 0].tolist()
+        for (i, tag), ok, qty_index in zip(tag_words, found, chosen):
+            if ok:
+                pairs.append((tag, int(texts[qty_index]), words[i]))
+        return pairs
+
+    t_idx, k_idx = np.nonzero(candidate)
+    ranking = np.lexsort((k_idx, t_idx, -score[t_idx, k_idx]))
+    assigned = {}
+    claimed = set()
+    for t, word_index in zip(t_idx[ranking].tolist(), row[t_idx, k_idx][ranking].tolist()):
+        if t in assigned or word_index in claimed:
+            continue
+        assigned[t] = word_index
+        claimed.add(word_index)
+    for t in sorted(assigned):
+        i, tag = tag_words[t]
+        pairs.append((tag, int(texts[assigned[t]]), words[i]))
+    return pairs
+
+
+def _is_tag(w: tuple) -> bool:
+    return TAG_PATTERN.match(w[4]) is not None
+
+
+def next_word_pairs(words: Iterable[tuple], grid: Optional[WordGrid] = None,
+                    y_tol: float = ROW_TOLERANCE) -> List[Pair]:
+    """Paires (tag, qty, mot_du_tag): premier tag de la ligne + mot suivant numerique"""
+    grid = grid or WordGrid(words)
+    pairs = []
+    for tag, tag_word in _tag_words(grid):
+        if grid.nearest_left(tag_word, math.inf, y_tol, _is_tag) is not None:
+            continue
+        following = grid.nearest_right(tag_word, math.inf, y_tol)
+        if following is not None and following[4].isdigit():
+            pairs.append((tag, int(following[4]), tag_word))
+    return pairs
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+def benchmark(pages: List[Tuple[int, List[tuple]]], repeat: int = 3) -> List[Dict]:
+    """Temps (meilleur de `repeat`) de chaque scoreur sur toutes les pages, et paires identiques"""
+    results = []
+    reference = None
+    for name, score in (('tag par tag', score_page_words), ('matriciel', score_page_matrix)):
+        best = None
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            pairs = [[(tag, qty) for tag, qty, _ in score(words)] for _, words in pages]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        reference = pairs if reference is None else reference
+        results.append({'method': name, 'ms': best * 1000, 'pairs': sum(map(len, pairs)),
+                        'same': pairs == reference})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scoring: version matricielle vs reference tag par tag")
+    parser.add_argument('pdf', help="PDF ou instantane .wsnap")
+    parser.add_argument('--engine', choices=('fitz', 'pdfplumber'), default='fitz')
+    parser.add_argument('--dense', type=int, default=1, help="Multiplier les mots de chaque page")
+    parser.add_argument('--repeat', type=int, default=3, help="Passes par methode (meilleur temps retenu)")
+    args = parser.parse_args()
+
+    from pdf_extraction.shared_words import densify
+    from pdf_extraction.streaming import iter_page_words
+
+    pages = densify(list(iter_page_words(args.pdf, args.engine)), args.dense)
+    word_count = sum(len(words) for _, words in pages)
+
+    print("=" * 80)
+    print("SCORING - score_page_matrix vs score_page_words")
+    print("=" * 80)
+    print(f"Pages: {len(pages)} | Mots: {word_count} ({word_count / max(1, len(pages)):.0f}/page)")
+    print()
+    results = benchmark(pages, args.repeat)
+    base = results[0]['ms']
+    print(f"    {'Methode':<14} {'ms':<10} {'ms/page':<10} {'Gain':<8} {'Paires':<8} identique")
+    for r in results:
+        print(f"    {r['method']:<14} {r['ms']:<10.1f} {r['ms'] / max(1, len(pages)):<10.2f} "
+              f"x{base / max(r['ms'], 1e-9):<7.1f} {r['pairs']:<8} {'oui' if r['same'] else 'NON'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+CACHE PAR PAGE - Resultats indexes par empreinte de contenu (SQLite)
+=============================================================================
+Une page dont le contenu n'a pas change donne toujours le meme resultat:
+on le range sous une cle derivee de l'empreinte de la page (+ methode,
+version, parametres). Stockage SQLite local (stdlib), valeurs JSON, taille
+totale optionnellement bornee (eviction des entrees les moins recemment
+utilisees).
+=============================================================================
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from pdf_extraction import CACHE_DIR
+
+PAGE_CACHE_PATH = os.path.join(CACHE_DIR, 'page_cache.sqlite')
+
+
+# =============================================================================
+# EMPREINTE D'UNE PAGE
+# =============================================================================
+def page_fingerprint(page) -> str:
+    """Empreinte du contenu d'une page fitz (sans extraction de texte)
+
+    Hash du format de page, des flux de contenu et des XObjects references
+    directement (les vues Inventor sont souvent des formulaires /Fm Do).
+    """
+    doc = page.parent
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr(tuple(page.rect)).encode())
+    h.update(str(page.rotation).encode())
+    h.update(page.read_contents())
+    for xobject in page.get_xobjects():
+        h.update(doc.xref_stream(xobject[0]) or b'')
+    return h.hexdigest()
+
+
+def make_key(*parts: Any) -> str:
+    """Cle de cache compacte a partir d'elements quelconques (empreinte, moteur, version...)"""
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=20).hexdigest()
+
+
+# =============================================================================
+# STOCKAGE
+# =============================================================================
+class PageCache:
+    """Cache cle -> valeur JSON dans SQLite, borne en octets si max_bytes > 0"""
+
+    def __init__(self, path: str = PAGE_CACHE_PATH, table: str = 'page_results', max_bytes: int = 0):
+        self.path = path
+        self.table = table
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            f'CREATE TABLE IF NOT EXISTS {table} ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)'
+        )
+        self._conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_last_used ON {table}(last_used)')
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(f'SELECT value FROM {self.table} WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(f'UPDATE {self.table} SET last_used = ? WHERE key = ?', (time.time(), key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any) -> None:
+        data = json.dumps(value, separators=(',', ':'))
+        with self._lock:
+            self._conn.execute(
+                f'INSERT OR REPLACE INTO {self.table} (key, value, size, last_used) VALUES (?, ?, ?, ?)',
+                (key, data, len(data), time.time()),
+            )
+            if self.max_bytes > 0:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Supprime les entrees les moins recemment utilisees au-dela de max_bytes"""
+        total = self._conn.execute(f'SELECT COALESCE(SUM(size), 0) FROM {self.table}').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        doomed = []
+        for key, size in self._conn.execute(f'SELECT key, size FROM {self.table} ORDER BY last_used'):
+            doomed.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany(f'DELETE FROM {self.table} WHERE key = ?', doomed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, size = self._conn.execute(
+                f'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}').fetchone()
+        return {'entries': count, 'bytes': size, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+PARAMETRES D'EXTRACTION - Valeurs par defaut + fichier de config regle
+=============================================================================
+Les seuils des heuristiques (fenetre de couplage, tolerances de colonnes,
+poids du scoring...) sont declares ici une seule fois. Les modules les lisent
+a l'import:
+
+    X_MAX_DISTANCE = param('pairing_window')
+
+Le fichier extraction_params.json (a cote de ce module, ou chemin dans
+XNRGY_PDF_PARAMS) surcharge les valeurs par defaut; il est ecrit par
+`python -m pdf_extraction.autotune ... --write`.
+
+pairing_digest() resume les valeurs courantes et la grammaire des tags:
+chaque cache de resultats de couplage (revision_diff, tag_index, points de
+reprise des jobs, cache des CSV) l'inclut dans sa cle, un reglage ou un
+nouveau format de tag invalide donc les resultats deja calcules.
+=============================================================================
+"""
+
+import hashlib
+import importlib
+import json
+import os
+from typing import Any, Dict
+
+PARAMS_FILE = os.environ.get(
+    'XNRGY_PDF_PARAMS',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'extraction_params.json'),
+)
+
+# nom -> (module, attribut, valeur par defaut, description)
+PARAM_SPECS = {
+    'pairing_window': ('proximity', 'X_MAX_DISTANCE', 150, "Distance max tag-qty (proximite)"),
+    'pairing_y_tolerance': ('proximity', 'Y_TOLERANCE', 5, "Ecart Y max tag-qty (proximite)"),
+    'qty_max_digits': ('proximity', 'QTY_MAX_DIGITS', 3, "Chiffres max d'une quantite"),
+    'qty_column_tolerance': ('templates', 'QTY_X_TOLERANCE', 30, "Ecart X max a l'entete Qty"),
+    'column_tolerance': ('templates', 'COLUMN_TOLERANCE', 15, "Ecart X max a une colonne (get_col)"),
+    'column_min_words': ('templates', 'COLUMN_MIN_WORDS', 3, "Mots min pour former une colonne"),
+    'score_left_adjacent': ('neighbors', 'SCORE_LEFT_ADJACENT', 50, "Scoring: nombre juste avant le tag"),
+    'score_right_adjacent': ('neighbors', 'SCORE_RIGHT_ADJACENT', 30, "Scoring: nombre juste apres le tag"),
+    'score_per_column': ('neighbors', 'SCORE_PER_COLUMN', -10, "Scoring: par colonne d'ecart"),
+    'score_far_penalty': ('neighbors', 'SCORE_FAR_PENALTY', -100, "Scoring: penalite au-dela de far_columns"),
+    'score_far_columns': ('neighbors', 'SCORE_FAR_COLUMNS', 3, "Scoring: colonnes avant la penalite"),
+}
+
+DEFAULTS = {name: spec[2] for name, spec in PARAM_SPECS.items()}
+
+
+def load_params(path: str = PARAMS_FILE) -> Dict[str, Any]:
+    """Valeurs par defaut surchargees par le fichier de config (cles inconnues ignorees)"""
+    values = dict(DEFAULTS)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+        values.update({k: v for k, v in stored.items() if k in PARAM_SPECS})
+    return values
+
+
+_PARAMS = load_params()
+
+
+def param(name: str) -> Any:
+    """Valeur courante d'un parametre (lue par les modules a l'import)"""
+    return _PARAMS[name]
+
+
+def pairing_digest() -> str:
+    """Empreinte courte des parametres courants + motif des tags (cles de cache)"""
+    from pdf_extraction.tags import TAG_PATTERN
+    raw = json.dumps([_PARAMS, TAG_PATTERN.pattern], sort_keys=True)
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def apply_params(values: Dict[str, Any]) -> None:
+    """Applique des valeurs aux modules deja charges (autotune, dans un worker)"""
+    for name, value in values.items():
+        module_name, attribute, _, _ = PARAM_SPECS[name]
+        _PARAMS[name] = value
+        module = importlib.import_module(f'pdf_extraction.{module_name}')
+        setattr(module, attribute, value)
+
+
+def save_params(values: Dict[str, Any], path: str = PARAMS_FILE) -> str:
+    """Ecrit les valeurs retenues (fusionnees avec le fichier existant)"""
+    stored = {}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+    stored.update({k: v for k, v in values.items() if k in PARAM_SPECS})
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(stored.items())), f, indent=2)
+        f.write('\n')
+    return path
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+VERIFICATION PROGRESSIVE - Evenements JSON lines pour le DXF Verifier
+=============================================================================
+DXFVerifierWindow n'affichait rien avant la fin du PDF. Ici la verification
+avance page par page (couplage par proximite) et ecrit un evenement JSON
+par ligne (NDJSON) des qu'il est connu:
+
+    {"event": "document", "pdf": "...", "pages": 412, "reference_tags": 240, "method": "proximity"}
+    {"event": "tag", "tag": "WPA1302-0101", "status": "confirmed", "qty": 4, "expected": 4, "page": 17, "bbox": [...]}
+        status: confirmed | mismatch (qty differente) | extra (absent du CSV)
+    {"event": "page", "page": 17, "tags": ["WPA1302-0101", ...], "done": 17, "pages": 412,
+     "confirmed": 52, "mismatch": 1, "elapsed_ms": 830.2}
+    {"event": "summary", "total": 240, "correct": 238, ..., "elapsed_ms": 9120.4}
+    {"event": "error", "message": "..."}
+
+Comme extract_proximity, la premiere occurrence d'un tag fait foi: un tag
+n'est annonce qu'une fois et le resume est identique a `verify`.
+
+Debit: les lignes sont accumulees et ecrites au plus toutes les
+FLUSH_INTERVAL secondes (document, premiere page et resume partent tout de
+suite); l'ecriture ne ralentit jamais l'extraction et les premieres
+correspondances arrivent en moins d'une seconde. Un thread ecrit les
+lignes en attente meme si l'evenement suivant tarde (page lente).
+
+Usage (sortie standard, a lire ligne par ligne cote C#):
+    python -m pdf_extraction.progress <fichier.pdf> <csv|dossier nesting> [--interval 0.1]
+Ou via le service: POST /verify/stream (meme corps que /verify).
+=============================================================================
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional, TextIO
+
+from pdf_extraction.evaluation import compare
+
+FLUSH_INTERVAL = 0.1      # Secondes entre deux ecritures groupees
+
+Emit = Callable[[Dict, bool], None]
+
+
+class NdjsonWriter:
+    """Ecrit des evenements JSON, une ligne chacun, par paquets limites en frequence
+
+    Les lignes en attente partent au plus tard `interval` s apres leur
+    emission (thread d'ecriture demarre au premier evenement differe);
+    close() arrete le thread et ecrit le reste.
+    """
+
+    def __init__(self, stream: TextIO, interval: float = FLUSH_INTERVAL):
+        self.stream = stream
+        self.interval = interval
+        self.events = 0
+        self._pending = []
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def emit(self, event: Dict, urgent: bool = False) -> None:
+        line = json.dumps(event, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._pending.append(line)
+            self.events += 1
+        if urgent or time.perf_counter() - self._last_flush >= self.interval:
+            self.flush()
+        elif self._thread is None:
+            self._thread = threading.Thread(target=self._flush_loop, name='ndjson-flush', daemon=True)
+            self._thread.start()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            if self._pending:
+                self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._pending:
+                self.stream.write(''.join(self._pending))
+                self._pending.clear()
+            self.stream.flush()
+            self._last_flush = time.perf_counter()
+
+    def close(self) -> None:
+        """Arrete le thread d'ecriture et ecrit les lignes en attente"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
+def _page_count(pdf_path: str) -> Optional[int]:
+    from pdf_extraction.snapshot import WordSnapshot, is_snapshot
+    try:
+        if is_snapshot(pdf_path):
+            with WordSnapshot(pdf_path) as snapshot:
+                return len(snapshot)
+        import fitz
+        with fitz.open(pdf_path) as doc:
+            return doc.page_count
+    except Exception:
+        return None
+
+
+def stream_verification(pdf_path: str, reference: Dict[str, int], emit: Emit,
+                        method: str = 'proximity') -> Dict:
+    """Verifie un PDF contre la reference en emettant les evenements au fil des pages
+
+    Retourne le resultat final (celui de compare, plus 'extracted' et
+    'pages': {tag: page de l'occurrence retenue}).
+    """
+    from pdf_extraction.proximity import pair_page_words
+    from pdf_extraction.streaming import iter_fitz_words
+
+    if method != 'proximity':
+        raise ValueError(f"Methode non progressive: {method} (disponible: proximity)")
+    start = time.perf_counter()
+    pages = _page_count(pdf_path)
+    emit({'event': 'document', 'pdf': pdf_path, 'pages': pages,
+          'reference_tags': len(reference), 'method': method}, True)
+
+    extracted, tag_pages = {}, {}
+    counts = {'confirmed': 0, 'mismatch': 0, 'extra': 0}
+    done = 0
+    for page_num, words in iter_fitz_words(pdf_path):
+        done += 1
+        page_tags = []
+        for tag, qty, tag_word in pair_page_words(words):
+            if tag in extracted:
+                continue
+            extracted[tag] = qty
+            tag_pages[tag] = page_num
+            page_tags.append(tag)
+            expected = reference.get(tag)
+            status = 'extra' if expected is None else 'confirmed' if expected == qty else 'mismatch'
+            counts[status] += 1
+            emit({'event': 'tag', 'tag': tag, 'status': status, 'qty': qty, 'expected': expected,
+                  'page': page_num, 'bbox': [round(v, 1) for v in tag_word[:4]]}, False)
+        emit({'event': 'page', 'page': page_num, 'tags': page_tags, 'done': done, 'pages': pages,
+              'confirmed': counts['confirmed'], 'mismatch': counts['mismatch'],
+              'elapsed_ms': round((time.perf_counter() - start) * 1000, 1)}, done == 1)
+
+    result = compare(extracted, reference)
+    emit({'event': 'summary', 'pdf': pdf_path, 'method': method, **result,
+          'elapsed_ms': round((time.perf_counter() - start) * 1000, 1)}, True)
+    result['extracted'] = extracted
+    result['pages'] = tag_pages
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verification PDF vs CSV en evenements JSON lines (stdout)")
+    parser.add_argument('pdf')
+    parser.add_argument('csv', help="CSV nesting ou dossier Sheet_Metal_Nesting")
+    parser.add_argument('--interval', type=float, default=FLUSH_INTERVAL, help="Secondes entre deux ecritures")
+    args = parser.parse_args()
+
+    from pdf_extraction.csv_reference import load_tag_qty, nesting_dir_for
+
+    out = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='\n')
+    sys.stdout = sys.stderr  # Messages des moteurs (avertissements, [+]...) hors du flux JSON
+    writer = NdjsonWriter(out, args.interval)
+    try:
+        if not os.path.exists(args.pdf):
+            raise FileNotFoundError(f"PDF non trouve: {args.pdf}")
+        nesting_dir = args.csv if os.path.isdir(args.csv) else nesting_dir_for(args.csv)
+        stream_verification(args.pdf, load_tag_qty(nesting_dir), writer.emit)
+        return 0
+    except Exception as e:
+        writer.emit({'event': 'error', 'message': f"{type(e).__name__}: {e}"}, True)
+        return 1
+    finally:
+        writer.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+ALGORITHME PROXIMITE X/Y - Tag + Qty (valide a 100%, porte en C#)
+=============================================================================
+Meme algorithme que test_pymupdf_structure (table_extraction_benchmark.py)
+et PdfAnalyzerService.ExtractByProximity:
+    - Meme ligne = ecart de Y <= 5 (index spatial, plus de seaux arrondis)
+    - Quantite = nombre de 1 a 3 chiffres
+    - Recherche D'ABORD a droite du tag, PUIS a gauche, distance < 150
+    - La premiere occurrence d'un tag l'emporte
+=============================================================================
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pdf_extraction.params import param
+from pdf_extraction.spatial import WordGrid
+from pdf_extraction.tags import TAG_PATTERN, tag_from_match
+
+Y_TOLERANCE = param('pairing_y_tolerance')      # Tolerance Y (pt) entre un tag et sa quantite (5)
+X_MAX_DISTANCE = param('pairing_window')        # Distance max tag-qty (150)
+QTY_MAX_DIGITS = param('qty_max_digits')        # Chiffres max d'une quantite (3)
+
+
+def _is_qty(w: tuple) -> bool:
+    return w[4].isdigit() and len(w[4]) <= QTY_MAX_DIGITS
+
+
+def pair_page_words(words: Iterable[tuple], grid: Optional[WordGrid] = None) -> List[Tuple[str, int, tuple]]:
+    """Paires (tag, qty, mot_du_tag) d'une page, dans l'ordre de lecture
+
+    `words` au format compact fitz: (x0, y0, x1, y1, text, ...). Les voisins
+    viennent de l'index spatial: meme ligne = |dy0| <= Y_TOLERANCE, sans
+    frontiere de seau (un decalage de ligne de base ne coupe plus la ligne).
+    """
+    grid = grid or WordGrid(words)
+    tag_words = []
+    for w in grid.words:
+        match = TAG_PATTERN.match(w[4])
+        if match:
+            tag_words.append((tag_from_match(match), w))
+    tag_words.sort(key=lambda t: (t[1][1], t[1][0]))
+
+    pairs = []
+    for tag, tag_word in tag_words:
+        # D'abord a DROITE (format Tag | Qty), sinon a GAUCHE (format Qty | Tag)
+        num = (grid.nearest_right(tag_word, X_MAX_DISTANCE, Y_TOLERANCE, _is_qty)
+               or grid.nearest_left(tag_word, X_MAX_DISTANCE, Y_TOLERANCE, _is_qty))
+        if num is not None:
+            pairs.append((tag, int(num[4]), tag_word))
+    return pairs
+
+
+def extract_proximity_pages(pages: Iterable[Tuple[int, List[tuple]]],
+                            locations: Optional[Dict] = None) -> Dict[str, int]:
+    """{tag: qty} a partir d'une couche de mots (numero_page, mots)
+
+    Une page peut arriver deja couplee, (numero_page, mots, paires): c'est le
+    cas de TagIndex.indexing, qui couple une fois pour l'index et l'extraction.
+    Si `locations` est fourni, il recoit {tag: (page, (x0, y0, x1, y1))}
+    pour l'occurrence retenue de chaque tag.
+    """
+    tag_qty = {}
+    for page_num, words, *paired in pages:
+        for tag, qty, tag_word in (paired[0] if paired else pair_page_words(words)):
+            if tag not in tag_qty:
+                tag_qty[tag] = qty
+                if locations is not None:
+                    locations[tag] = (page_num, tuple(tag_word[:4]))
+    return tag_qty
+
+
+def extract_proximity(pdf_path, locations: Optional[Dict] = None, masked: bool = False) -> Dict[str, int]:
+    """{tag: qty} d'un PDF (chemin ou PdfBuffer), page par page via fitz
+
+    masked=True: cartouche et vues ecartes avant le couplage (masks.py).
+    """
+    if masked:
+        from pdf_extraction.masks import iter_masked_words
+        return extract_proximity_pages(iter_masked_words(pdf_path), locations)
+    from pdf_extraction.streaming import iter_fitz_words
+    return extract_proximity_pages(iter_fitz_words(pdf_path), locations)
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+STORE DE RESULTATS COLONNAIRE - Une ligne par (pdf, methode, tag)
+=============================================================================
+evaluate() / evaluate_tag_qty_result() ne gardent que des compteurs et les
+10 premiers tags en erreur. Chaque execution ecrit ici un fichier Parquet
+complet (dossier CACHE_DIR/results/, un fichier par execution):
+
+    run_id, run_time, pdf, project, ref, module, method, tag, status,
+    extracted_qty, reference_qty, page, x0, y0, x1, y1, elapsed_ms
+
+status: 'correct' | 'wrong' | 'missing' | 'extra'
+pdf est le chemin complet (02-Machines.pdf existe dans chaque module);
+project / ref / module viennent de history.module_info.
+
+Les requetes inter-executions / inter-methodes passent par pyarrow.dataset
+(lecture colonnaire + filtres pousses) au lieu de relancer les benchmarks.
+Dependance optionnelle: pyarrow (sans lui, rien n'est enregistre en
+Parquet). Chaque verification est aussi ajoutee a l'historique SQLite
+(history.py), avec le projet / REF / module du chemin du PDF.
+
+Usage:
+    python -m pdf_extraction.results_store summary [--pdf X] [--module M02] [--method Y]
+    python -m pdf_extraction.results_store tag WPA1302-0101
+    python -m pdf_extraction.results_store failures [--method Y] [--last-run]
+=============================================================================
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from pdf_extraction import CACHE_DIR
+
+RESULTS_DIR = os.path.join(CACHE_DIR, 'results')
+
+COLUMNS = ('run_id', 'run_time', 'pdf', 'project', 'ref', 'module', 'method', 'tag', 'status',
+           'extracted_qty', 'reference_qty', 'page', 'x0', 'y0', 'x1', 'y1', 'elapsed_ms')
+
+# (page, (x0, y0, x1, y1)) par tag, quand la methode connait la position
+Locations = Dict[str, Tuple[int, Tuple[float, float, float, float]]]
+
+
+def _schema():
+    import pyarrow as pa
+    return pa.schema([
+        ('run_id', pa.string()),
+        ('run_time', pa.timestamp('ms')),
+        ('pdf', pa.dictionary(pa.int32(), pa.string())),
+        ('project', pa.dictionary(pa.int32(), pa.string())),
+        ('ref', pa.dictionary(pa.int32(), pa.string())),
+        ('module', pa.dictionary(pa.int32(), pa.string())),
+        ('method', pa.dictionary(pa.int32(), pa.string())),
+        ('tag', pa.string()),
+        ('status', pa.dictionary(pa.int8(), pa.string())),
+        ('extracted_qty', pa.int32()),
+        ('reference_qty', pa.int32()),
+        ('page', pa.int32()),
+        ('x0', pa.float32()),
+        ('y0', pa.float32()),
+        ('x1', pa.float32()),
+        ('y1', pa.float32()),
+        ('elapsed_ms', pa.float32()),
+    ])
+
+
+def timed(func: Callable, *args, **kwargs):
+    """(resultat, duree en ms) d'un appel"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+# =============================================================================
+# ENREGISTREMENT
+# =============================================================================
+class ResultRecorder:
+    """Accumule les lignes d'une execution puis les ecrit en un fichier Parquet
+
+        recorder = ResultRecorder()
+        r, ms = timed(test_x)
+        recorder.add(PDF_PATH, "Methode X", r, reference, ms)
+        recorder.close()
+    """
+
+    def __init__(self, results_dir: str = RESULTS_DIR, run_id: Optional[str] = None, history: bool = True):
+        self.results_dir = results_dir
+        self.run_id = run_id or f"{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:6]}"
+        self.run_time = datetime.now()
+        self._columns = {name: [] for name in COLUMNS}
+        # Verifications a ajouter a l'historique SQLite a la fermeture
+        self._history = [] if history else None
+
+    def add(self, pdf: str, method: str, extracted: Dict[str, int], reference: Dict[str, int],
+            elapsed_ms: Optional[float] = None, locations: Optional[Locations] = None,
+            reference_path: Optional[str] = None) -> None:
+        """Ajoute une ligne par tag de la reference et par tag extrait en trop"""
+        from pdf_extraction.history import module_info
+        locations = locations or {}
+        if self._history is not None:
+            pages = {tag: page for tag, (page, _) in locations.items()}
+            self._history.append((pdf, method, dict(extracted), dict(reference), elapsed_ms, pages, reference_path))
+        info = module_info(pdf, reference_path)
+        pdf = os.path.abspath(pdf)
+        cols = self._columns
+        for tag in list(reference) + [t for t in extracted if t not in reference]:
+            got = extracted.get(tag)
+            expected = reference.get(tag)
+            if expected is None:
+                status = 'extra'
+            elif got is None:
+                status = 'missing'
+            else:
+                status = 'correct' if got == expected else 'wrong'
+            page, bbox = locations.get(tag, (None, (None, None, None, None)))
+            cols['run_id'].append(self.run_id)
+            cols['run_time'].append(self.run_time)
+            cols['pdf'].append(pdf)
+            cols['project'].append(info['project'])
+            cols['ref'].append(info['ref'])
+            cols['module'].append(info['module'])
+            cols['method'].append(method)
+            cols['tag'].append(tag)
+            cols['status'].append(status)
+            cols['extracted_qty'].append(got)
+            cols['reference_qty'].append(expected)
+            cols['page'].append(page)
+            cols['x0'].append(bbox[0])
+            cols['y0'].append(bbox[1])
+            cols['x1'].append(bbox[2])
+            cols['y1'].append(bbox[3])
+            cols['elapsed_ms'].append(elapsed_ms)
+
+    def __len__(self) -> int:
+        return len(self._columns['tag'])
+
+    def close(self) -> Optional[str]:
+        """Ecrit le fichier Parquet de l'execution; None si pyarrow est absent"""
+        if self._history:
+            from pdf_extraction.history import HistoryDB
+            with HistoryDB() as history:
+                for pdf, method, extracted, reference, elapsed_ms, pages, reference_path in self._history:
+                    history.record(pdf, method, extracted, reference, elapsed_ms, pages=pages,
+                                   batch=self.run_id, run_time=self.run_time.timestamp(),
+                                   reference_path=reference_path)
+            self._history = []
+        if not len(self):
+            return None
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            print("[!] pyarrow non installe: resultats detailles non enregistres")
+            return None
+        table = pa.Table.from_pydict(self._columns, schema=_schema())
+        os.makedirs(self.results_dir, exist_ok=True)
+        path = os.path.join(self.results_dir, f"run_{self.run_id}.parquet")
+        pq.write_table(table, path)
+        self._columns = {name: [] for name in COLUMNS}
+        return path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# =============================================================================
+# REQUETES
+# =============================================================================
+def open_dataset(results_dir: str = RESULTS_DIR):
+    """Dataset pyarrow de toutes les executions enregistrees"""
+    import pyarrow.dataset as ds
+    return ds.dataset(results_dir, format='parquet', schema=_schema())
+
+
+def query(filters: Optional[Dict] = None, columns: Optional[Iterable[str]] = None,
+          results_dir: str = RESULTS_DIR):
+    """Table pyarrow filtree par egalite de colonnes (ex: {'method': 'Scoring'})"""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    expr = None
+    for name, value in (filters or {}).items():
+        cond = ds.field(name) == value
+        expr = cond if expr is None else expr & cond
+    table = open_dataset(results_dir).to_table(columns=list(columns) if columns else None, filter=expr)
+    # Les dictionnaires different d'un fichier a l'autre: decodage en chaines
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+    return table
+
+
+def pdf_label(row: Dict) -> str:
+    """Projet/REF/module du PDF (ex: 10381/REF13/M02/02-Machines.pdf), sinon son nom"""
+    name = os.path.basename(row['pdf'] or '')
+    parts = [row.get(k) for k in ('project', 'ref', 'module')]
+    return '/'.join(parts + [name]) if all(parts) else name
+
+
+def filter_runs(table, pdf: Optional[str] = None, module: Optional[str] = None):
+    """Lignes dont le chemin contient `pdf` et dont le projet, la reference ou le module vaut `module`"""
+    import pyarrow.compute as pc
+    if pdf:
+        table = table.filter(pc.match_substring(table['pdf'], pdf))
+    if module:
+        key = module.upper()
+        match = pc.or_kleene(pc.or_kleene(pc.equal(table['module'], key), pc.equal(table['ref'], key)),
+                             pc.equal(table['project'], key))
+        table = table.filter(pc.fill_null(match, False))
+    return table
+
+
+def summarize(table):
+    """Compteurs par (pdf, methode, run): correct / wrong / missing / extra"""
+    import pyarrow.compute as pc
+    for status in ('correct', 'wrong', 'missing', 'extra'):
+        table = table.append_column(status, pc.if_else(pc.equal(table['status'], status), 1, 0))
+    grouped = table.group_by(['run_id', 'pdf', 'project', 'ref', 'module', 'method']).aggregate([
+        ('correct', 'sum'), ('wrong', 'sum'), ('missing', 'sum'), ('extra', 'sum'), ('elapsed_ms', 'max'),
+    ])
+    return grouped.sort_by([('run_id', 'ascending'), ('correct_sum', 'descending')])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Requetes sur le store de resultats colonnaire")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_sum = sub.add_parser('summary', help="Precision par execution et methode")
+    p_sum.add_argument('--pdf', help="Partie du chemin du PDF")
+    p_sum.add_argument('--module', help="Module (M02), REF (REF13) ou projet (10381)")
+    p_sum.add_argument('--method')
+    p_tag = sub.add_parser('tag', help="Historique d'un tag (toutes methodes)")
+    p_tag.add_argument('tag')
+    p_fail = sub.add_parser('failures', help="Tags en erreur (wrong/missing)")
+    p_fail.add_argument('--method')
+    p_fail.add_argument('--last-run', action='store_true')
+    args = parser.parse_args()
+
+    if not os.path.isdir(RESULTS_DIR):
+        print(f"[-] Aucun resultat enregistre dans: {RESULTS_DIR}")
+        return 1
+
+    start = time.perf_counter()
+    if args.command == 'summary':
+        table = filter_runs(query({'method': args.method} if args.method else {}), args.pdf, args.module)
+        rows = summarize(table).to_pylist()
+        print(f"{'Run':<24} {'PDF':<36} {'Methode':<22} {'Correct':<8} {'Wrong':<7} {'Missing':<8} {'Extra':<6} {'ms':<8}")
+        print("-" * 122)
+        for r in rows:
+            elapsed = f"{r['elapsed_ms_max']:.0f}" if r['elapsed_ms_max'] is not None else '-'
+            print(f"{r['run_id']:<24} {pdf_label(r):<36} {r['method']:<22} {r['correct_sum']:<8} "
+                  f"{r['wrong_sum']:<7} {r['missing_sum']:<8} {r['extra_sum']:<6} {elapsed:<8}")
+    elif args.command == 'tag':
+        from pdf_extraction.tags import normalize_tag
+        rows = query({'tag': normalize_tag(args.tag)}).sort_by('run_time').to_pylist()
+        for r in rows:
+            page = f"p{r['page']}" if r['page'] is not None else '-'
+            print(f"{r['run_id']:<24} {pdf_label(r):<36} {r['method']:<22} {r['status']:<8} "
+                  f"pdf={r['extracted_qty']} csv={r['reference_qty']} {page}")
+    else:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        filters = {'method': args.method} if args.method else {}
+        table = query(filters)
+        if args.last_run and table.num_rows:
+            table = table.filter(pc.equal(table['run_id'], pc.max(table['run_id'])))
+        table = table.filter(pc.is_in(table['status'], value_set=pa.array(['wrong', 'missing'])))
+        for r in table.sort_by('tag').to_pylist():
+            print(f"{r['tag']:<20} {r['status']:<8} pdf={r['extracted_qty']} csv={r['reference_qty']} "
+                  f"({r['method']}, {pdf_label(r)}, {r['run_id']})")
+    print(f"\n[+] Requete: {(time.perf_counter() - start) * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
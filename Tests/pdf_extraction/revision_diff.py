@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+DIFF DE REVISION - Tags ajoutes / retires / requantifies entre deux PDF
+=============================================================================
+Quand l'ingenierie reemet 02-Machines.pdf, on veut savoir quels tags et
+quantites ont change sans deux extractions completes.
+
+    1. Empreinte de chaque page (flux de contenu, sans extraction de texte)
+    2. Paires (tag, qty, bbox) d'une page lues dans le cache par empreinte;
+       seules les pages jamais vues sont reellement parsees
+    3. Comparaison par tag (index hash): ajoutes, retires, requantifies,
+       avec les pages ou chaque tag apparait dans chaque revision
+
+Usage:
+    python -m pdf_extraction.revision_diff <ancien.pdf> <nouveau.pdf> [--json]
+=============================================================================
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict, List, Optional
+
+from pdf_extraction.page_cache import PageCache, make_key, page_fingerprint
+from pdf_extraction.params import pairing_digest
+from pdf_extraction.proximity import pair_page_words
+
+# A incrementer si l'algorithme de proximite change (reglages et grammaire: pairing_digest)
+PAIRING_VERSION = 'proximity-v2'
+
+
+class RevisionIndex:
+    """Tags d'une revision: {tag: {'qty': premiere qty, 'pages': {page: qty}}}"""
+
+    def __init__(self, pdf_path: str):
+        self.pdf_path = pdf_path
+        self.tags: Dict[str, Dict] = {}
+        self.fingerprints: List[str] = []
+        self.parsed_pages = 0
+        self.cached_pages = 0
+
+    def add_pairs(self, page_num: int, pairs: List[list]) -> None:
+        for tag, qty, *_ in pairs:
+            entry = self.tags.setdefault(tag, {'qty': qty, 'pages': {}})
+            entry['pages'].setdefault(page_num, qty)
+
+
+def index_revision(pdf_path: str, cache: Optional[PageCache] = None) -> RevisionIndex:
+    """Paires tag/qty de chaque page, en ne parsant que les pages absentes du cache"""
+    import fitz
+
+    index = RevisionIndex(pdf_path)
+    digest = pairing_digest()
+    doc = fitz.open(pdf_path)
+    try:
+        for page in doc:
+            fingerprint = page_fingerprint(page)
+            index.fingerprints.append(fingerprint)
+            key = make_key(fingerprint, PAIRING_VERSION, digest)
+            pairs = cache.get(key) if cache else None
+            if pairs is None:
+                pairs = [[tag, qty, *tag_word[:4]] for tag, qty, tag_word in pair_page_words(page.get_text("words"))]
+                if cache:
+                    cache.put(key, pairs)
+                index.parsed_pages += 1
+            else:
+                index.cached_pages += 1
+            index.add_pairs(page.number + 1, pairs)
+    finally:
+        doc.close()
+    return index
+
+
+def diff_revisions(old: RevisionIndex, new: RevisionIndex) -> Dict:
+    """Tags ajoutes, retires et requantifies entre deux revisions"""
+    old_tags, new_tags = old.tags, new.tags
+    added = [
+        {'tag': t, 'qty': new_tags[t]['qty'], 'pages': sorted(new_tags[t]['pages'])}
+        for t in sorted(new_tags.keys() - old_tags.keys())
+    ]
+    removed = [
+        {'tag': t, 'qty': old_tags[t]['qty'], 'pages': sorted(old_tags[t]['pages'])}
+        for t in sorted(old_tags.keys() - new_tags.keys())
+    ]
+    requantified = [
+        {'tag': t, 'old_qty': old_tags[t]['qty'], 'new_qty': new_tags[t]['qty'],
+         'old_pages': sorted(old_tags[t]['pages']), 'new_pages': sorted(new_tags[t]['pages'])}
+        for t in sorted(old_tags.keys() & new_tags.keys())
+        if old_tags[t]['qty'] != new_tags[t]['qty']
+    ]
+    old_prints = set(old.fingerprints)
+    changed_pages = [i + 1 for i, fp in enumerate(new.fingerprints) if fp not in old_prints]
+    return {
+        'old': old.pdf_path,
+        'new': new.pdf_path,
+        'added': added,
+        'removed': removed,
+        'requantified': requantified,
+        'changed_pages': changed_pages,
+        'pages': {'old': len(old.fingerprints), 'new': len(new.fingerprints)},
+        'parsed_pages': old.parsed_pages + new.parsed_pages,
+        'cached_pages': old.cached_pages + new.cached_pages,
+    }
+
+
+def _pages(pages: List[int]) -> str:
+    return ', '.join(f"p{p}" for p in pages[:6]) + (f" (+{len(pages) - 6})" if len(pages) > 6 else '')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff de tags/quantites entre deux revisions d'un PDF")
+    parser.add_argument('old_pdf')
+    parser.add_argument('new_pdf')
+    parser.add_argument('--json', action='store_true', help="Sortie JSON")
+    parser.add_argument('--no-cache', action='store_true', help="Ignorer le cache par page")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    cache = None if args.no_cache else PageCache()
+    old = index_revision(args.old_pdf, cache)
+    new = index_revision(args.new_pdf, cache)
+    result = diff_revisions(old, new)
+    result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+
+    print("=" * 80)
+    print("DIFF DE REVISION")
+    print("=" * 80)
+    print(f"Ancien: {args.old_pdf} ({result['pages']['old']} pages)")
+    print(f"Nouveau: {args.new_pdf} ({result['pages']['new']} pages)")
+    print(f"Pages modifiees: {len(result['changed_pages'])} | Parsees: {result['parsed_pages']} | "
+          f"Depuis le cache: {result['cached_pages']} | {result['elapsed_ms']} ms")
+    print()
+
+    print(f"[+] Tags ajoutes ({len(result['added'])}):")
+    for d in result['added']:
+        print(f"    {d['tag']:<20} qty={d['qty']:<5} {_pages(d['pages'])}")
+    print(f"[-] Tags retires ({len(result['removed'])}):")
+    for d in result['removed']:
+        print(f"    {d['tag']:<20} qty={d['qty']:<5} {_pages(d['pages'])}")
+    print(f"[!] Tags requantifies ({len(result['requantified'])}):")
+    for d in result['requantified']:
+        print(f"    {d['tag']:<20} {d['old_qty']} -> {d['new_qty']:<5} "
+              f"ancien {_pages(d['old_pages'])} | nouveau {_pages(d['new_pages'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+CONSTRUCTION DES LIGNES - Balayage vertical a tolerance adaptative
+=============================================================================
+Les scripts regroupaient les mots en lignes de deux facons:
+    - round(y, 0)         : la plupart des methodes (seaux de 1 pt)
+    - round(y / 5) * 5    : debug_tag.py, analyze_full_pdf.py (seaux de 5 pt)
+Un seau fixe coupe une ligne dont la ligne de base tombe sur une frontiere
+et fusionne deux lignes serrees.
+
+sweep_rows() trie les mots par centre vertical (O(n log n)) puis balaie:
+un mot rejoint la ligne courante si son centre est a moins de
+ROW_HEIGHT_RATIO x hauteur de glyphe (mediane de la ligne: un petit glyphe
+isole ne resserre pas la tolerance) du centre de la ligne. Les lignes sont
+numerotees de haut en bas: meme couche de mots => memes identifiants.
+row_lines() donne le dictionnaire {y: mots} qu'attendent les scripts et
+TemplateCache; plumber_box lit les mots / caracteres pdfplumber.
+
+Le benchmark compare les trois strategies sur la meme couche de mots
+(extraite une seule fois) avec la regle de proximite tag/qty par ligne.
+
+Usage:
+    python -m pdf_extraction.rows <fichier.pdf> [csv|dossier nesting] [--engine fitz|pdfplumber]
+=============================================================================
+"""
+
+import argparse
+import sys
+import time
+from bisect import insort
+from collections import defaultdict, namedtuple
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from pdf_extraction.proximity import QTY_MAX_DIGITS, X_MAX_DISTANCE
+from pdf_extraction.tags import TAG_PATTERN, tag_from_match
+
+ROW_HEIGHT_RATIO = 0.5    # Ecart de centres toleres, en fraction de hauteur de glyphe
+
+# id: rang de haut en bas, y: centre vertical moyen, words: tries par X
+Row = namedtuple('Row', ['id', 'y', 'height', 'words'])
+
+
+def _tuple_box(w) -> Tuple[float, float, float]:
+    return w[0], w[1], w[3]
+
+
+def plumber_box(w) -> Tuple[float, float, float]:
+    """(x0, haut, bas) d'un mot ou caractere pdfplumber"""
+    return w['x0'], w['top'], w['bottom']
+
+
+def sweep_rows(words: Iterable, ratio: float = ROW_HEIGHT_RATIO,
+               box: Callable[[object], Tuple[float, float, float]] = _tuple_box) -> List[Row]:
+    """Lignes d'une page par balayage vertical, tolerance = ratio x hauteur mediane de la ligne
+
+    `box(mot)` = (x0, haut, bas); par defaut un tuple de mots compacts.
+    """
+    boxed = sorted(((box(w), w) for w in words), key=lambda bw: bw[0][1] + bw[0][2])
+    groups = []
+    current = []
+    heights = []
+    center_sum = 0.0
+    for (x0, top, bottom), w in boxed:
+        cy = (top + bottom) / 2
+        height = bottom - top
+        if current:
+            row_cy = center_sum / len(current)
+            if abs(cy - row_cy) <= ratio * heights[len(heights) // 2]:
+                current.append((x0, w))
+                center_sum += cy
+                insort(heights, height)
+                continue
+            groups.append((row_cy, heights[len(heights) // 2], current))
+        current = [(x0, w)]
+        center_sum = cy
+        heights = [height]
+    if current:
+        groups.append((center_sum / len(current), heights[len(heights) // 2], current))
+    return [Row(i, y, h, [w for _, w in sorted(xws, key=lambda xw: xw[0])]) for i, (y, h, xws) in enumerate(groups)]
+
+
+def row_lines(words: Iterable, box: Callable[[object], Tuple[float, float, float]] = _tuple_box) -> Dict[float, list]:
+    """{y centre de ligne: mots tries par X}, de haut en bas (cles de ligne des scripts)"""
+    return {row.y: row.words for row in sweep_rows(words, box=box)}
+
+
+def bucket_rows(words: Iterable[tuple], key: Callable[[float], float]) -> List[Row]:
+    """Lignes par seau fixe sur y0 (strategie historique des scripts)"""
+    buckets = defaultdict(list)
+    for w in words:
+        buckets[key(w[1])].append(w)
+    rows = []
+    for i, y in enumerate(sorted(buckets)):
+        ws = sorted(buckets[y], key=lambda w: w[0])
+        rows.append(Row(i, y, min(w[3] - w[1] for w in ws), ws))
+    return rows
+
+
+STRATEGIES: Dict[str, Callable[[List[tuple]], List[Row]]] = {
+    'round(y, 0)': lambda words: bucket_rows(words, lambda y: round(y, 0)),
+    'round(y / 5) * 5': lambda words: bucket_rows(words, lambda y: round(y / 5) * 5),
+    'sweep (hauteur)': sweep_rows,
+}
+
+
+def pair_rows(rows: Iterable[Row]) -> List[Tuple[str, int, tuple]]:
+    """Regle de proximite dans chaque ligne: qty a droite d'abord, puis a gauche, < 150"""
+    pairs = []
+    for row in rows:
+        numbers = [(int(w[4]), w[0]) for w in row.words if w[4].isdigit() and len(w[4]) <= QTY_MAX_DIGITS]
+        if not numbers:
+            continue
+        for w in row.words:
+            match = TAG_PATTERN.match(w[4])
+            if not match:
+                continue
+            x = w[0]
+            right = [(n_x - x, q) for q, n_x in numbers if n_x > x and n_x - x < X_MAX_DISTANCE]
+            left = [(x - n_x, q) for q, n_x in numbers if n_x < x and x - n_x < X_MAX_DISTANCE]
+            best = min(right or left, default=None)
+            if best is not None:
+                pairs.append((tag_from_match(match), best[1], w))
+    return pairs
+
+
+# =============================================================================
+# BENCHMARK DES STRATEGIES
+# =============================================================================
+def benchmark(pages: List[Tuple[int, List[tuple]]], reference: Dict[str, int] = None,
+              repeats: int = 3) -> List[Dict]:
+    """Temps (meilleur de `repeats`), nombre de lignes et precision de chaque strategie"""
+    from pdf_extraction.evaluation import compare
+
+    results = []
+    for name, build in STRATEGIES.items():
+        best_ms = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            row_count = 0
+            tag_qty = {}
+            for _, words in pages:
+                rows = build(words)
+                row_count += len(rows)
+                for tag, qty, _ in pair_rows(rows):
+                    tag_qty.setdefault(tag, qty)
+            elapsed = (time.perf_counter() - start) * 1000
+            best_ms = elapsed if best_ms is None else min(best_ms, elapsed)
+        result = {'strategy': name, 'rows': row_count, 'tags': len(tag_qty), 'ms': best_ms}
+        if reference:
+            result.update(compare(tag_qty, reference))
+        results.append(result)
+    return results
+
+
+def main():
+    from pdf_extraction.streaming import iter_page_words
+
+    parser = argparse.ArgumentParser(description="Compare les strategies de regroupement en lignes")
+    parser.add_argument('pdf')
+    parser.add_argument('reference', nargs='?', help="CSV nesting ou dossier Sheet_Metal_Nesting")
+    parser.add_argument('--engine', default='fitz', choices=('fitz', 'pdfplumber'))
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    reference = None
+    if args.reference:
+        import os
+        from pdf_extraction.csv_reference import load_tag_qty, nesting_dir_for
+        nesting_dir = args.reference if os.path.isdir(args.reference) else nesting_dir_for(args.reference)
+        reference = load_tag_qty(nesting_dir)
+
+    start = time.perf_counter()
+    pages = list(iter_page_words(args.pdf, args.engine))
+    load_ms = (time.perf_counter() - start) * 1000
+    word_count = sum(len(words) for _, words in pages)
+    print(f"[+] Couche de mots ({args.engine}): {len(pages)} pages, {word_count} mots en {load_ms:.0f} ms")
+    print()
+
+    print(f"{'Strategie':<20} {'Lignes':<9} {'Tags':<7} {'Correct':<12} {'Wrong':<7} {'Missing':<8} {'ms':<8}")
+    print("-" * 75)
+    for r in benchmark(pages, reference, args.repeats):
+        correct = f"{r['correct']}/{r['total']}" if reference else '-'
+        wrong = r['wrong'] if reference else '-'
+        missing = r['missing'] if reference else '-'
+        print(f"{r['strategy']:<20} {r['rows']:<9} {r['tags']:<7} {correct:<12} {wrong:<7} {missing:<8} {r['ms']:<8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,460 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+SERVICE DE VERIFICATION LOCAL - Moteurs chauds, HTTP sur localhost
+=============================================================================
+Le DXF Verifier lancait un script a froid pour chaque verification (import
+fitz/pdfplumber/pandas/camelot + relecture du CSV). Ce service reste en vie:
+    - moteurs importes une seule fois (et JVM Tabula chauffee si demande)
+    - LRU des PDF deja extraits (cle: chemin + mtime + taille + methode)
+    - LRU des references CSV fusionnees
+    - requetes verify(pdf, csv) traitees en parallele par un pool borne
+    - historique ecrit par un thread dedie sur une connexion SQLite unique
+
+Protocole (JSON, 127.0.0.1 uniquement):
+    POST /verify   {"pdf": "...", "csv": "...", "method": "proximity", "dxf": false}
+                   ("dxf": true joint l'inventaire des DXF du module, dxf_inventory.py)
+    POST /verify/stream  meme corps, reponse NDJSON progressive (progress.py)
+    GET  /status   etat des caches et des moteurs
+
+Usage:
+    python -m pdf_extraction.service serve [--port 8765] [--warm camelot,tabula --warm-pdf x.pdf]
+    python -m pdf_extraction.service verify <pdf> <csv|dossier nesting> [--method proximity] [--dxf]
+=============================================================================
+"""
+
+import argparse
+import io
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+
+from pdf_extraction.csv_reference import find_nesting_csvs, load_tag_qty, nesting_dir_for
+from pdf_extraction.evaluation import compare
+from pdf_extraction.history import HistoryDB
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 4
+PDF_CACHE_SIZE = 64
+REFERENCE_CACHE_SIZE = 16
+REQUEST_TIMEOUT = 600
+
+# Moteurs importes au demarrage (les autres seulement avec --warm)
+DEFAULT_ENGINES = ('fitz', 'pdfplumber')
+
+
+# =============================================================================
+# METHODES D'EXTRACTION DISPONIBLES
+# =============================================================================
+def _proximity(pdf_path: str) -> Dict[str, int]:
+    from pdf_extraction.proximity import extract_proximity_pages
+    from pdf_extraction.streaming import iter_fitz_words
+    from pdf_extraction.tag_index import TagIndex
+    # Alimente l'index des tags au passage (tag_index where ...)
+    with TagIndex() as index:
+        return extract_proximity_pages(index.indexing(pdf_path, iter_fitz_words(pdf_path)))
+
+
+def _masked(pdf_path: str) -> Dict[str, int]:
+    from pdf_extraction.masks import iter_masked_words
+    from pdf_extraction.proximity import extract_proximity_pages
+    # Masques propres a l'appel: deux threads du service n'apprennent pas le meme masque
+    return extract_proximity_pages(iter_masked_words(pdf_path, {}))
+
+
+def _auto(pdf_path: str) -> Dict[str, int]:
+    from pdf_extraction.inventor import extract_auto
+    # Export Inventor reconnu -> lecture par gabarit (meme resultat que proximity)
+    return extract_auto(pdf_path)
+
+
+def _benchmark_engine(name: str) -> Callable[[str], Dict[str, int]]:
+    """Moteur de table_extraction_benchmark.py (importe a la premiere utilisation)"""
+    def run(pdf_path: str) -> Dict[str, int]:
+        import table_extraction_benchmark as engines
+        return getattr(engines, name)(pdf_path)
+    return run
+
+
+METHODS = {
+    'proximity': _proximity,
+    'auto': _auto,
+    'masked': _masked,
+    'camelot': _benchmark_engine('test_camelot'),
+    'tabula': _benchmark_engine('test_tabula'),
+    'pdfplumber': _benchmark_engine('test_pdfplumber_tables'),
+    'hybrid': _benchmark_engine('test_hybrid'),
+}
+
+
+# =============================================================================
+# CACHE LRU
+# =============================================================================
+class LruCache:
+    """Cache LRU thread-safe avec compteurs hits/misses"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'size': len(self._data), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
+
+
+class HistoryWriter:
+    """Enregistrements d'historique faits par un thread dedie
+
+    Une seule connexion SQLite reste ouverte pour la duree du service: une
+    verification (meme servie par le cache) ne paie ni l'ouverture ni le
+    checkpoint WAL de la fermeture, elle depose seulement l'enregistrement.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+        self._thread.start()
+
+    def record(self, *args, **kwargs) -> None:
+        """Memes arguments que HistoryDB.record (date d'execution fixee a l'appel)"""
+        kwargs.setdefault('run_time', time.time())
+        self._queue.put((args, kwargs))
+
+    def _run(self) -> None:
+        with HistoryDB() as history:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                args, kwargs = item
+                try:
+                    history.record(*args, **kwargs)
+                except Exception as e:
+                    print(f"[!] Historique non enregistre ({args[0]}): {e}")
+
+    def close(self) -> None:
+        """Ecrit les enregistrements en attente puis ferme la connexion"""
+        self._queue.put(None)
+        self._thread.join()
+
+
+def _file_key(path: str):
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+# =============================================================================
+# SERVICE
+# =============================================================================
+class VerificationService:
+    """Verifications PDF vs CSV avec moteurs et caches gardes en memoire"""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS,
+                 pdf_cache_size: int = PDF_CACHE_SIZE,
+                 reference_cache_size: int = REFERENCE_CACHE_SIZE):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='verify')
+        self.workers = workers
+        self.pdf_cache = LruCache(pdf_cache_size)
+        self.reference_cache = LruCache(reference_cache_size)
+        self.engines = {}
+        self.started = time.time()
+        # Une seule extraction a la fois par (PDF, methode): les doublons attendent le cache
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self.history = HistoryWriter()
+
+    def warm_up(self, engines=DEFAULT_ENGINES, warm_pdf: Optional[str] = None) -> None:
+        """Importe les moteurs; avec warm_pdf, execute chaque methode une fois (JVM Tabula)"""
+        for engine in engines:
+            start = time.perf_counter()
+            try:
+                __import__(engine)
+                self.engines[engine] = round((time.perf_counter() - start) * 1000, 1)
+                print(f"[+] Moteur {engine} importe ({self.engines[engine]} ms)")
+            except ImportError as e:
+                print(f"[!] Moteur {engine} indisponible: {e}")
+                continue
+            if warm_pdf and engine in METHODS:
+                start = time.perf_counter()
+                METHODS[engine](warm_pdf)
+                print(f"    [+] {engine} chauffe sur {os.path.basename(warm_pdf)} "
+                      f"({(time.perf_counter() - start):.2f}s)")
+
+    def load_reference(self, csv_path: str) -> Dict[str, int]:
+        """Reference fusionnee (LRU sur la liste des CSV et leurs mtime/taille)"""
+        nesting_dir = csv_path if os.path.isdir(csv_path) else nesting_dir_for(csv_path)
+        key = tuple(_file_key(p) for p in find_nesting_csvs(nesting_dir))
+        reference = self.reference_cache.get(key)
+        if reference is None:
+            reference = load_tag_qty(nesting_dir)
+            self.reference_cache.put(key, reference)
+        return reference
+
+    def extract(self, pdf_path: str, method: str) -> Dict[str, int]:
+        """Extraction Tag+Qty avec LRU; un PDF modifie est reextrait"""
+        key = _file_key(pdf_path) + (method,)
+        extracted = self.pdf_cache.get(key)
+        if extracted is not None:
+            return extracted
+
+        with self._inflight_lock:
+            event = self._inflight.get(key)
+            owner = event is None
+            if owner:
+                event = self._inflight[key] = threading.Event()
+        if not owner:
+            event.wait()
+            extracted = self.pdf_cache.get(key)
+            if extracted is not None:
+                return extracted
+
+        try:
+            extracted = METHODS[method](pdf_path)
+            self.pdf_cache.put(key, extracted)
+        finally:
+            if owner:
+                with self._inflight_lock:
+                    del self._inflight[key]
+                event.set()
+        return extracted
+
+    def verify(self, pdf_path: str, csv_path: str, method: str = 'proximity', dxf: bool = False) -> Dict:
+        """Compare l'extraction du PDF avec la reference CSV
+
+        Avec dxf=True, le rapport recoit aussi l'inventaire des DXF du module
+        (result['dxf'], voir dxf_inventory.py).
+        """
+        if method not in METHODS:
+            raise ValueError(f"Methode inconnue: {method} (disponibles: {', '.join(METHODS)})")
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF non trouve: {pdf_path}")
+        if not os.path.exists(csv_path):
+            raise FileNotFoundError(f"CSV non trouve: {csv_path}")
+
+        start = time.perf_counter()
+        hits_before = self.pdf_cache.hits
+        reference = self.load_reference(csv_path)
+        extracted = self.extract(pdf_path, method)
+        result = compare(extracted, reference)
+        result.update({
+            'pdf': pdf_path,
+            'method': method,
+            'extracted': extracted,
+            'cached': self.pdf_cache.hits > hits_before,
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 1),
+        })
+        if dxf:
+            from pdf_extraction.dxf_inventory import dxf_inventory, dxf_report
+            nesting_dir = csv_path if os.path.isdir(csv_path) else nesting_dir_for(csv_path)
+            report = dxf_report(dxf_inventory(nesting_dir), extracted)
+            result['dxf'] = {k: report[k] for k in ('counts', 'files', 'elapsed_ms', 'problems')}
+        # Historique par projet / REF / module (history failures --ref REF13 ...)
+        self.history.record(pdf_path, method, extracted, reference, result['elapsed_ms'], reference_path=csv_path)
+        return result
+
+    def verify_stream(self, pdf_path: str, csv_path: str, emit) -> Dict:
+        """Comme verify (proximite), en evenements page par page (progress.py)"""
+        from pdf_extraction.progress import stream_verification
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF non trouve: {pdf_path}")
+        if not os.path.exists(csv_path):
+            raise FileNotFoundError(f"CSV non trouve: {csv_path}")
+        start = time.perf_counter()
+        reference = self.load_reference(csv_path)
+        result = stream_verification(pdf_path, reference, emit)
+        result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        self.pdf_cache.put(_file_key(pdf_path) + ('proximity',), result['extracted'])
+        self.history.record(pdf_path, 'proximity', result['extracted'], reference, result['elapsed_ms'],
+                            reference_path=csv_path, pages=result['pages'])
+        return result
+
+    def submit(self, pdf_path: str, csv_path: str, method: str = 'proximity', dxf: bool = False):
+        return self.pool.submit(self.verify, pdf_path, csv_path, method, dxf)
+
+    def submit_stream(self, pdf_path: str, csv_path: str, emit):
+        """verify_stream dans le pool (meme limite de workers que verify)"""
+        return self.pool.submit(self.verify_stream, pdf_path, csv_path, emit)
+
+    def status(self) -> Dict:
+        return {
+            'uptime_s': round(time.time() - self.started, 1),
+            'workers': self.workers,
+            'engines_ms': self.engines,
+            'methods': list(METHODS),
+            'pdf_cache': self.pdf_cache.stats(),
+            'reference_cache': self.reference_cache.stats(),
+        }
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(wait=True)
+        self.history.close()
+
+
+# =============================================================================
+# SERVEUR HTTP
+# =============================================================================
+class _Handler(BaseHTTPRequestHandler):
+    service: VerificationService = None
+
+    def _send_json(self, code: int, payload: Dict) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/status':
+            self._send_json(200, self.service.status())
+        else:
+            self._send_json(404, {'error': f"Route inconnue: {self.path}"})
+
+    def _stream(self) -> None:
+        """POST /verify/stream: evenements NDJSON envoyes au fil de l'extraction"""
+        from pdf_extraction.progress import NdjsonWriter
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.end_headers()
+        out = io.TextIOWrapper(self.wfile, encoding='utf-8', newline='\n')
+        writer = NdjsonWriter(out)
+        try:
+            # Pas de delai: le worker ecrit dans la reponse jusqu'a la fin du flux
+            self.service.submit_stream(request['pdf'], request['csv'], writer.emit).result()
+        except Exception as e:
+            writer.emit({'event': 'error', 'message': f"{type(e).__name__}: {e}"}, True)
+        finally:
+            writer.close()
+            out.detach()
+
+    def do_POST(self):
+        if self.path == '/verify/stream':
+            self._stream()
+            return
+        if self.path != '/verify':
+            self._send_json(404, {'error': f"Route inconnue: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            future = self.service.submit(request['pdf'], request['csv'], request.get('method', 'proximity'),
+                                         bool(request.get('dxf', False)))
+            self._send_json(200, future.result(timeout=REQUEST_TIMEOUT))
+        except (KeyError, ValueError) as e:
+            self._send_json(400, {'error': str(e)})
+        except FileNotFoundError as e:
+            self._send_json(404, {'error': str(e)})
+        except Exception as e:
+            self._send_json(500, {'error': f"{type(e).__name__}: {e}"})
+
+    def log_message(self, format, *args):
+        pass  # Pas de log par requete: le client mesure la latence
+
+
+def serve(service: VerificationService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """Cree le serveur HTTP (a lancer avec serve_forever())"""
+    handler = type('VerificationHandler', (_Handler,), {'service': service})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def request_verify(pdf_path: str, csv_path: str, method: str = 'proximity',
+                   host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, dxf: bool = False) -> Dict:
+    """Client: envoie une requete verify au service local"""
+    import urllib.error
+    import urllib.request
+    body = json.dumps({'pdf': pdf_path, 'csv': csv_path, 'method': method, 'dxf': dxf}).encode('utf-8')
+    req = urllib.request.Request(f"http://{host}:{port}/verify", data=body,
+                                 headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=REQUEST_TIMEOUT) as resp:
+            return json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service de verification PDF vs CSV (localhost)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_serve = sub.add_parser('serve', help="Demarrer le service")
+    p_serve.add_argument('--host', default=DEFAULT_HOST)
+    p_serve.add_argument('--port', type=int, default=DEFAULT_PORT)
+    p_serve.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    p_serve.add_argument('--warm', default='', help="Moteurs supplementaires a chauffer (ex: camelot,tabula)")
+    p_serve.add_argument('--warm-pdf', help="PDF de chauffe (demarre la JVM Tabula)")
+
+    p_verify = sub.add_parser('verify', help="Envoyer une verification au service")
+    p_verify.add_argument('pdf')
+    p_verify.add_argument('csv')
+    p_verify.add_argument('--method', default='proximity', choices=list(METHODS))
+    p_verify.add_argument('--host', default=DEFAULT_HOST)
+    p_verify.add_argument('--port', type=int, default=DEFAULT_PORT)
+    p_verify.add_argument('--dxf', action='store_true', help="Joindre l'inventaire des DXF du module")
+
+    args = parser.parse_args()
+
+    if args.command == 'verify':
+        start = time.perf_counter()
+        result = request_verify(args.pdf, args.csv, args.method, args.host, args.port, args.dxf)
+        if 'error' in result:
+            print(f"[-] {result['error']}")
+            return 1
+        print(f"[+] {result['correct']}/{result['total']} ({result['accuracy']}%) | "
+              f"Wrong: {result['wrong']} | Missing: {result['missing']} | Extra: {result['extra']}")
+        print(f"    Service: {result['elapsed_ms']} ms (cache: {result['cached']}) | "
+              f"Aller-retour: {(time.perf_counter() - start) * 1000:.1f} ms")
+        if 'dxf' in result:
+            d = result['dxf']
+            print(f"    DXF: {d['files']} fichiers ({d['elapsed_ms']} ms) | "
+                  + ' | '.join(f"{status}: {n}" for status, n in sorted(d['counts'].items())))
+            for r in d['problems'][:20]:
+                print(f"    [!] {r['tag'] or r['filename']}: {r['status']} {r['detail']} "
+                      f"(PDF {r.get('pdf_qty')}, ref {r['ref_qty']}, CSV {r['csv_qty']})")
+        return 0
+
+    service = VerificationService(workers=args.workers)
+    engines = list(DEFAULT_ENGINES) + [e.strip() for e in args.warm.split(',') if e.strip()]
+    service.warm_up(engines, args.warm_pdf)
+    server = serve(service, args.host, args.port)
+    print(f"[+] Service de verification sur http://{args.host}:{args.port} ({args.workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[>] Arret du service...")
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+COUCHE DE MOTS EN MEMOIRE PARTAGEE - Passage aux workers sans pickle
+=============================================================================
+Un ProcessPoolExecutor qui recoit des listes de tuples de mots les pickle
+puis les reconstruit dans chaque worker: sur une page dense, ce transfert
+coute plus que le couplage lui-meme.
+
+Ici la couche de mots est empaquetee UNE fois (format .wsnap de
+snapshot.py: coordonnees f8, identifiants u4, pool de chaines + offsets)
+dans un bloc multiprocessing.shared_memory; un .wsnap y est copie tel
+quel. Les workers s'y attachent par son nom et lisent les tableaux sans
+copie; a chaque passe, seuls des indices de pages partent vers les workers
+et seuls les resultats reviennent. Le gain vient des passes repetees sur la
+meme couche (autotune, plusieurs methodes sur un PDF): le pickle renvoie
+toutes les pages a chaque passe.
+
+    with PagePool(iter_fitz_words(pdf), workers=4) as pool:
+        for task in (pair_task, ...):
+            results = pool.map(task)
+
+Pour paralleliser autre chose que les pages (essais d'autotune sur tout un
+corpus), PagePool.run repartit des appels quelconques; la tache lit la
+couche par worker_layer() et un contexte envoye une fois par worker
+(worker_context()).
+
+Usage (benchmark pickle vs memoire partagee):
+    python -m pdf_extraction.shared_words <fichier.pdf|.wsnap> [--engine fitz] [--workers 4] [--dense 10] [--passes 5]
+=============================================================================
+"""
+
+import argparse
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from pdf_extraction.snapshot import WordLayer, is_snapshot, layer_size, pack_layer, write_layer
+
+# Taches par worker: assez pour equilibrer, assez peu pour amortir l'aller-retour
+CHUNKS_PER_WORKER = 4
+
+PageTask = Callable[[int, List[tuple]], object]
+
+
+def _open_block(name: str) -> shared_memory.SharedMemory:
+    # 3.13+: ne pas laisser le resource_tracker du worker detruire le bloc du parent
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+class SharedWordLayer:
+    """Couche de mots dans un bloc de memoire partagee
+
+    Le createur (`create`) detruit le bloc a la fermeture; un worker
+    (`attach`) ne fait que s'en detacher.
+    """
+
+    def __init__(self, block: shared_memory.SharedMemory, owner: bool):
+        self._block = block
+        self._owner = owner
+        self.layer = WordLayer(block.buf)
+
+    @classmethod
+    def create(cls, pages: Iterable[Tuple[int, List[tuple]]], source: str = '',
+               engine: str = '') -> 'SharedWordLayer':
+        """Empaquette une couche de mots dans un nouveau bloc partage"""
+        header, sections = pack_layer(pages, source, engine)
+        block = shared_memory.SharedMemory(create=True, size=max(1, layer_size(header)))
+        write_layer(header, sections, block.buf)
+        return cls(block, owner=True)
+
+    @classmethod
+    def from_snapshot(cls, path: str) -> 'SharedWordLayer':
+        """Copie un fichier .wsnap dans un bloc partage (deja empaquete)"""
+        block = shared_memory.SharedMemory(create=True, size=max(1, os.path.getsize(path)))
+        with open(path, 'rb') as f:
+            f.readinto(block.buf)
+        return cls(block, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'SharedWordLayer':
+        return cls(_open_block(name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._block.name
+
+    @property
+    def nbytes(self) -> int:
+        return layer_size(self.layer.header)
+
+    def close(self) -> None:
+        # Les vues numpy doivent disparaitre avant le bloc
+        self.layer.release()
+        self._block.close()
+        if self._owner:
+            self._block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# =============================================================================
+# POOL DE WORKERS
+# =============================================================================
+_SHARED: Optional[SharedWordLayer] = None
+_CONTEXT = None
+
+
+def _attach_worker(name: str, context=None) -> None:
+    global _SHARED, _CONTEXT
+    _SHARED = SharedWordLayer.attach(name)
+    _CONTEXT = context
+
+
+def worker_layer() -> WordLayer:
+    """Couche de mots partagee, dans une tache executee par un PagePool"""
+    return _SHARED.layer
+
+
+def worker_context():
+    """Contexte du PagePool (envoye une fois a chaque worker)"""
+    return _CONTEXT
+
+
+def _run_shared(task: PageTask, start: int, stop: int) -> list:
+    layer = _SHARED.layer
+    return [task(int(layer.page_numbers[i]), layer.page_words(i)) for i in range(start, stop)]
+
+
+def _run_pickled(task: PageTask, pages: List[Tuple[int, List[tuple]]]) -> list:
+    return [task(page_num, words) for page_num, words in pages]
+
+
+def _ranges(count: int, workers: int) -> List[Tuple[int, int]]:
+    size = max(1, -(-count // (workers * CHUNKS_PER_WORKER)))
+    return [(i, min(i + size, count)) for i in range(0, count, size)]
+
+
+class PagePool:
+    """Workers attaches a une couche de mots partagee, pour plusieurs passes
+
+    `pages` = (numero_page, mots) ou chemin d'un .wsnap; `context` = objet
+    picklable transmis une seule fois a chaque worker (worker_context()).
+    """
+
+    def __init__(self, pages, workers: int = 2, context=None):
+        if is_snapshot(pages):
+            self.shared = SharedWordLayer.from_snapshot(pages)
+        else:
+            self.shared = SharedWordLayer.create(pages)
+        self.workers = workers
+        self._ranges = _ranges(len(self.shared.layer), workers)
+        self._pool = ProcessPoolExecutor(max_workers=workers, initializer=_attach_worker,
+                                         initargs=(self.shared.name, context))
+
+    def map(self, task: PageTask) -> list:
+        """[task(numero_page, mots) pour chaque page], dans l'ordre des pages
+
+        `task` doit etre une fonction de module (picklable).
+        """
+        if not self._ranges:
+            return []
+        starts, stops = zip(*self._ranges)
+        chunks = self._pool.map(_run_shared, [task] * len(starts), starts, stops)
+        return [result for chunk in chunks for result in chunk]
+
+    def run(self, func: Callable, *iterables, chunksize: int = 1) -> list:
+        """[func(*args)] dans les workers, dans l'ordre; `func` lit la couche par worker_layer()"""
+        return list(self._pool.map(func, *iterables, chunksize=chunksize))
+
+    def close(self) -> None:
+        self._pool.shutdown()
+        self.shared.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def map_pages(task: PageTask, pages, workers: int = 2) -> list:
+    """Une passe de `task` sur chaque page, couche de mots en memoire partagee"""
+    with PagePool(pages, workers) as pool:
+        return pool.map(task)
+
+
+def map_pickled(pool: ProcessPoolExecutor, task: PageTask, pages: List[Tuple[int, List[tuple]]],
+                workers: int = 2) -> list:
+    """Comme PagePool.map, mais les mots sont pickles vers les workers (reference)"""
+    ranges = _ranges(len(pages), workers)
+    chunks = pool.map(_run_pickled, [task] * len(ranges), [pages[a:b] for a, b in ranges])
+    return [result for chunk in chunks for result in chunk]
+
+
+# =============================================================================
+# TACHES
+# =============================================================================
+def count_task(page_num: int, words: List[tuple]) -> int:
+    """Transfert seul: le worker ne fait que recevoir les mots"""
+    return len(words)
+
+
+def pair_task(page_num: int, words: List[tuple]) -> Dict[str, int]:
+    """Couplage par proximite d'une page: {tag: qty}, premiere occurrence"""
+    from pdf_extraction.proximity import pair_page_words
+    tag_qty = {}
+    for tag, qty, _ in pair_page_words(words):
+        tag_qty.setdefault(tag, qty)
+    return tag_qty
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+def densify(pages: List[Tuple[int, List[tuple]]], factor: int) -> List[Tuple[int, List[tuple]]]:
+    """Pages `factor` fois plus denses: chaque page est repetee, decalee en Y"""
+    if factor <= 1:
+        return pages
+    dense = []
+    for page_num, words in pages:
+        height = max((w[3] for w in words), default=0.0) + 10
+        dense.append((page_num, [
+            (w[0], w[1] + k * height, w[2], w[3] + k * height) + tuple(w[4:])
+            for k in range(factor) for w in words
+        ]))
+    return dense
+
+
+def _timed_passes(run, passes: int) -> Tuple[list, List[float]]:
+    timings = []
+    for _ in range(passes):
+        start = time.perf_counter()
+        result = run()
+        timings.append(time.perf_counter() - start)
+    return result, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Passage de la couche de mots aux workers: pickle vs memoire partagee")
+    parser.add_argument('pdf', help="PDF ou instantane .wsnap")
+    parser.add_argument('--engine', choices=('fitz', 'pdfplumber'), default='fitz')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--dense', type=int, default=1, help="Multiplier les mots de chaque page")
+    parser.add_argument('--passes', type=int, default=5, help="Passes sur la meme couche (ex: essais autotune)")
+    args = parser.parse_args()
+
+    from pdf_extraction.streaming import iter_page_words
+
+    pages = densify(list(iter_page_words(args.pdf, args.engine)), args.dense)
+    word_count = sum(len(words) for _, words in pages)
+    pickled = sum(len(pickle.dumps(words, pickle.HIGHEST_PROTOCOL)) for _, words in pages)
+
+    print("=" * 80)
+    print(f"PICKLE vs MEMOIRE PARTAGEE - {args.workers} workers, {args.passes} passes")
+    print("=" * 80)
+    print(f"Pages: {len(pages)} | Mots: {word_count} ({word_count / max(1, len(pages)):.0f}/page)")
+
+    start = time.perf_counter()
+    pickle_pool = ProcessPoolExecutor(max_workers=args.workers)
+    pickle_setup = time.perf_counter() - start
+    start = time.perf_counter()
+    shared_pool = PagePool(args.pdf if is_snapshot(args.pdf) and args.dense <= 1 else pages, args.workers)
+    shared_setup = time.perf_counter() - start
+    print(f"Envoye par passe: pickle {pickled / 1024:.0f} Ko | memoire partagee "
+          f"{shared_pool.shared.nbytes / 1024:.0f} Ko une fois, puis des indices de pages")
+    print()
+    print(f"    {'Tache':<10} {'Mode':<10} {'Mise en place':<15} {'1re passe':<11} "
+          f"{'Passe suiv.':<13} {'Total (ms)':<11} identique")
+    try:
+        for name, task in (('transfert', count_task), ('couplage', pair_task)):
+            by_pickle, t_pickle = _timed_passes(
+                lambda: map_pickled(pickle_pool, task, pages, args.workers), args.passes)
+            by_shared, t_shared = _timed_passes(lambda: shared_pool.map(task), args.passes)
+            same = 'oui' if by_pickle == by_shared else 'NON'
+            for mode, setup, timings in (('pickle', pickle_setup, t_pickle), ('partagee', shared_setup, t_shared)):
+                following = min(timings[1:]) if len(timings) > 1 else timings[0]
+                print(f"    {name:<10} {mode:<10} {setup * 1000:<15.0f} {timings[0] * 1000:<11.0f} "
+                      f"{following * 1000:<13.0f} {(setup + sum(timings)) * 1000:<11.0f} {same}")
+            pickle_setup = shared_setup = 0.0   # Pools deja en place pour la tache suivante
+    finally:
+        pickle_pool.shutdown()
+        shared_pool.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+INSTANTANE DE LA COUCHE DE MOTS - Fichier compact, lisible par mmap
+=============================================================================
+Pour rejouer un cas (ex: WPA1302-0101 de debug_tag.py) sans le PDF du
+Vault, on fige la couche de mots d'un PDF (ou de quelques pages) dans un
+fichier .wsnap. Les extracteurs qui passent par iter_fitz_words /
+iter_pdfplumber_words / iter_page_words acceptent ce fichier a la place
+du PDF: aucun moteur PDF n'est charge.
+
+Structure (little-endian, sections alignees sur 8 octets):
+    MAGIC 'XNWLSNP1' | u32 taille entete | entete JSON (source, moteur,
+    offsets des sections) | numeros de page u32[n] | debut des mots u64[n+1]
+    | mots (x0, y0, x1, y1 f8, text u32, block u32, line u32, word u32)
+    | offsets des chaines u64[m+1] | pool de chaines UTF-8 (dedoublonnees)
+
+Les tableaux sont des vues numpy directement sur le fichier mappe;
+seules les chaines de la page lue sont decodees. Le meme format sert a
+passer une couche de mots aux workers en memoire partagee (shared_words.py).
+
+Usage:
+    python -m pdf_extraction.snapshot create <fichier.pdf> [sortie.wsnap] [--engine fitz] [--pages 17,20-25]
+    python -m pdf_extraction.snapshot info <fichier.wsnap>
+    python -m pdf_extraction.snapshot dump <fichier.wsnap> --page 17 [--grep WPA1302]
+=============================================================================
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+
+SNAPSHOT_EXT = '.wsnap'
+MAGIC = b'XNWLSNP1'
+VERSION = 1
+
+WORD_FIELDS = [
+    ('x0', '<f8'), ('y0', '<f8'), ('x1', '<f8'), ('y1', '<f8'),
+    ('text', '<u4'), ('block', '<u4'), ('line', '<u4'), ('word', '<u4'),
+]
+
+
+def is_snapshot(path) -> bool:
+    """Vrai pour un chemin .wsnap (les PdfBuffer et autres objets sont exclus)"""
+    return isinstance(path, (str, os.PathLike)) and os.fspath(path).lower().endswith(SNAPSHOT_EXT)
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+# =============================================================================
+# ECRITURE
+# =============================================================================
+def pack_layer(pages: Iterable[Tuple[int, List[tuple]]], source: str = '',
+               engine: str = '') -> Tuple[dict, list]:
+    """(entete, [(section, tableau numpy)]) d'une couche de mots, offsets calcules"""
+    import numpy as np
+
+    page_numbers = []
+    starts = [0]
+    rows = []
+    strings = {}
+    for page_num, words in pages:
+        page_numbers.append(page_num)
+        for w in words:
+            text_id = strings.setdefault(w[4], len(strings))
+            block, line, word = (w[5], w[6], w[7]) if len(w) >= 8 else (0, 0, len(rows) - starts[-1])
+            rows.append((w[0], w[1], w[2], w[3], text_id, block, line, word))
+        starts.append(len(rows))
+
+    encoded = [s.encode('utf-8') for s in strings]
+    string_offsets = np.zeros(len(encoded) + 1, dtype='<u8')
+    if encoded:
+        string_offsets[1:] = np.cumsum([len(b) for b in encoded])
+    sections = [
+        ('pages', np.asarray(page_numbers, dtype='<u4')),
+        ('starts', np.asarray(starts, dtype='<u8')),
+        ('words', np.array(rows, dtype=WORD_FIELDS)),
+        ('string_offsets', string_offsets),
+        ('pool', np.frombuffer(b''.join(encoded), dtype='u1')),
+    ]
+
+    header = {
+        'version': VERSION,
+        'source': os.path.basename(source),
+        'engine': engine,
+        'page_count': len(page_numbers),
+        'word_count': len(rows),
+        'string_count': len(encoded),
+        'sections': {},
+    }
+    # La taille de l'entete fixe les offsets, qui changent la taille de l'entete: point fixe
+    while True:
+        offset = _align(len(MAGIC) + 4 + len(json.dumps(header).encode('utf-8')))
+        layout = {}
+        for name, array in sections:
+            layout[name] = [offset, int(array.nbytes)]
+            offset = _align(offset + array.nbytes)
+        if layout == header['sections']:
+            break
+        header['sections'] = layout
+    return header, sections
+
+
+def layer_size(header: dict) -> int:
+    """Taille totale en octets d'une couche empaquetee"""
+    return max(offset + nbytes for offset, nbytes in header['sections'].values())
+
+
+def write_layer(header: dict, sections: list, buffer) -> None:
+    """Copie une couche empaquetee dans un tampon inscriptible (memoire partagee...)"""
+    header_bytes = json.dumps(header).encode('utf-8')
+    start = len(MAGIC) + 4
+    buffer[:len(MAGIC)] = MAGIC
+    struct.pack_into('<I', buffer, len(MAGIC), len(header_bytes))
+    buffer[start:start + len(header_bytes)] = header_bytes
+    for name, array in sections:
+        offset, nbytes = header['sections'][name]
+        buffer[offset:offset + nbytes] = array.tobytes()
+
+
+def write_snapshot(pages: Iterable[Tuple[int, List[tuple]]], path: str,
+                   source: str = '', engine: str = '') -> dict:
+    """Ecrit une couche de mots (numero_page, mots compacts) dans un fichier .wsnap"""
+    header, sections = pack_layer(pages, source, engine)
+    header_bytes = json.dumps(header).encode('utf-8')
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in sections:
+            f.write(b'\0' * (header['sections'][name][0] - f.tell()))
+            f.write(array.tobytes())
+    return header
+
+
+def snapshot_pdf(pdf_path: str, out_path: Optional[str] = None, engine: str = 'fitz',
+                 pages: Optional[Set[int]] = None) -> Tuple[str, dict]:
+    """Fige la couche de mots d'un PDF (toutes les pages ou seulement `pages`, numeros 1-based)"""
+    from pdf_extraction.streaming import iter_page_words
+
+    out_path = out_path or os.path.splitext(pdf_path)[0] + SNAPSHOT_EXT
+    layer = iter_page_words(pdf_path, engine)
+    if pages:
+        layer = ((n, words) for n, words in layer if n in pages)
+    return out_path, write_snapshot(layer, out_path, source=pdf_path, engine=engine)
+
+
+# =============================================================================
+# LECTURE (mmap)
+# =============================================================================
+class WordLayer:
+    """Couche de mots empaquetee (format .wsnap) lue sans copie dans un tampon
+
+    `buffer` = mmap d'un fichier, SharedMemory.buf, bytes... Les tableaux
+    sont des vues numpy sur ce tampon.
+    """
+
+    def __init__(self, buffer):
+        import numpy as np
+
+        if bytes(buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError("Pas une couche de mots empaquetee")
+        (header_len,) = struct.unpack_from('<I', buffer, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(bytes(buffer[start:start + header_len]).decode('utf-8'))
+        self._buffer = buffer
+
+        def section(name, dtype):
+            offset, nbytes = self.header['sections'][name]
+            itemsize = np.dtype(dtype).itemsize
+            return np.frombuffer(buffer, dtype=dtype, count=nbytes // itemsize, offset=offset)
+
+        self.page_numbers = section('pages', '<u4')
+        self._starts = section('starts', '<u8')
+        self.words = section('words', WORD_FIELDS)
+        self._string_offsets = section('string_offsets', '<u8')
+        self._pool_offset = self.header['sections']['pool'][0]
+        self._strings = {}
+
+    @property
+    def engine(self) -> str:
+        return self.header.get('engine', '')
+
+    def __len__(self) -> int:
+        return len(self.page_numbers)
+
+    def _string(self, text_id: int) -> str:
+        text = self._strings.get(text_id)
+        if text is None:
+            a = self._pool_offset + int(self._string_offsets[text_id])
+            b = self._pool_offset + int(self._string_offsets[text_id + 1])
+            text = self._strings[text_id] = bytes(self._buffer[a:b]).decode('utf-8')
+        return text
+
+    def page_words(self, index: int) -> List[tuple]:
+        """Mots compacts (x0, y0, x1, y1, text, block, line, word) de la page d'indice `index`"""
+        rows = self.words[int(self._starts[index]):int(self._starts[index + 1])]
+        string = self._string
+        # Colonne par colonne: ~40% plus rapide que rows.tolist() puis reconstruction
+        return list(zip(rows['x0'].tolist(), rows['y0'].tolist(), rows['x1'].tolist(), rows['y1'].tolist(),
+                        [string(t) for t in rows['text'].tolist()],
+                        rows['block'].tolist(), rows['line'].tolist(), rows['word'].tolist()))
+
+    def iter_words(self) -> Iterator[Tuple[int, List[tuple]]]:
+        """(numero_page, mots compacts) comme iter_fitz_words"""
+        for index in range(len(self)):
+            yield int(self.page_numbers[index]), self.page_words(index)
+
+    def release(self) -> None:
+        """Lache les vues sur le tampon (a faire avant de fermer mmap/SharedMemory)"""
+        for attr in ('page_numbers', '_starts', 'words', '_string_offsets', '_buffer'):
+            self.__dict__.pop(attr, None)
+
+
+class WordSnapshot(WordLayer):
+    """Couche de mots d'un fichier .wsnap, lue via mmap sans copie"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            super().__init__(self._mm)
+        except ValueError:
+            self.close()
+            raise ValueError(f"Pas un instantane de mots: {path}")
+
+    def close(self) -> None:
+        # Les vues numpy doivent disparaitre avant le mmap
+        self.release()
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # une vue exterieure est encore vivante: liberation par le GC
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_snapshot_words(path: str) -> Iterator[Tuple[int, List[tuple]]]:
+    """(numero_page, mots compacts) d'un fichier .wsnap"""
+    snapshot = WordSnapshot(path)
+    try:
+        yield from snapshot.iter_words()
+    finally:
+        snapshot.close()
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+def _parse_pages(spec: str) -> Set[int]:
+    pages = set()
+    for part in spec.split(','):
+        if '-' in part:
+            a, b = part.split('-')
+            pages.update(range(int(a), int(b) + 1))
+        elif part:
+            pages.add(int(part))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Instantanes de la couche de mots (.wsnap)")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_create = sub.add_parser('create', help="Figer la couche de mots d'un PDF")
+    p_create.add_argument('pdf')
+    p_create.add_argument('output', nargs='?')
+    p_create.add_argument('--engine', default='fitz', choices=('fitz', 'pdfplumber'))
+    p_create.add_argument('--pages', help="Numeros de page (1-based), ex: 17,20-25")
+    p_info = sub.add_parser('info', help="Resume d'un instantane")
+    p_info.add_argument('snapshot')
+    p_dump = sub.add_parser('dump', help="Mots d'une page")
+    p_dump.add_argument('snapshot')
+    p_dump.add_argument('--page', type=int, required=True)
+    p_dump.add_argument('--grep', help="Filtre (sous-chaine, insensible a la casse)")
+    args = parser.parse_args()
+
+    if args.command == 'create':
+        pages = _parse_pages(args.pages) if args.pages else None
+        path, header = snapshot_pdf(args.pdf, args.output, args.engine, pages)
+        print(f"[+] {path}: {header['page_count']} pages, {header['word_count']} mots, "
+              f"{header['string_count']} chaines uniques, {os.path.getsize(path) / 1024:.1f} Ko")
+        return 0
+
+    with WordSnapshot(args.snapshot) as snapshot:
+        if args.command == 'info':
+            h = snapshot.header
+            print(f"Source: {h['source']} | moteur: {h['engine']} | version {h['version']}")
+            print(f"Pages: {h['page_count']} | Mots: {h['word_count']} | Chaines uniques: {h['string_count']}")
+            numbers = [int(n) for n in snapshot.page_numbers]
+            print(f"Numeros de page: {numbers[:20]}{' ...' if len(numbers) > 20 else ''}")
+            return 0
+
+        numbers = [int(n) for n in snapshot.page_numbers]
+        if args.page not in numbers:
+            print(f"[-] Page {args.page} absente de l'instantane")
+            return 1
+        needle = args.grep.lower() if args.grep else None
+        for w in snapshot.page_words(numbers.index(args.page)):
+            if needle is None or needle in w[4].lower():
+                print(f"    x0={w[0]:8.2f} y0={w[1]:8.2f} x1={w[2]:8.2f} y1={w[3]:8.2f} "
+                      f"b={w[5]:<3} l={w[6]:<3} w={w[7]:<3} {w[4]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+INDEX SPATIAL - Grille uniforme sur les bbox des mots d'une page
+=============================================================================
+Les methodes de couplage tag/qty cherchaient leurs voisins en parcourant
+la liste des mots d'une ligne Y arrondie. La grille range chaque mot dans
+les cellules que couvre sa bbox; une requete ne visite que les cellules
+touchees, donc un cout quasi constant par tag quelle que soit la densite
+de la page.
+
+    grid = WordGrid(words)                # mots au format compact fitz
+    grid.in_rect(x0, y0, x1, y1)          # mots dont la bbox intersecte
+    grid.nearest(x, y, k=3)               # k plus proches d'un point
+    grid.nearest_right(w, 150, 5, pred)   # premier voisin a droite < d
+    grid.row(w, 2)                        # mots de la ligne de w, tries en X (puis ordre de la page)
+=============================================================================
+"""
+
+import math
+from collections import defaultdict
+from typing import Callable, Iterable, List, Optional
+
+GRID_CELL = 40.0          # Cote d'une cellule (pt): ~ largeur d'un tag en 8-10 pt
+ROW_TOLERANCE = 2.0       # Meme ligne si |y0 - y0_ref| <= 2 pt (round(y, 0) des scripts)
+
+WordPredicate = Optional[Callable[[tuple], bool]]
+
+
+class WordGrid:
+    """Grille uniforme sur les bbox des mots (x0, y0, x1, y1, text, ...)"""
+
+    def __init__(self, words: Iterable[tuple], cell: float = GRID_CELL):
+        self.words = list(words)
+        self.cell = cell
+        self._cells = defaultdict(list)
+        if not self.words:
+            self._bounds = (0, 0, -1, -1)
+            return
+        for i, w in enumerate(self.words):
+            for cx in range(int(w[0] // cell), int(w[2] // cell) + 1):
+                for cy in range(int(w[1] // cell), int(w[3] // cell) + 1):
+                    self._cells[(cx, cy)].append(i)
+        xs = [k[0] for k in self._cells]
+        ys = [k[1] for k in self._cells]
+        self._bounds = (min(xs), min(ys), max(xs), max(ys))
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def _cell_range(self, x0: float, y0: float, x1: float, y1: float):
+        bx0, by0, bx1, by1 = self._bounds
+        cx0 = max(bx0, int(x0 // self.cell)) if x0 > -math.inf else bx0
+        cy0 = max(by0, int(y0 // self.cell)) if y0 > -math.inf else by0
+        cx1 = min(bx1, int(x1 // self.cell)) if x1 < math.inf else bx1
+        cy1 = min(by1, int(y1 // self.cell)) if y1 < math.inf else by1
+        return cx0, cy0, cx1, cy1
+
+    def _indices_in_rect(self, x0: float, y0: float, x1: float, y1: float) -> List[int]:
+        cx0, cy0, cx1, cy1 = self._cell_range(x0, y0, x1, y1)
+        seen = set()
+        found = []
+        cells = self._cells
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                for i in cells.get((cx, cy), ()):
+                    if i in seen:
+                        continue
+                    seen.add(i)
+                    w = self.words[i]
+                    if w[0] <= x1 and w[2] >= x0 and w[1] <= y1 and w[3] >= y0:
+                        found.append(i)
+        return found
+
+    def in_rect(self, x0: float, y0: float, x1: float, y1: float) -> List[tuple]:
+        """Mots dont la bbox intersecte le rectangle (bornes infinies acceptees)"""
+        return [self.words[i] for i in self._indices_in_rect(x0, y0, x1, y1)]
+
+    def nearest(self, x: float, y: float, k: int = 1, predicate: WordPredicate = None) -> List[tuple]:
+        """k mots les plus proches du point (distance point-bbox), anneaux croissants"""
+        if not self.words:
+            return []
+        bx0, by0, bx1, by1 = self._bounds
+        px, py = int(x // self.cell), int(y // self.cell)
+        max_ring = max(abs(px - bx0), abs(px - bx1), abs(py - by0), abs(py - by1))
+        best = {}
+        for ring in range(max_ring + 1):
+            for cx in range(px - ring, px + ring + 1):
+                for cy in range(py - ring, py + ring + 1):
+                    if ring and abs(cx - px) != ring and abs(cy - py) != ring:
+                        continue
+                    for i in self._cells.get((cx, cy), ()):
+                        if i in best:
+                            continue
+                        w = self.words[i]
+                        if predicate is not None and not predicate(w):
+                            continue
+                        dx = max(w[0] - x, 0, x - w[2])
+                        dy = max(w[1] - y, 0, y - w[3])
+                        best[i] = math.hypot(dx, dy)
+            # Tout mot hors des anneaux visites est a plus de ring * cell
+            if len(best) >= k and sorted(best.values())[k - 1] <= ring * self.cell:
+                break
+        return [self.words[i] for i in sorted(best, key=best.get)[:k]]
+
+    def nearest_right(self, word: tuple, max_dist: float, y_tol: float = ROW_TOLERANCE,
+                      predicate: WordPredicate = None) -> Optional[tuple]:
+        """Mot le plus proche a droite de `word` (ecart de x0 < max_dist, |dy0| <= y_tol)"""
+        x, y = word[0], word[1]
+        best = None
+        for w in self.in_rect(x, y - y_tol, x + max_dist, y + y_tol):
+            if w[0] <= x or abs(w[1] - y) > y_tol or w[0] - x >= max_dist:
+                continue
+            if predicate is not None and not predicate(w):
+                continue
+            if best is None or w[0] < best[0]:
+                best = w
+        return best
+
+    def nearest_left(self, word: tuple, max_dist: float, y_tol: float = ROW_TOLERANCE,
+                     predicate: WordPredicate = None) -> Optional[tuple]:
+        """Mot le plus proche a gauche de `word` (ecart de x0 < max_dist, |dy0| <= y_tol)"""
+        x, y = word[0], word[1]
+        best = None
+        for w in self.in_rect(x - max_dist, y - y_tol, x, y + y_tol):
+            if w[0] >= x or abs(w[1] - y) > y_tol or x - w[0] >= max_dist:
+                continue
+            if predicate is not None and not predicate(w):
+                continue
+            if best is None or w[0] > best[0]:
+                best = w
+        return best
+
+    def row(self, word: tuple, y_tol: float = ROW_TOLERANCE) -> List[tuple]:
+        """Mots de la meme ligne que `word` (|dy0| <= y_tol), tries par X puis ordre de la page
+
+        L'ordre de la page departage les X egaux (comme le tri stable des
+        lignes de benchmark_v3), independamment du parcours des cellules.
+        """
+        y = word[1]
+        words = self.words
+        found = [i for i in self._indices_in_rect(-math.inf, y - y_tol, math.inf, y + y_tol)
+                 if abs(words[i][1] - y) <= y_tol]
+        found.sort(key=lambda i: (words[i][0], i))
+        return [words[i] for i in found]
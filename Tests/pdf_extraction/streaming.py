@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+LECTURE PAGE PAR PAGE - Memoire bornee pour les tres gros PDF
+=============================================================================
+`with pdfplumber.open(...) as pdf: for page in pdf.pages` garde chaque page
+parsee (objets, layout) jusqu'a la fermeture du fichier. Ici chaque page est
+parsee, reduite a ses mots compacts puis liberee (caches vides) avant la
+suivante: le pic memoire ne depend plus du nombre de pages.
+
+Format compact d'un mot (identique a fitz page.get_text("words")):
+    (x0, y0, x1, y1, text, block_no, line_no, word_no)
+
+Usage:
+    python -m pdf_extraction.streaming <fichier.pdf> [--engine fitz|pdfplumber]
+=============================================================================
+"""
+
+import argparse
+import re
+import sys
+import time
+import tracemalloc
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from pdf_extraction.snapshot import is_snapshot, iter_snapshot_words
+
+Word = Tuple[float, float, float, float, str, int, int, int]
+
+# Pourcentage du store MuPDF (polices, images, objets) libere apres chaque page
+FITZ_STORE_SHRINK = 100
+
+
+# =============================================================================
+# PYMUPDF (fitz)
+# =============================================================================
+def iter_fitz_pages(pdf_path) -> Iterator:
+    """Itere les pages fitz en vidant le store MuPDF apres chaque page
+
+    `pdf_path` peut aussi etre un PdfBuffer deja charge (voir loader.py).
+    """
+    import fitz
+
+    doc = pdf_path.open_fitz() if hasattr(pdf_path, 'open_fitz') else fitz.open(pdf_path)
+    try:
+        for page_index in range(doc.page_count):
+            page = doc.load_page(page_index)
+            try:
+                yield page
+            finally:
+                # La page n'est plus referencee par le generateur
+                del page
+                fitz.TOOLS.store_shrink(FITZ_STORE_SHRINK)
+    finally:
+        doc.close()
+
+
+def iter_fitz_words(pdf_path: str) -> Iterator[Tuple[int, List[Word]]]:
+    """(numero_page, mots compacts) pour chaque page, via fitz (ou depuis un instantane .wsnap)"""
+    if is_snapshot(pdf_path):
+        yield from iter_snapshot_words(pdf_path)
+        return
+    for page in iter_fitz_pages(pdf_path):
+        yield page.number + 1, [tuple(w) for w in page.get_text("words")]
+
+
+def iter_fitz_text(pdf_path: str) -> Iterator[Tuple[int, str]]:
+    """(numero_page, texte brut) pour chaque page, via fitz"""
+    for page in iter_fitz_pages(pdf_path):
+        yield page.number + 1, page.get_text()
+
+
+# =============================================================================
+# PDFPLUMBER
+# =============================================================================
+def _release_plumber_page(pdf, page) -> None:
+    """Vide les caches d'une page pdfplumber et ceux du document pdfminer"""
+    close = getattr(page, 'close', None)  # pdfplumber >= 0.10
+    if close is not None:
+        close()
+    else:
+        page.flush_cache()
+
+    # pdfminer garde chaque objet PDF deja parse: on le laisse reparser a la demande
+    cached_objs = getattr(pdf.doc, '_cached_objs', None)
+    if cached_objs is not None:
+        cached_objs.clear()
+
+
+def iter_pdfplumber_pages(pdf_path) -> Iterator:
+    """Itere les pages pdfplumber en liberant chacune avant la suivante"""
+    import pdfplumber
+
+    pdf_file = pdf_path.open_pdfplumber() if hasattr(pdf_path, 'open_pdfplumber') else pdfplumber.open(pdf_path)
+    with pdf_file as pdf:
+        pages = pdf.pages
+        for page_index in range(len(pages)):
+            page = pages[page_index]
+            try:
+                yield page
+            finally:
+                _release_plumber_page(pdf, page)
+                # pdf.pages est une liste en cache: on retire la reference
+                pages[page_index] = None
+                del page
+
+
+def iter_pdfplumber_words(pdf_path: str) -> Iterator[Tuple[int, List[Word]]]:
+    """(numero_page, mots compacts) pour chaque page, via pdfplumber (ou depuis un instantane .wsnap)"""
+    if is_snapshot(pdf_path):
+        yield from iter_snapshot_words(pdf_path)
+        return
+    for page in iter_pdfplumber_pages(pdf_path):
+        words = [
+            (w['x0'], w['top'], w['x1'], w['bottom'], w['text'], 0, 0, i)
+            for i, w in enumerate(page.extract_words())
+        ]
+        yield page.page_number, words
+
+
+def iter_page_words(pdf_path: str, engine: str = 'fitz') -> Iterator[Tuple[int, List[Word]]]:
+    """Couche de mots page par page pour le moteur demande
+
+    Un instantane .wsnap est lu tel quel, quel que soit le moteur demande
+    (celui qui l'a produit est dans son entete).
+    """
+    if engine == 'fitz':
+        return iter_fitz_words(pdf_path)
+    if engine == 'pdfplumber':
+        return iter_pdfplumber_words(pdf_path)
+    raise ValueError(f"Moteur inconnu: {engine}")
+
+
+# =============================================================================
+# VERIFICATION "EXISTE DANS LE PDF BRUT" SANS full_text
+# =============================================================================
+def find_tags_in_raw_text(pdf_path: str, tags: Iterable[str]) -> Dict[str, List[int]]:
+    """Pages ou chaque tag apparait dans le texte brut (sous-chaine, casse ignoree)
+
+    Une seule recherche par page quel que soit le nombre de tags: les tags
+    forment une alternative unique, du plus long au plus court, testee a
+    chaque position du texte en minuscules. Seule la page courante est en
+    memoire.
+    """
+    tags = list(dict.fromkeys(tags))
+    found = {tag: [] for tag in tags}
+    needles = {}
+    for tag in tags:
+        needles.setdefault(tag.lower(), []).append(tag)
+    if not needles:
+        return found
+    ordered = sorted(needles, key=len, reverse=True)
+    pattern = re.compile('(?=(' + '|'.join(re.escape(n) for n in ordered) + '))')
+    # A une position, l'alternative ne retient que le plus long: ses prefixes cherches sont la aussi
+    prefixes = {n: [m for m in needles if n.startswith(m)] for n in needles}
+    for page_num, text in iter_fitz_text(pdf_path):
+        hits = set()
+        for match in pattern.finditer(text.lower()):
+            hits.update(prefixes[match.group(1)])
+        for needle in hits:
+            for tag in needles[needle]:
+                found[tag].append(page_num)
+    return found
+
+
+# =============================================================================
+# MESURE DU PIC MEMOIRE
+# =============================================================================
+def main():
+    parser = argparse.ArgumentParser(description="Lecture page par page a memoire bornee")
+    parser.add_argument('pdf', help="Chemin du PDF")
+    parser.add_argument('--engine', choices=['fitz', 'pdfplumber'], default='fitz')
+    parser.add_argument('--report-every', type=int, default=100,
+                        help="Afficher le pic memoire toutes les N pages")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"LECTURE PAGE PAR PAGE ({args.engine})")
+    print("=" * 80)
+    print(f"PDF: {args.pdf}")
+    print()
+
+    # tracemalloc ne voit que le tas Python; le store MuPDF est vide par store_shrink
+    tracemalloc.start()
+    start = time.perf_counter()
+    total_words = 0
+    page_num = 0
+    for page_num, words in iter_page_words(args.pdf, args.engine):
+        total_words += len(words)
+        if page_num % args.report_every == 0:
+            _, peak = tracemalloc.get_traced_memory()
+            print(f"    Page {page_num:>5} | mots: {total_words:>9} | pic: {peak / 1024 / 1024:.1f} Mo")
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print()
+    print(f"[+] Pages: {page_num} | Mots: {total_words} | Temps: {elapsed:.2f}s")
+    print(f"[+] Pic memoire Python: {peak / 1024 / 1024:.1f} Mo")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+CACHE DES TABLEAUX CAMELOT / TABULA - Par page, sur disque
+=============================================================================
+Camelot et Tabula dominent le temps de table_extraction_benchmark.py, alors
+que leurs tableaux ne changent pas tant que la page ne change pas. Chaque
+page est rangee dans un PageCache SQLite (taille bornee, eviction LRU) sous:
+
+    empreinte de la page (page_fingerprint) + moteur + version + reglages
+
+Seules les pages absentes du cache passent par le moteur, en un seul appel
+pour toutes ces pages (Tabula: une seule JVM, comme pages='all' a froid;
+la sortie JSON de tabula-java donne la page de chaque tableau). Relancer le
+vote hybride ou retoucher la detection de colonnes ne relit plus aucun
+tableau.
+
+Les DataFrame sont stockes en JSON (colonnes + lignes, NaN -> None).
+
+Usage:
+    python -m pdf_extraction.table_cache stats
+    python -m pdf_extraction.table_cache clear
+=============================================================================
+"""
+
+import argparse
+import os
+import sys
+from typing import Callable, Dict, List, Sequence
+
+from pdf_extraction import CACHE_DIR
+from pdf_extraction.page_cache import PageCache, make_key, page_fingerprint
+
+TABLE_CACHE_PATH = os.path.join(CACHE_DIR, 'table_cache.sqlite')
+TABLE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Mettre a False pour mesurer les moteurs a froid (--no-table-cache)
+ENABLED = True
+
+CAMELOT_SETTINGS = {'flavor': 'stream'}
+TABULA_SETTINGS = {'multiple_tables': True}
+
+_CACHE = None
+
+
+def get_cache() -> PageCache:
+    """Cache partage du processus (ouvert a la premiere utilisation)"""
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = PageCache(TABLE_CACHE_PATH, table='page_tables', max_bytes=TABLE_CACHE_MAX_BYTES)
+    return _CACHE
+
+
+# =============================================================================
+# DATAFRAME <-> JSON
+# =============================================================================
+def frame_to_json(df) -> Dict:
+    import pandas as pd
+    values = df.astype(object).where(pd.notna(df), None).values.tolist()
+    return {'columns': df.columns.tolist(), 'rows': values}
+
+
+def frame_from_json(data: Dict):
+    import pandas as pd
+    return pd.DataFrame(data['rows'], columns=data['columns'])
+
+
+# =============================================================================
+# LECTURE AVEC CACHE
+# =============================================================================
+def cached_page_tables(pdf_path: str, engine: str, version: str, settings: Dict,
+                       read_pages: Callable[[List[int]], Dict[int, list]]) -> list:
+    """DataFrames de toutes les pages, dans l'ordre des pages
+
+    `read_pages(pages)` extrait les pages (numeros 1-based) absentes du
+    cache et retourne {page: [DataFrame, ...]} (liste vide si aucun tableau).
+    """
+    import fitz
+
+    with fitz.open(pdf_path) as doc:
+        keys = {i + 1: make_key(page_fingerprint(page), engine, version, settings)
+                for i, page in enumerate(doc)}
+
+    cache = get_cache() if ENABLED else None
+    by_page = {}
+    for page_num, key in keys.items():
+        stored = cache.get(key) if cache else None
+        if stored is not None:
+            by_page[page_num] = [frame_from_json(t) for t in stored]
+
+    missing = [p for p in keys if p not in by_page]
+    if missing:
+        fresh = read_pages(missing)
+        for page_num in missing:
+            tables = fresh.get(page_num, [])
+            by_page[page_num] = tables
+            if cache:
+                cache.put(keys[page_num], [frame_to_json(df) for df in tables])
+    return [df for page_num in sorted(by_page) for df in by_page[page_num]]
+
+
+def camelot_tables(pdf_path: str) -> list:
+    """Tableaux Camelot (flavor stream) de toutes les pages, via le cache"""
+    import camelot
+
+    def read_pages(pages: Sequence[int]) -> Dict[int, list]:
+        tables = camelot.read_pdf(pdf_path, pages=','.join(map(str, pages)), **CAMELOT_SETTINGS)
+        found = {}
+        for table in tables:
+            found.setdefault(int(table.page), []).append(table.df)
+        return found
+
+    return cached_page_tables(pdf_path, 'camelot', getattr(camelot, '__version__', '?'),
+                              CAMELOT_SETTINGS, read_pages)
+
+
+def tabula_frame(table: Dict):
+    """DataFrame d'un tableau JSON de tabula-java (1re ligne = entetes, comme tabula-py)"""
+    import pandas as pd
+    rows = [[cell['text'] or None for cell in row] for row in table['data']]
+    header = [cell or '' for cell in rows.pop(0)] if rows else None
+    return pd.DataFrame(rows, columns=header)
+
+
+def tabula_tables(pdf_path: str) -> list:
+    """Tableaux Tabula de toutes les pages, via le cache"""
+    import tabula
+
+    def read_pages(pages: Sequence[int]) -> Dict[int, list]:
+        # Un seul appel (une JVM) pour toutes les pages manquantes
+        raw = tabula.read_pdf(pdf_path, pages=list(pages), silent=True, output_format='json', **TABULA_SETTINGS)
+        found = {}
+        for table in raw:
+            found.setdefault(int(table['page_number']), []).append(tabula_frame(table))
+        return found
+
+    return cached_page_tables(pdf_path, 'tabula', getattr(tabula, '__version__', '?'),
+                              TABULA_SETTINGS, read_pages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache disque des tableaux Camelot / Tabula")
+    parser.add_argument('command', choices=('stats', 'clear'))
+    args = parser.parse_args()
+
+    cache = get_cache()
+    if args.command == 'clear':
+        cache.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(TABLE_CACHE_PATH + suffix):
+                os.remove(TABLE_CACHE_PATH + suffix)
+        print(f"[+] Cache vide: {TABLE_CACHE_PATH}")
+        return 0
+    s = cache.stats()
+    print(f"Cache: {TABLE_CACHE_PATH}")
+    print(f"Pages: {s['entries']} | Taille: {s['bytes'] / 1024 / 1024:.1f} / {s['max_bytes'] / 1024 / 1024:.0f} Mo")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
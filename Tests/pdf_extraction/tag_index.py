@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+INDEX DES TAGS - Ou apparait un tag, et quels nombres l'entourent
+=============================================================================
+debug_tag.py ouvre une page codee en dur (doc[16]) pour un tag code en dur.
+Ici, chaque page qui passe par l'extraction (service de verification,
+`build`) alimente un index inverse SQLite local:
+
+    tag normalise -> (pdf, page, bbox, ligne: tags et nombres avec leur X)
+
+Un PDF deja indexe et inchange (taille + date + pairing_digest des
+reglages et formats de tag) n'est pas relu; sinon ses entrees sont
+remplacees.
+
+Usage:
+    python -m pdf_extraction.tag_index build <pdf|dossier> [...]
+    python -m pdf_extraction.tag_index where WPA1302-0101 [--debug]
+    python -m pdf_extraction.tag_index where "WPA1302-*"
+    python -m pdf_extraction.tag_index stats
+=============================================================================
+"""
+
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pdf_extraction import CACHE_DIR
+from pdf_extraction.params import pairing_digest
+from pdf_extraction.proximity import QTY_MAX_DIGITS, X_MAX_DISTANCE, Y_TOLERANCE, pair_page_words
+from pdf_extraction.spatial import WordGrid
+from pdf_extraction.tags import TAG_PATTERN, normalize_tag, tag_from_match
+
+TAG_INDEX_PATH = os.path.join(CACHE_DIR, 'tag_index.sqlite')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    page_count INTEGER NOT NULL,
+    indexed_at REAL NOT NULL,
+    digest TEXT
+);
+CREATE TABLE IF NOT EXISTS occurrences (
+    tag TEXT NOT NULL,
+    doc_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    page INTEGER NOT NULL,
+    x0 REAL, y0 REAL, x1 REAL, y1 REAL,
+    qty INTEGER,
+    line TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_occurrences_tag ON occurrences(tag);
+CREATE INDEX IF NOT EXISTS idx_occurrences_doc ON occurrences(doc_id);
+"""
+
+
+def page_occurrences(words: List[tuple], grid: Optional[WordGrid] = None,
+                     pairs: Optional[List[Tuple]] = None) -> List[Tuple]:
+    """(tag, bbox, qty retenue, ligne) pour chaque tag d'une page
+
+    ligne = [[texte, x0, 'tag'|'num'], ...] des mots de la meme ligne
+    (|dy0| <= Y_TOLERANCE), comme le detail de debug_tag.py. `grid` et
+    `pairs` (pair_page_words sur cette grille) evitent de recoupler la page.
+    """
+    grid = grid or WordGrid(words)
+    if pairs is None:
+        pairs = pair_page_words(words, grid)
+    paired = {id(tag_word): qty for _, qty, tag_word in pairs}
+    found = []
+    for w in grid.words:
+        match = TAG_PATTERN.match(w[4])
+        if not match:
+            continue
+        line = []
+        for n in grid.row(w, Y_TOLERANCE):
+            if TAG_PATTERN.match(n[4]):
+                line.append([n[4], round(n[0], 1), 'tag'])
+            elif n[4].isdigit() and len(n[4]) <= QTY_MAX_DIGITS:
+                line.append([n[4], round(n[0], 1), 'num'])
+        found.append((tag_from_match(match), tuple(w[:4]), paired.get(id(w)), line))
+    return found
+
+
+class TagIndex:
+    """Index inverse tag -> occurrences, dans SQLite"""
+
+    def __init__(self, path: str = TAG_INDEX_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        self._conn.executescript(_SCHEMA)
+        # Base anterieure a la colonne digest: ses documents seront reindexes
+        if 'digest' not in {row[1] for row in self._conn.execute('PRAGMA table_info(documents)')}:
+            self._conn.execute('ALTER TABLE documents ADD COLUMN digest TEXT')
+
+    # -------------------------------------------------------------------------
+    # Alimentation
+    # -------------------------------------------------------------------------
+    def is_current(self, pdf_path: str) -> bool:
+        """Vrai si le PDF est indexe, inchange depuis, avec les memes reglages de couplage"""
+        st = os.stat(pdf_path)
+        row = self._conn.execute('SELECT size, mtime_ns, digest FROM documents WHERE path = ?',
+                                 (os.path.abspath(pdf_path),)).fetchone()
+        return row is not None and row == (st.st_size, st.st_mtime_ns, pairing_digest())
+
+    def indexing(self, pdf_path: str, pages: Iterable[Tuple[int, List[tuple]]]) -> Iterator[Tuple]:
+        """Laisse passer la couche de mots en indexant chaque page au passage
+
+            extract_proximity_pages(index.indexing(pdf, iter_fitz_words(pdf)))
+
+        Chaque page n'est couplee qu'une fois: elle est rendue avec ses paires,
+        (numero_page, mots, paires), que extract_proximity_pages reprend telles
+        quelles. Le document n'est enregistre qu'une fois toutes les pages vues.
+        """
+        if self.is_current(pdf_path):
+            yield from pages
+            return
+        rows = []
+        page_count = 0
+        for page_num, words in pages:
+            page_count += 1
+            grid = WordGrid(words)
+            pairs = pair_page_words(words, grid)
+            for tag, bbox, qty, line in page_occurrences(words, grid, pairs):
+                rows.append((tag, page_num, *bbox, qty, json.dumps(line)))
+            yield page_num, words, pairs
+        self._store(pdf_path, page_count, rows)
+
+    def index_pdf(self, pdf_path: str, force: bool = False) -> bool:
+        """Indexe un PDF s'il est nouveau ou modifie; faux s'il etait a jour"""
+        from pdf_extraction.streaming import iter_fitz_words
+        if not force and self.is_current(pdf_path):
+            return False
+        if force:
+            self._conn.execute('DELETE FROM documents WHERE path = ?', (os.path.abspath(pdf_path),))
+        for _ in self.indexing(pdf_path, iter_fitz_words(pdf_path)):
+            pass
+        return True
+
+    def _store(self, pdf_path: str, page_count: int, rows: List[tuple]) -> None:
+        st = os.stat(pdf_path)
+        path = os.path.abspath(pdf_path)
+        with self._conn:
+            self._conn.execute('DELETE FROM documents WHERE path = ?', (path,))
+            cur = self._conn.execute(
+                'INSERT INTO documents (path, size, mtime_ns, page_count, indexed_at, digest) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (path, st.st_size, st.st_mtime_ns, page_count, time.time(), pairing_digest()))
+            doc_id = cur.lastrowid
+            self._conn.executemany(
+                'INSERT INTO occurrences (tag, doc_id, page, x0, y0, x1, y1, qty, line) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(r[0], doc_id, *r[1:]) for r in rows])
+
+    # -------------------------------------------------------------------------
+    # Requetes
+    # -------------------------------------------------------------------------
+    def where(self, tag: str, pdf: Optional[str] = None) -> List[Dict]:
+        """Occurrences d'un tag (joker * accepte), triees par PDF puis page"""
+        tag = normalize_tag(tag)
+        if '*' in tag:
+            cond, value = 'o.tag LIKE ?', tag.replace('*', '%')
+        else:
+            cond, value = 'o.tag = ?', tag
+        sql = ('SELECT o.tag, d.path, o.page, o.x0, o.y0, o.x1, o.y1, o.qty, o.line '
+               f'FROM occurrences o JOIN documents d ON d.id = o.doc_id WHERE {cond}')
+        params = [value]
+        if pdf:
+            sql += ' AND d.path LIKE ?'
+            params.append(f'%{pdf}%')
+        sql += ' ORDER BY o.tag, d.path, o.page, o.y0'
+        return [
+            {'tag': t, 'pdf': p, 'page': page, 'bbox': (x0, y0, x1, y1), 'qty': qty, 'line': json.loads(line)}
+            for t, p, page, x0, y0, x1, y1, qty, line in self._conn.execute(sql, params)
+        ]
+
+    def stats(self) -> Dict:
+        docs, pages = self._conn.execute('SELECT COUNT(*), COALESCE(SUM(page_count), 0) FROM documents').fetchone()
+        occ, tags = self._conn.execute('SELECT COUNT(*), COUNT(DISTINCT tag) FROM occurrences').fetchone()
+        return {'documents': docs, 'pages': pages, 'occurrences': occ, 'tags': tags}
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+def print_debug(occurrence: Dict) -> None:
+    """Detail facon debug_tag.py: mots de la ligne, puis distances aux nombres"""
+    tag_x = occurrence['bbox'][0]
+    print(f"  Ligne Y={occurrence['bbox'][1]:.0f}:")
+    for text, x, kind in occurrence['line']:
+        print(f"    {'TAG' if kind == 'tag' else 'NUM'}: {text} @ x={x:.0f}")
+    print(f"  Debug pour {occurrence['tag']} @ x={tag_x:.1f}:")
+    for text, x, kind in occurrence['line']:
+        if kind != 'num':
+            continue
+        dist = x - tag_x
+        print(f"    Number {text} @ x={x}: dist={dist:.0f}, droite={x > tag_x}, <{X_MAX_DISTANCE}={abs(dist) < X_MAX_DISTANCE}")
+
+
+def _pdf_paths(targets: Iterable[str]) -> List[str]:
+    paths = []
+    for target in targets:
+        if os.path.isdir(target):
+            paths.extend(sorted(glob.glob(os.path.join(target, '**', '*.pdf'), recursive=True)))
+        else:
+            paths.append(target)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index inverse des tags (pdf, page, position, nombres voisins)")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_build = sub.add_parser('build', help="Indexer des PDF (dossiers parcourus recursivement)")
+    p_build.add_argument('targets', nargs='+')
+    p_build.add_argument('--force', action='store_true', help="Reindexer meme si inchange")
+    p_where = sub.add_parser('where', help="Ou apparait un tag")
+    p_where.add_argument('tag')
+    p_where.add_argument('--pdf', help="Filtre sur le chemin du PDF")
+    p_where.add_argument('--debug', action='store_true', help="Detail de la ligne facon debug_tag.py")
+    sub.add_parser('stats', help="Taille de l'index")
+    args = parser.parse_args()
+
+    with TagIndex() as index:
+        if args.command == 'build':
+            start = time.perf_counter()
+            for path in _pdf_paths(args.targets):
+                try:
+                    done = index.index_pdf(path, args.force)
+                    print(f"    [{'+' if done else '='}] {path}")
+                except Exception as e:
+                    print(f"    [-] {path}: {e}")
+            s = index.stats()
+            print(f"[+] {s['documents']} PDF, {s['tags']} tags, {s['occurrences']} occurrences "
+                  f"({time.perf_counter() - start:.1f} s)")
+        elif args.command == 'where':
+            start = time.perf_counter()
+            found = index.where(args.tag, args.pdf)
+            elapsed = (time.perf_counter() - start) * 1000
+            if not found:
+                print(f"[-] {normalize_tag(args.tag)} absent de l'index ({elapsed:.1f} ms)")
+                return 1
+            for occ in found:
+                numbers = [text for text, _, kind in occ['line'] if kind == 'num']
+                qty = occ['qty'] if occ['qty'] is not None else '-'
+                print(f"{occ['tag']:<16} {os.path.basename(occ['pdf']):<28} p{occ['page']:<4} "
+                      f"x={occ['bbox'][0]:.0f} y={occ['bbox'][1]:.0f}  qty={qty}  nombres: {', '.join(numbers) or '-'}")
+                if args.debug:
+                    print_debug(occ)
+                    print()
+            print(f"[+] {len(found)} occurrence(s) en {elapsed:.1f} ms")
+        else:
+            s = index.stats()
+            print(f"PDF: {s['documents']} | Pages: {s['pages']} | Tags: {s['tags']} | Occurrences: {s['occurrences']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
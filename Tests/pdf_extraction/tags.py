@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+TAGS - Grammaire multi-formats compilee en un seul motif
+=============================================================================
+Chaque convention de tag (client / projet) est declaree UNE fois: un motif
+sans groupe capturant et une normalisation. Toutes les conventions sont
+compilees en une seule alternative a groupes nommes:
+
+    (?P<revise>(?:...))|(?P<xnrgy>(?:[A-Z]{2,4}\\d{3,4}[-_]\\d{3,4}))
+
+Un mot n'est donc teste qu'une fois quel que soit le nombre de formats;
+le groupe qui a reconnu le tag donne sa normalisation (tag_from_match).
+Les alternatives sont essayees du format le plus specifique (plus longue
+correspondance minimale) au plus general: si un format plus court est un
+prefixe d'un autre (WPA1300-0105 / WPA1300-0105-A), le plus long gagne
+quand il s'applique. Un tag suivi d'un suffixe reste reconnu
+(WPA1300-0105_1.dxf -> WPA1300-0105). A egalite, l'ordre de declaration
+decide.
+
+Formats supplementaires: tag_formats.json a cote de ce module (ou chemin
+dans XNRGY_TAG_FORMATS), lu a l'import:
+
+    [{"name": "acme", "pattern": "AC-\\\\d{5}", "normalize": "upper",
+      "description": "Projets ACME"}]
+
+Usage (motif combine a recopier dans le C# / PowerShell, test de textes):
+    python -m pdf_extraction.tags [--dotnet] [texte ...]
+=============================================================================
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    from re import _parser as _sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse as _sre_parse
+
+TAG_FORMATS_FILE = os.environ.get(
+    'XNRGY_TAG_FORMATS',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tag_formats.json'),
+)
+
+# Normalisations disponibles pour les formats declares en JSON
+NORMALIZERS: Dict[str, Callable[[str], str]] = {
+    'dash': lambda tag: tag.upper().replace("_", "-"),
+    'upper': str.upper,
+    'compact': lambda tag: re.sub(r'[-_\s]', '', tag.upper()),
+}
+
+
+class TagFormat:
+    """Convention de tag: motif (sans groupe capturant) + normalisation"""
+
+    def __init__(self, name: str, pattern: str, normalize: str = 'dash', description: str = ''):
+        if not name.isidentifier():
+            raise ValueError(f"Nom de format invalide (identifiant attendu): {name}")
+        if normalize not in NORMALIZERS:
+            raise ValueError(f"Normalisation inconnue pour {name}: {normalize} (disponibles: {', '.join(NORMALIZERS)})")
+        if re.compile(pattern).groups:
+            raise ValueError(f"Le motif de {name} ne doit pas capturer: utiliser (?:...)")
+        self.name = name
+        self.pattern = pattern
+        self.normalize_name = normalize
+        self.normalize = NORMALIZERS[normalize]
+        self.description = description
+
+
+TAG_FORMATS: List[TagFormat] = [
+    # 2-4 lettres + 3-4 chiffres + tiret/underscore + 3-4 chiffres
+    TagFormat('xnrgy', r'[A-Z]{2,4}\d{3,4}[-_]\d{3,4}', 'dash', "Standard XNRGY (WPA1300-0105)"),
+]
+
+
+def load_formats(path: str = TAG_FORMATS_FILE) -> List[TagFormat]:
+    """Formats du fichier de config (liste vide s'il n'existe pas)"""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [TagFormat(**spec) for spec in json.load(f)]
+
+
+def _specificity(fmt: TagFormat):
+    """Cle de tri: longueurs minimale puis maximale de correspondance, decroissantes"""
+    low, high = _sre_parse.parse(fmt.pattern).getwidth()
+    return -low, -high
+
+
+def compile_formats(formats: Iterable[TagFormat]) -> re.Pattern:
+    """Une seule alternative, un groupe nomme par format, le plus specifique en premier"""
+    formats = list(formats)
+    names = [f.name for f in formats]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Formats de tag en double: {', '.join(names)}")
+    ordered = sorted(formats, key=_specificity)
+    return re.compile('|'.join(f'(?P<{f.name}>(?:{f.pattern}))' for f in ordered), re.IGNORECASE)
+
+
+TAG_FORMATS.extend(load_formats())
+TAG_PATTERN = compile_formats(TAG_FORMATS)
+# Tag et quantite separes par des blancs, dans le texte brut d'une page
+TAG_QTY_PATTERN = re.compile(r'(?:' + TAG_PATTERN.pattern + r')\s+(?P<qty>\d+)', re.IGNORECASE)
+QTY_TAG_PATTERN = re.compile(r'(?P<qty>\d+)\s+(?:' + TAG_PATTERN.pattern + ')', re.IGNORECASE)
+_NORMALIZE = {f.name: f.normalize for f in TAG_FORMATS}
+_DEFAULT_NORMALIZE = TAG_FORMATS[0].normalize
+
+
+def tag_from_match(match: re.Match) -> str:
+    """Tag normalise selon le format qui l'a reconnu
+
+    Accepte aussi un match d'un motif qui englobe TAG_PATTERN.pattern.
+    """
+    name = match.lastgroup
+    if name not in _NORMALIZE:
+        name = next(n for n in _NORMALIZE if match.group(n) is not None)
+    return _NORMALIZE[name](match.group(name))
+
+
+def match_tag(text: str) -> Optional[str]:
+    """Tag normalise si le texte commence par un tag (TAG_PATTERN.match), sinon None"""
+    match = TAG_PATTERN.match(text)
+    return tag_from_match(match) if match else None
+
+
+def search_tag(text: str) -> Optional[str]:
+    """Premier tag normalise trouve dans le texte, ou None"""
+    match = TAG_PATTERN.search(text)
+    return tag_from_match(match) if match else None
+
+
+def find_tags(text: str) -> List[str]:
+    """Tous les tags normalises du texte, dans l'ordre"""
+    return [tag_from_match(m) for m in TAG_PATTERN.finditer(text)]
+
+
+def normalize_tag(tag: str) -> str:
+    """Forme canonique d'un tag deja isole (format reconnu, sinon normalisation XNRGY)"""
+    match = TAG_PATTERN.fullmatch(tag)
+    return tag_from_match(match) if match else _DEFAULT_NORMALIZE(tag)
+
+
+def dotnet_pattern() -> str:
+    """Motif combine en syntaxe .NET (groupes nommes (?<nom>...))"""
+    return TAG_PATTERN.pattern.replace('(?P<', '(?<')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grammaire des tags: formats declares et motif combine")
+    parser.add_argument('texts', nargs='*', help="Textes a tester")
+    parser.add_argument('--dotnet', action='store_true', help="Motif en syntaxe .NET (C# / PowerShell)")
+    args = parser.parse_args()
+
+    print(f"Formats ({len(TAG_FORMATS)}, fichier: {TAG_FORMATS_FILE}"
+          f"{'' if os.path.exists(TAG_FORMATS_FILE) else ' absent'}):")
+    for f in TAG_FORMATS:
+        print(f"    {f.name:<12} {f.pattern:<40} {f.normalize_name:<8} {f.description}")
+    print(f"Motif{' .NET' if args.dotnet else ''} (IgnoreCase): {dotnet_pattern() if args.dotnet else TAG_PATTERN.pattern}")
+    for text in args.texts:
+        found = [(m.lastgroup, tag_from_match(m)) for m in TAG_PATTERN.finditer(text)]
+        print(f"[{'+' if found else '-'}] {text!r}: "
+              f"{', '.join(f'{tag} ({name})' for name, tag in found) or 'aucun tag'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+GABARITS DE TABLEAU - Entete et colonnes reutilises d'une page a l'autre
+=============================================================================
+test_auto_structure, test_pymupdf_grid et test_pymupdf_table_structure
+cherchaient l'entete Qty/Tag dans les 10-15 premieres lignes de CHAQUE
+page et reconstruisaient le modele de colonnes. Une BatchPrint utilise
+presque partout le meme gabarit de liste de pieces:
+
+    1. Gabarit connu: ses mots d'entete sont aux memes positions sur la page
+       => colonnes reutilisees sans balayage (le plus recent est teste d'abord)
+    2. Sinon, balayage des premieres lignes; l'empreinte de l'entete
+       (textes + X arrondis) retrouve un gabarit deja vu a une autre hauteur
+    3. Pas d'entete mais un nombre dans la colonne Qty du dernier gabarit:
+       suite du tableau de la page precedente (pas de lignes a sauter)
+
+    cache = TemplateCache(QTY_HEADERS, TAG_HEADERS, max_lines=15)
+    template, header_y = cache.for_page(words, lines)
+=============================================================================
+"""
+
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pdf_extraction.params import param
+from pdf_extraction.rows import row_lines
+from pdf_extraction.tags import TAG_PATTERN, tag_from_match
+
+ANCHOR_TOLERANCE = 2.0                          # Ecart max (pt) d'un mot d'entete d'une page a l'autre
+QTY_X_TOLERANCE = param('qty_column_tolerance')  # Colonne Qty si |x0 - x0_entete| < tolerance (30)
+COLUMN_TOLERANCE = param('column_tolerance')    # Meme colonne si |x0 - x_colonne| < tolerance (15, get_col)
+COLUMN_MIN_WORDS = param('column_min_words')    # Mots min au meme X arrondi pour une colonne (3)
+
+
+def column_positions(words: Iterable[tuple]) -> List[float]:
+    """X des colonnes d'une page: X arrondis a 10 partages par >= COLUMN_MIN_WORDS mots"""
+    x_counts = defaultdict(int)
+    for w in words:
+        x_counts[round(w[0], -1)] += 1
+    return sorted(x for x, c in x_counts.items() if c >= COLUMN_MIN_WORDS)
+
+
+def column_index(columns: Sequence[float], x: float) -> Optional[int]:
+    """Indice de la premiere colonne a moins de COLUMN_TOLERANCE de x"""
+    for i, cx in enumerate(columns):
+        if abs(x - cx) < COLUMN_TOLERANCE:
+            return i
+    return None
+
+
+class TableTemplate:
+    """Gabarit d'une liste de pieces: mots d'entete, colonnes Qty/Tag, colonnes de la page"""
+
+    def __init__(self, fingerprint: tuple, header_words: List[tuple], qty_x: Optional[float],
+                 tag_x: Optional[float], columns: List[float]):
+        self.fingerprint = fingerprint
+        self.qty_x = qty_x
+        self.tag_x = tag_x
+        self.columns = columns
+        self._anchors = defaultdict(list)
+        for i, w in enumerate(header_words):
+            self._anchors[w[4].lower()].append((i, w[0], w[1]))
+        self._anchor_count = len(header_words)
+
+    def match(self, words: Iterable[tuple]) -> Optional[tuple]:
+        """Un mot d'entete de la page si tous sont presents a leur position, sinon None"""
+        found = {}
+        for w in words:
+            for i, x, y in self._anchors.get(w[4].lower(), ()):
+                if abs(w[0] - x) <= ANCHOR_TOLERANCE and abs(w[1] - y) <= ANCHOR_TOLERANCE:
+                    found[i] = w
+        if len(found) != self._anchor_count:
+            return None
+        return found[0]
+
+    def in_qty_column(self, x: float) -> bool:
+        return self.qty_x is not None and abs(x - self.qty_x) < QTY_X_TOLERANCE
+
+
+def header_fingerprint(header_words: Iterable[tuple]) -> tuple:
+    """Empreinte de la disposition d'un entete: (texte, X arrondi a 5) tries par X"""
+    return tuple(sorted((w[4].lower(), round(w[0] / 5) * 5) for w in header_words))
+
+
+class TemplateCache:
+    """Gabarits d'un document, par empreinte d'entete"""
+
+    def __init__(self, qty_headers: Sequence[str], tag_headers: Sequence[str] = (),
+                 max_lines: int = 15, exact: bool = False):
+        self.qty_headers = [h.lower() for h in qty_headers]
+        self.tag_headers = [h.lower() for h in tag_headers]
+        self.max_lines = max_lines
+        self.exact = exact
+        self._templates: 'OrderedDict[tuple, TableTemplate]' = OrderedDict()
+        self._last: Optional[TableTemplate] = None
+        self.stats = {'reused': 0, 'detected': 0, 'continuation': 0, 'none': 0}
+
+    def _is_header(self, text: str, headers: List[str]) -> bool:
+        text = text.lower()
+        if self.exact:
+            return text in headers
+        return any(h in text for h in headers)
+
+    def _detect(self, words: List[tuple], lines: Dict[float, List[tuple]]) -> Tuple[Optional[TableTemplate], Optional[float]]:
+        """(gabarit, cle de ligne) de la premiere ligne (parmi max_lines) contenant un entete Qty"""
+        for y in sorted(lines.keys())[:self.max_lines]:
+            header = sorted(lines[y], key=lambda w: w[0])
+            qty_x = next((w[0] for w in header if self._is_header(w[4], self.qty_headers)), None)
+            if qty_x is None:
+                continue
+            fingerprint = header_fingerprint(header)
+            template = self._templates.get(fingerprint)
+            if template is None:
+                # Meme disposition a une autre hauteur: on garde le premier gabarit
+                tag_x = next((w[0] for w in header if self._is_header(w[4], self.tag_headers)), None)
+                template = TableTemplate(fingerprint, header, qty_x, tag_x, column_positions(words))
+                self._templates[fingerprint] = template
+            return template, y
+        return None, None
+
+    def for_page(self, words: List[tuple], lines: Dict[float, List[tuple]]) -> Tuple[Optional[TableTemplate], Optional[float]]:
+        """(gabarit, cle de ligne de l'entete) de la page
+
+        `lines` = mots groupes par ligne (cle Y du script appelant). La cle
+        est None pour une page de suite sans entete (toutes les lignes sont
+        des donnees), et le gabarit None si la page n'a pas de tableau connu.
+        """
+        for template in reversed(self._templates.values()):
+            anchor = template.match(words)
+            if anchor is not None:
+                self._templates.move_to_end(template.fingerprint)
+                self._last = template
+                self.stats['reused'] += 1
+                return template, next((y for y, ws in lines.items() if anchor in ws), None)
+
+        template, header_y = self._detect(words, lines)
+        if template is not None:
+            self._templates.move_to_end(template.fingerprint)
+            self._last = template
+            self.stats['detected'] += 1
+            return template, header_y
+
+        last = self._last
+        if last is not None and any(w[4].isdigit() and last.in_qty_column(w[0]) for w in words):
+            self.stats['continuation'] += 1
+            return last, None
+
+        self._last = None
+        self.stats['none'] += 1
+        return None, None
+
+
+# =============================================================================
+# METHODES PAR GABARIT (sur une couche de mots)
+# =============================================================================
+QTY_HEADERS = ['qty', 'quantity', 'quantite', 'qte', 'nb', 'nombre', 'count', 'pcs', 'pieces', 'units', 'amt']
+TAG_HEADERS = ['item', 'tag', 'part', 'piece', 'file', 'filename', 'fichier', 'name', 'ref', 'drawing', 'dxf']
+
+
+def _page_lines(words: Iterable[tuple]) -> Dict[float, List[tuple]]:
+    return row_lines(words)
+
+
+def header_column_pages(pages: Iterable[Tuple[int, List[tuple]]],
+                        templates: Optional[TemplateCache] = None) -> Dict[str, int]:
+    """Auto Structure: sous l'entete, qty = nombre de la colonne Qty, sinon premier nombre"""
+    templates = templates or TemplateCache(QTY_HEADERS, TAG_HEADERS, max_lines=15)
+    tag_qty = {}
+    for _, words in pages:
+        lines = _page_lines(words)
+        template, header_y = templates.for_page(words, lines)
+        for y in sorted(lines.keys()):
+            if header_y is not None and y <= header_y:
+                continue
+            tag = qty = None
+            for w in sorted(lines[y], key=lambda w: w[0]):
+                match = TAG_PATTERN.match(w[4])
+                if match:
+                    tag = tag_from_match(match)
+                if w[4].isdigit():
+                    if template and template.in_qty_column(w[0]):
+                        qty = int(w[4])
+                    elif qty is None:
+                        qty = int(w[4])
+            if tag and qty is not None and tag not in tag_qty:
+                tag_qty[tag] = qty
+    return tag_qty
+
+
+def grid_pages(pages: Iterable[Tuple[int, List[tuple]]],
+               templates: Optional[TemplateCache] = None) -> Dict[str, int]:
+    """PyMuPDF Grid: colonnes par X recurrents, qty = nombre dans la colonne de l'entete Qty"""
+    templates = templates or TemplateCache(QTY_HEADERS, TAG_HEADERS, max_lines=15)
+    tag_qty = {}
+    for _, words in pages:
+        lines = _page_lines(words)
+        template, header_y = templates.for_page(words, lines)
+        columns = template.columns if template else column_positions(words)
+        qty_col = column_index(columns, template.qty_x) if template else None
+        for y in sorted(lines.keys()):
+            if header_y is not None and y <= header_y:
+                continue
+            tag = qty = None
+            for w in sorted(lines[y], key=lambda w: w[0]):
+                match = TAG_PATTERN.match(w[4])
+                if match:
+                    tag = tag_from_match(match)
+                if w[4].isdigit():
+                    if qty_col is not None and column_index(columns, w[0]) == qty_col:
+                        qty = int(w[4])
+                    elif qty is None:
+                        qty = int(w[4])
+            if tag and qty is not None and tag not in tag_qty:
+                tag_qty[tag] = qty
+    return tag_qty
@@ -5,33 +5,23 @@ Objectif: Trouver le meilleur moteur pour extraire Tag + Qty
 peu importe le format/style du tableau
 """
 
-import re
+import argparse
 import os
 from collections import defaultdict
 
+from pdf_extraction import table_cache
+from pdf_extraction.csv_reference import load_tag_qty, nesting_dir_for
+from pdf_extraction.proximity import extract_proximity
+from pdf_extraction.results_store import ResultRecorder, timed
+from pdf_extraction.tags import TAG_PATTERN, tag_from_match
+
 PDF_PATH = r"C:\Vault\Engineering\Projects\10381\REF13\M02\6-Shop Drawing PDF\Production\BatchPrint\02-Machines.pdf"
 CSV_PATH = r"C:\Vault\Engineering\Projects\10381\REF13\M02\5_Exportation\Sheet_Metal_Nesting\Punch\10381-13-M02.csv"
 
-TAG_PATTERN = re.compile(r'([A-Z]{2,4}\d{3,4}[-_]\d{3,4})', re.IGNORECASE)
 
 def load_csv_reference():
-    """Charge reference depuis CSV (format: Qty,Filename.dxf,...)"""
-    tag_qty = {}
-    if not os.path.exists(CSV_PATH):
-        return tag_qty
-    with open(CSV_PATH, 'r', encoding='utf-8-sig') as f:
-        for line in f:
-            parts = re.split(r'[;,]', line)
-            if len(parts) >= 2:
-                try:
-                    qty = int(parts[0].strip())
-                    match = TAG_PATTERN.search(parts[1].strip())
-                    if match:
-                        tag = match.group(1).upper().replace("_", "-")
-                        tag_qty[tag] = qty
-                except:
-                    continue
-    return tag_qty
+    """Charge reference depuis tous les CSV de nesting (format: Qty,Filename.dxf,...)"""
+    return load_tag_qty(nesting_dir_for(CSV_PATH))
 
 def evaluate(name, extracted, reference):
     """Evalue resultats"""
@@ -51,15 +41,12 @@ def evaluate(name, extracted, reference):
 # =============================================================================
 # MOTEUR 1: CAMELOT (specialise tableaux)
 # =============================================================================
-def test_camelot():
+def test_camelot(pdf_path=None):
     """Camelot - Detection automatique de tableaux"""
+    pdf_path = pdf_path or PDF_PATH
     tag_qty = {}
     try:
-        import camelot
-        tables = camelot.read_pdf(PDF_PATH, pages='all', flavor='stream')
-        
-        for table in tables:
-            df = table.df
+        for df in table_cache.camelot_tables(pdf_path):
             if df.empty:
                 continue
             
@@ -99,7 +86,7 @@ def test_camelot():
                 
                 match = TAG_PATTERN.search(tag_val)
                 if match:
-                    tag = match.group(1).upper().replace("_", "-")
+                    tag = tag_from_match(match)
                     if qty_val.strip().isdigit():
                         qty = int(qty_val)
                         if tag not in tag_qty:
@@ -112,14 +99,12 @@ def test_camelot():
 # =============================================================================
 # MOTEUR 2: TABULA
 # =============================================================================
-def test_tabula():
+def test_tabula(pdf_path=None):
     """Tabula - Extraction tableaux via Java"""
+    pdf_path = pdf_path or PDF_PATH
     tag_qty = {}
     try:
-        import tabula
-        tables = tabula.read_pdf(PDF_PATH, pages='all', multiple_tables=True, silent=True)
-        
-        for df in tables:
+        for df in table_cache.tabula_tables(pdf_path):
             if df.empty:
                 continue
             
@@ -158,7 +143,7 @@ def test_tabula():
                 
                 match = TAG_PATTERN.search(tag_val)
                 if match:
-                    tag = match.group(1).upper().replace("_", "-")
+                    tag = tag_from_match(match)
                     try:
                         qty = int(float(qty_val))
                         if tag not in tag_qty:
@@ -173,13 +158,14 @@ def test_tabula():
 # =============================================================================
 # MOTEUR 3: PDFPLUMBER avec detection structure
 # =============================================================================
-def test_pdfplumber_tables():
+def test_pdfplumber_tables(pdf_path=None):
     """pdfplumber - Tables avec analyse structure"""
+    pdf_path = pdf_path or PDF_PATH
     tag_qty = {}
     try:
         import pdfplumber
         
-        with pdfplumber.open(PDF_PATH) as pdf:
+        with pdfplumber.open(pdf_path) as pdf:
             for page in pdf.pages:
                 tables = page.extract_tables()
                 
@@ -227,7 +213,7 @@ def test_pdfplumber_tables():
                         
                         match = TAG_PATTERN.search(tag_val)
                         if match:
-                            tag = match.group(1).upper().replace("_", "-")
+                            tag = tag_from_match(match)
                             if qty_val.strip().isdigit():
                                 qty = int(qty_val)
                                 if tag not in tag_qty:
@@ -240,85 +226,11 @@ def test_pdfplumber_tables():
 # =============================================================================
 # MOTEUR 4: PYMUPDF avec reconstruction grille
 # =============================================================================
-def test_pymupdf_structure():
-    """PyMuPDF - Reconstruction structure tableau"""
+def test_pymupdf_structure(pdf_path=None, locations=None):
+    """PyMuPDF - Proximite X/Y: qty la plus proche a droite puis a gauche du tag"""
     tag_qty = {}
     try:
-        import fitz
-        
-        doc = fitz.open(PDF_PATH)
-        for page in doc:
-            words = page.get_text("words")
-            if not words:
-                continue
-            
-            # Grouper par lignes (tolerance Y = 5 pixels)
-            lines = defaultdict(list)
-            for w in words:
-                y_key = round(w[1] / 5) * 5
-                lines[y_key].append({
-                    'text': w[4],
-                    'x0': w[0],
-                    'x1': w[2],
-                    'y': w[1]
-                })
-            
-            # Pour chaque ligne, trouver Tag et Qty le plus proche
-            for y_key in sorted(lines.keys()):
-                line_words = sorted(lines[y_key], key=lambda w: w['x0'])
-                
-                # Trouver tous les tags et tous les nombres sur cette ligne
-                tags_on_line = []
-                numbers_on_line = []
-                
-                for w in line_words:
-                    match = TAG_PATTERN.match(w['text'])
-                    if match:
-                        tags_on_line.append({
-                            'tag': match.group(1).upper().replace("_", "-"),
-                            'x': w['x0']
-                        })
-                    if w['text'].isdigit() and len(w['text']) <= 3:
-                        numbers_on_line.append({
-                            'qty': int(w['text']),
-                            'x': w['x0']
-                        })
-                
-                # Pour chaque tag, trouver le nombre le plus proche (gauche OU droite)
-                for tag_info in tags_on_line:
-                    tag = tag_info['tag']
-                    tag_x = tag_info['x']
-                    
-                    if tag in tag_qty:
-                        continue
-                    
-                    # Chercher nombre le plus proche du tag (priorite: droite puis gauche)
-                    best_qty = None
-                    best_dist = 999999
-                    
-                    # D'abord chercher a DROITE (format Tag | Qty)
-                    for num_info in numbers_on_line:
-                        num_x = num_info['x']
-                        if num_x > tag_x:  # A droite
-                            dist = num_x - tag_x
-                            if dist < best_dist and dist < 150:
-                                best_dist = dist
-                                best_qty = num_info['qty']
-                    
-                    # Si rien a droite, chercher a gauche (format Qty | Tag)
-                    if best_qty is None:
-                        for num_info in numbers_on_line:
-                            num_x = num_info['x']
-                            if num_x < tag_x:  # A gauche
-                                dist = tag_x - num_x
-                                if dist < best_dist and dist < 150:
-                                    best_dist = dist
-                                    best_qty = num_info['qty']
-                    
-                    if best_qty is not None:
-                        tag_qty[tag] = best_qty
-        
-        doc.close()
+        tag_qty = extract_proximity(pdf_path or PDF_PATH, locations)
     except Exception as e:
         print(f"    [-] Erreur PyMuPDF: {e}")
     return tag_qty
@@ -326,17 +238,22 @@ def test_pymupdf_structure():
 # =============================================================================
 # MOTEUR 5: HYBRIDE (meilleur de chaque)
 # =============================================================================
-def test_hybrid():
-    """Hybride - Combine plusieurs moteurs avec vote"""
+def test_hybrid(pdf_path=None, engines=None, engine_results=None):
+    """Hybride - Combine plusieurs moteurs avec vote
+
+    `engines` limite le vote aux moteurs choisis (seuls ceux-la sont importes);
+    `engine_results` reutilise les extractions deja faites par main().
+    """
+    pdf_path = pdf_path or PDF_PATH
+    engine_results = engine_results or {}
     results = {}
     
-    # Collecter de tous les moteurs
-    for name, func in [('camelot', test_camelot), 
-                       ('tabula', test_tabula),
-                       ('pdfplumber', test_pdfplumber_tables),
-                       ('pymupdf', test_pymupdf_structure)]:
+    # Collecter des moteurs selectionnes
+    for name in engines or list(ENGINES):
         try:
-            data = func()
+            data = engine_results.get(name)
+            if data is None:
+                data = ENGINES[name][2](pdf_path)
             for tag, qty in data.items():
                 if tag not in results:
                     results[tag] = {}
@@ -358,10 +275,34 @@ def test_hybrid():
     
     return tag_qty
 
+# Moteurs: cle CLI -> (titre, nom affiche, fonction). Chaque moteur importe sa
+# bibliotheque (camelot, tabula, pdfplumber, fitz) seulement quand il s'execute.
+ENGINES = {
+    'camelot': ('CAMELOT (specialise tableaux)', 'Camelot', test_camelot),
+    'tabula': ('TABULA (Java-based)', 'Tabula', test_tabula),
+    'pdfplumber': ('PDFPLUMBER Tables', 'pdfplumber', test_pdfplumber_tables),
+    'pymupdf': ('PYMUPDF Structure', 'PyMuPDF', test_pymupdf_structure),
+}
+
 # =============================================================================
 # MAIN
 # =============================================================================
 def main():
+    parser = argparse.ArgumentParser(description="Benchmark moteurs extraction tableaux PDF")
+    parser.add_argument('--methods', default=','.join(list(ENGINES) + ['hybrid']),
+                        help=f"Moteurs a executer parmi: {', '.join(ENGINES)}, hybrid "
+                             "(ex: --methods pymupdf pour le fast path sans camelot/tabula)")
+    parser.add_argument('--no-table-cache', action='store_true',
+                        help="Relire les tableaux Camelot/Tabula sans le cache par page")
+    args = parser.parse_args()
+    table_cache.ENABLED = not args.no_table_cache
+    selected = [m.strip() for m in args.methods.split(',') if m.strip()]
+    unknown = [m for m in selected if m not in ENGINES and m != 'hybrid']
+    if unknown:
+        parser.error(f"Moteurs inconnus: {', '.join(unknown)}")
+    engines = [m for m in selected if m in ENGINES]
+    with_hybrid = 'hybrid' in selected
+    
     print("=" * 80)
     print("BENCHMARK MOTEURS EXTRACTION TABLEAUX PDF")
     print("=" * 80)
@@ -380,36 +321,28 @@ def main():
         return
     
     results = []
+    recorder = ResultRecorder()
     
-    print("[>] Test CAMELOT (specialise tableaux)...")
-    r = test_camelot()
-    e = evaluate("Camelot", r, reference)
-    print(f"    => {e['correct']}/{e['total']} ({e['accuracy']}%)")
-    results.append(e)
-    
-    print("[>] Test TABULA (Java-based)...")
-    r = test_tabula()
-    e = evaluate("Tabula", r, reference)
-    print(f"    => {e['correct']}/{e['total']} ({e['accuracy']}%)")
-    results.append(e)
+    engine_results = {}
+    for name in engines:
+        title, label, func = ENGINES[name]
+        print(f"[>] Test {title}...")
+        # Seul PyMuPDF connait la page et la bbox de chaque tag
+        locations = {}
+        r, ms = timed(func, locations=locations) if name == 'pymupdf' else timed(func)
+        engine_results[name] = r
+        e = evaluate(label, r, reference)
+        recorder.add(PDF_PATH, label, r, reference, ms, locations)
+        print(f"    => {e['correct']}/{e['total']} ({e['accuracy']}%)")
+        results.append(e)
     
-    print("[>] Test PDFPLUMBER Tables...")
-    r = test_pdfplumber_tables()
-    e = evaluate("pdfplumber", r, reference)
-    print(f"    => {e['correct']}/{e['total']} ({e['accuracy']}%)")
-    results.append(e)
-    
-    print("[>] Test PYMUPDF Structure...")
-    r = test_pymupdf_structure()
-    e = evaluate("PyMuPDF", r, reference)
-    print(f"    => {e['correct']}/{e['total']} ({e['accuracy']}%)")
-    results.append(e)
-    
-    print("[>] Test HYBRIDE (vote)...")
-    r = test_hybrid()
-    e = evaluate("Hybride", r, reference)
-    print(f"    => {e['correct']}/{e['total']} ({e['accuracy']}%)")
-    results.append(e)
+    if with_hybrid:
+        print("[>] Test HYBRIDE (vote)...")
+        r, ms = timed(test_hybrid, engines=engines or None, engine_results=engine_results)
+        e = evaluate("Hybride", r, reference)
+        recorder.add(PDF_PATH, "Hybride", r, reference, ms)
+        print(f"    => {e['correct']}/{e['total']} ({e['accuracy']}%)")
+        results.append(e)
     
     print()
     print("=" * 80)
@@ -440,6 +373,10 @@ def main():
         for tag, exp, got in best['wrong_list'][:5]:
             print(f"      {tag}: attendu={exp}, obtenu={got}")
     
+    results_path = recorder.close()
+    if results_path:
+        print(f"\n[+] Resultats detailles: {results_path}")
+    
     print()
     print("=" * 80)
 
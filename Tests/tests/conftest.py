@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+=============================================================================
+FIXTURES - Module de test genere (PDF liste de pieces + CSV de nesting)
+=============================================================================
+Les PDF du Vault ne sont pas dans le depot: chaque test genere un petit
+module au format des exports (liste de pieces ITEM | TAG | QTY | DESCRIPTION,
+cadre, cartouche, cotes parasites) et ses CSV Punch / Laser.
+
+    python -m pytest          (depuis Tests/)
+=============================================================================
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+TESTS_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if TESTS_ROOT not in sys.path:
+    sys.path.insert(0, TESTS_ROOT)
+
+fitz = pytest.importorskip('fitz')
+
+ROWS_PER_PAGE = 12
+
+
+def build_parts_pdf(path: str, pages: int = 6, seed: int = 1, producer: str = '', ruled: bool = False) -> dict:
+    """PDF de liste de pieces; retourne la reference {tag: qty}
+
+    ruled=True trace les traits des cellules de la liste (export Inventor).
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+    reference = {}
+    k = 0
+    for p in range(pages):
+        page = doc.new_page(width=1224, height=792)
+        page.draw_rect(fitz.Rect(20, 20, 1204, 772))
+        page.draw_rect(fitz.Rect(900, 650, 1204, 772))
+        page.insert_text((910, 680), f"DWG 10381-13-M02 SHEET {p + 1}", fontsize=8)
+        page.insert_text((910, 700), "SCALE 1:10  REV 3", fontsize=8)
+        for _ in range(30):
+            page.insert_text((rng.uniform(60, 800), rng.uniform(300, 740)), str(rng.randint(1, 999)), fontsize=7)
+        x0, y0 = 40, 40
+        cols = [x0, x0 + 40, x0 + 160, x0 + 210]
+        for col, title in zip(cols, ("ITEM", "TAG", "QTY", "DESCRIPTION")):
+            page.insert_text((col + 3, y0 + 12), title, fontsize=8)
+        for r in range(ROWS_PER_PAGE):
+            k += 1
+            tag = f"WPA{1300 + k // 100}-{k % 100 + 100:04d}"
+            qty = rng.randint(1, 24)
+            reference[tag] = qty
+            y = y0 + 16 + r * 14 + 11
+            page.insert_text((cols[0] + 3, y), str(r + 1), fontsize=8)
+            page.insert_text((cols[1] + 3, y), tag, fontsize=8)
+            page.insert_text((cols[2] + 3, y), str(qty), fontsize=8)
+            page.insert_text((cols[3] + 3, y), "PANEL SHEET 16GA", fontsize=8)
+        if ruled:
+            right, bottom = cols[3] + 200, y0 + 16 + ROWS_PER_PAGE * 14
+            for y in [y0] + [y0 + 16 + r * 14 for r in range(ROWS_PER_PAGE + 1)]:
+                page.draw_line((x0, y), (right, y), width=0.5)
+            for x in cols + [right]:
+                page.draw_line((x, y0), (x, bottom), width=0.5)
+    if producer:
+        doc.set_metadata({'creator': producer, 'producer': producer})
+    doc.save(path)
+    doc.close()
+    return reference
+
+
+def write_nesting(module_dir: str, reference: dict) -> str:
+    """CSV Punch (virgules) / Laser (points-virgules) du module; retourne le dossier nesting"""
+    nesting = os.path.join(module_dir, '5_Exportation', 'Sheet_Metal_Nesting')
+    items = list(reference.items())
+    split = len(items) * 2 // 3
+    for sub, rows, sep, material in (('Punch', items[:split], ',', 'GALV 16GA,1.52'),
+                                     ('Laser', items[split:], ';', 'SS 14GA;1.9')):
+        os.makedirs(os.path.join(nesting, sub), exist_ok=True)
+        with open(os.path.join(nesting, sub, '10381-13-M02.csv'), 'w', encoding='utf-8-sig') as f:
+            for tag, qty in rows:
+                f.write(f"{qty}{sep}{tag}.dxf{sep}{material.replace(',', sep)}\n")
+    return nesting
+
+
+@pytest.fixture(autouse=True)
+def csv_cache(tmp_path, monkeypatch):
+    """Cache disque des CSV dans le dossier du test (pas dans Tests/.cache)"""
+    from pdf_extraction import csv_reference
+    cache = tmp_path / 'cache'
+    monkeypatch.setattr(csv_reference, 'CACHE_DIR', str(cache))
+    monkeypatch.setattr(csv_reference, 'CACHE_FILE', str(cache / 'csv_reference.json'))
+    return cache
+
+
+@pytest.fixture
+def module_dir(tmp_path):
+    """Module genere: {'pdf', 'nesting', 'reference'}"""
+    module = tmp_path / 'M02'
+    pdf_dir = module / '6-Shop Drawing PDF'
+    pdf_dir.mkdir(parents=True)
+    pdf = str(pdf_dir / '02-Machines.pdf')
+    reference = build_parts_pdf(pdf)
+    return {'pdf': pdf, 'nesting': write_nesting(str(module), reference), 'reference': reference}
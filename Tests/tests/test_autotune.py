@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""Autotune: un reglage qui invente des tags n'est pas retenu, corpus en memoire partagee"""
+
+from pdf_extraction.autotune import choose, pareto_front
+
+
+def _trial(name, correct, extra, ms, total=100):
+    return {'params': name, 'correct': correct, 'total': total, 'extra': extra, 'ms': ms,
+            'accuracy': round(correct / total * 100, 2), 'score': round(correct / (total + extra) * 100, 2)}
+
+
+def test_extras_outweigh_one_more_correct_tag():
+    default = _trial('default', 95, 0, 10)
+    wide = _trial('wide', 96, 3, 10)
+    assert choose([default, wide])['params'] == 'default'
+    assert [r['params'] for r in pareto_front([default, wide])] == ['default']
+
+
+def test_fewer_extras_win_at_equal_accuracy():
+    default = _trial('default', 95, 4, 10)
+    tight = _trial('tight', 95, 0, 10)
+    assert choose([default, tight])['params'] == 'tight'
+
+
+def test_sweep_reads_the_corpus_from_shared_memory(tmp_path):
+    from conftest import build_parts_pdf, write_nesting
+    from pdf_extraction.autotune import load_corpus, sweep
+    from pdf_extraction.csv_reference import load_tag_qty
+
+    pairs = []
+    for seed in (1, 2):
+        pdf = str(tmp_path / f'{seed}.pdf')
+        reference = build_parts_pdf(pdf, pages=2, seed=seed)
+        pairs.append((pdf, write_nesting(str(tmp_path / f'm{seed}'), reference)))
+    corpus = load_corpus(pairs)
+    results = sweep('proximity', corpus, samples=3, workers=2)
+    total = sum(len(load_tag_qty(nesting)) for _, nesting in pairs)
+    assert len(results) == 4
+    assert results[0]['total'] == total and results[0]['correct'] == total
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""Reference CSV: regle des doublons, cache disque"""
+
+import json
+import os
+
+from pdf_extraction.csv_reference import load_tag_qty, parse_csv
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8-sig') as f:
+        f.write(text)
+
+
+def test_first_row_wins_within_a_file_and_files_are_summed(tmp_path, csv_cache):
+    nesting = tmp_path / 'Sheet_Metal_Nesting'
+    _write(str(nesting / 'Punch' / 'm.csv'), "3,WPA1300-0101.dxf,GALV,1.52\n7,WPA1300-0101.dxf,GALV,1.52\n")
+    _write(str(nesting / 'Laser' / 'm.csv'), "2;WPA1300-0101.dxf;SS;1.9\n")
+    assert parse_csv(str(nesting / 'Punch' / 'm.csv')) == {'WPA1300-0101': 3}
+    assert load_tag_qty(str(nesting)) == {'WPA1300-0101': 5}
+    assert os.listdir(str(csv_cache)) == ['csv_reference.json']
+
+
+def test_reference_matches_generated_module(module_dir):
+    assert load_tag_qty(module_dir['nesting']) == module_dir['reference']
+
+
+def test_suffixed_dxf_names_are_not_dropped(tmp_path, csv_cache):
+    path = str(tmp_path / 'Sheet_Metal_Nesting' / 'Punch' / 'm.csv')
+    _write(path, "2,WPA1300-0105_1.dxf,GALV,1.52\n1,WPA1300-0106-A.dxf,GALV,1.52\n")
+    assert parse_csv(path) == {'WPA1300-0105': 2, 'WPA1300-0106': 1}
+
+
+def test_cache_file_keeps_entries_written_by_another_process(tmp_path, csv_cache, monkeypatch):
+    from pdf_extraction import csv_reference
+    monkeypatch.setattr(csv_reference, '_memory_cache', {})
+    monkeypatch.setattr(csv_reference, '_disk_cache_loaded', False)
+    first, second = str(tmp_path / 'a.csv'), str(tmp_path / 'b.csv')
+    _write(first, "3,WPA1300-0101.dxf,GALV,1.52\n")
+    _write(second, "2,WPA1300-0102.dxf,GALV,1.52\n")
+    assert csv_reference.load_csv_cached(first) == {'WPA1300-0101': 3}
+
+    # Un autre processus ajoute son entree au fichier apres notre lecture
+    with open(csv_reference.CACHE_FILE, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    data['/other/process.csv'] = {'mtime_ns': 1, 'size': 1, 'digest': 'x', 'tags': {'WPA1300-0199': 1}}
+    with open(csv_reference.CACHE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+    assert csv_reference.load_csv_cached(second) == {'WPA1300-0102': 2}
+    with open(csv_reference.CACHE_FILE, 'r', encoding='utf-8') as f:
+        saved = json.load(f)
+    assert set(saved) == {os.path.abspath(first), os.path.abspath(second), '/other/process.csv'}
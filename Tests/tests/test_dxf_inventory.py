@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Inventaire DXF: qty de reference fusionnee, unite de la colonne Thickness"""
+
+import os
+
+import pytest
+
+from pdf_extraction.csv_reference import parse_csv_rows
+from pdf_extraction.dxf_inventory import dxf_inventory, dxf_report, read_dxf
+
+
+def _dxf(path, tag, thickness=None, prop=None):
+    lines = ['0', 'SECTION', '2', 'HEADER', '9', '$INSUNITS', '70', '4']
+    if prop is not None:
+        lines += ['9', '$CUSTOMPROPERTYTAG', '1', 'PartNumber', '9', '$CUSTOMPROPERTY', '1', tag,
+                  '9', '$CUSTOMPROPERTYTAG', '1', 'Thickness', '9', '$CUSTOMPROPERTY', '1', prop]
+    lines += ['0', 'ENDSEC', '0', 'SECTION', '2', 'ENTITIES', '0', 'TEXT', '1', tag]
+    if thickness is not None:
+        lines += ['0', 'TEXT', '1', f'THK {thickness}']
+    lines += ['0', 'ENDSEC', '0', 'EOF']
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8-sig') as f:
+        f.write(text)
+
+
+@pytest.fixture
+def split_module(tmp_path):
+    """Un tag decoupe en Punch (3) et Laser (2): reference 5"""
+    nesting = tmp_path / '5_Exportation' / 'Sheet_Metal_Nesting'
+    _write(str(nesting / 'Punch' / 'm.csv'), "3,WPA1300-0101.dxf,GALV 16GA,1.52\n1,WPA1300-0102.dxf,GALV 16GA,1.52\n")
+    _write(str(nesting / 'Laser' / 'm.csv'), "2;WPA1300-0101.dxf;SS 14GA;1.52\n")
+    _dxf(str(nesting / 'Punch' / 'WPA1300-0101.dxf'), 'WPA1300-0101', 1.52)
+    _dxf(str(nesting / 'Punch' / 'WPA1300-0102.dxf'), 'WPA1300-0102', 1.52)
+    _dxf(str(nesting / 'Laser' / 'WPA1300-0101.dxf'), 'WPA1300-0101', 1.52)
+    return str(nesting)
+
+
+def test_pdf_qty_is_compared_to_the_merged_reference(split_module):
+    report = dxf_report(dxf_inventory(split_module), {'WPA1300-0101': 5, 'WPA1300-0102': 1})
+    assert report['problems'] == []
+    assert {r['ref_qty'] for r in report['rows'] if r['tag'] == 'WPA1300-0101'} == {5}
+
+
+def test_quantity_mismatch_is_reported_once_per_tag(split_module):
+    report = dxf_report(dxf_inventory(split_module), {'WPA1300-0101': 3, 'WPA1300-0102': 1})
+    assert [r['tag'] for r in report['problems']] == ['WPA1300-0101']
+
+
+@pytest.mark.parametrize('cells, unit, expected', [
+    (['1.52', '1.9'], 'auto', [1.52, 1.9]),
+    (['0.0598', '0.0747'], 'auto', [1.5189, 1.8974]),
+    (['0.0598 in', '1.52 mm'], 'auto', [1.5189, 1.52]),
+    (['0.0598', '0.0747'], 'mm', [0.0598, 0.0747]),
+    (['1.52', '1.9'], 'in', [38.608, 48.26]),
+])
+def test_csv_thickness_unit(tmp_path, cells, unit, expected):
+    path = str(tmp_path / 'm.csv')
+    _write(path, ''.join(f"1,WPA1300-010{i}.dxf,GALV,{c}\n" for i, c in enumerate(cells)))
+    assert [r['thickness'] for r in parse_csv_rows(path, unit)] == expected
+
+
+def test_unparsable_thickness_property_does_not_stop_the_scan(tmp_path):
+    """Propriete Thickness illisible: l'epaisseur est lue plus loin (texte THK)"""
+    path = str(tmp_path / 'p.dxf')
+    _dxf(path, 'WPA1300-0101', 1.52, prop='voir plan')
+    info = read_dxf(path)
+    assert (info['thickness'], info['thickness_source']) == (1.52, 'text')
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""Exports Inventor: la lecture par gabarit donne le resultat de la proximite"""
+
+from conftest import build_parts_pdf
+from pdf_extraction.inventor import classify, extract_auto, extract_inventor
+from pdf_extraction.proximity import extract_proximity
+
+
+def test_inventor_export_matches_proximity(tmp_path):
+    pdf = str(tmp_path / 'inventor.pdf')
+    reference = build_parts_pdf(pdf, producer='Autodesk Inventor 2024')
+    info = classify(pdf)
+    assert info['kind'] == 'inventor'
+    stats = {}
+    assert extract_inventor(pdf, info['layout'], stats) == extract_proximity(pdf) == reference
+    assert stats == {'pages': 6, 'fallback_pages': 0}
+
+
+def test_other_producer_goes_through_proximity(module_dir):
+    info = {}
+    assert extract_auto(module_dir['pdf'], info) == module_dir['reference']
+    assert info['kind'] == 'generic'
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""File de jobs: reprise sur les points de reprise, preemption, lecture anticipee des PDF"""
+
+import shutil
+
+import pytest
+
+from pdf_extraction import jobs
+from pdf_extraction.jobs import URGENT_PRIORITY, JobQueue, process_job
+
+PAGE_PAIRER = jobs._page_pairer
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, 'CHECKPOINT_PAGES', 2)
+    monkeypatch.setattr(jobs, 'PREEMPT_GRACE', 0.0)
+    with JobQueue(str(tmp_path / 'jobs.sqlite')) as q:
+        yield q
+
+
+class Crash(Exception):
+    """Arret brutal simule du worker"""
+
+
+def _counting_pairer(monkeypatch, fail_at=None):
+    """Remplace le couplage par page: compte les pages, s'interrompt a `fail_at`"""
+    seen = []
+
+    def pairer_for(pdf_path, method):
+        pair = PAGE_PAIRER(pdf_path, method)
+
+        def counted(words):
+            if fail_at is not None and len(seen) + 1 == fail_at:
+                raise Crash()
+            seen.append(1)
+            return pair(words)
+        return counted
+
+    monkeypatch.setattr(jobs, '_page_pairer', pairer_for)
+    return seen
+
+
+def test_interrupted_job_resumes_from_its_checkpoints(queue, module_dir, monkeypatch):
+    job_id = queue.add(module_dir['pdf'], module_dir['nesting'])
+    seen = _counting_pairer(monkeypatch, fail_at=4)
+    with pytest.raises(Crash):
+        jobs._extract_paged(queue, queue.claim('w1'))
+    queue.release(job_id)
+    assert queue.job(job_id)['pages_done'] == 2
+
+    seen = _counting_pairer(monkeypatch)
+    assert jobs._extract_paged(queue, queue.claim('w2')) == module_dir['reference']
+    assert len(seen) == 4
+
+
+def test_urgent_job_preempts_and_runs_first(queue, module_dir, tmp_path):
+    low = queue.add(module_dir['pdf'], module_dir['nesting'])
+    job = queue.claim('w1')
+    urgent = queue.add(str(tmp_path / 'absent.pdf'), module_dir['nesting'], priority=URGENT_PRIORITY)
+    # Cede au premier point de reprise, pages deja faites gardees
+    assert process_job(queue, job) == 'queued'
+    assert (queue.job(low)['state'], queue.job(low)['pages_done']) == ('queued', 2)
+
+    first = queue.claim('w1')
+    assert first['id'] == urgent
+    assert process_job(queue, first) == 'failed'
+    assert jobs._extract_paged(queue, queue.claim('w1')) == module_dir['reference']
+
+
+def test_worker_loop_reads_the_next_pdfs_ahead(queue, module_dir, monkeypatch):
+    from pdf_extraction import loader
+    loaded = []
+    load = loader.load_pdf_buffer
+    monkeypatch.setattr(loader, 'load_pdf_buffer', lambda path, *a: loaded.append(path) or load(path, *a))
+    pdfs = [module_dir['pdf']]
+    for i in (2, 3):
+        pdfs.append(module_dir['pdf'].replace('.pdf', f'-{i}.pdf'))
+        shutil.copy(module_dir['pdf'], pdfs[-1])
+    ids = [queue.add(pdf, module_dir['nesting']) for pdf in pdfs]
+    assert jobs.worker_loop(queue.path) == 3
+    assert [queue.job(i)['state'] for i in ids] == ['evaluated'] * 3
+    # Chaque PDF est lu une seule fois, par le thread de lecture anticipee
+    assert loaded == pdfs
+
+
+def test_unknown_method_is_rejected_when_added(queue, module_dir):
+    with pytest.raises(ValueError, match='Methode inconnue: proximty'):
+        queue.add(module_dir['pdf'], module_dir['nesting'], method='proximty')
+    assert queue.counts()['queued'] == 0
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""Lattice vectoriel: grilles reconstruites a partir des traits de la page"""
+
+import fitz
+
+from conftest import ROWS_PER_PAGE, build_parts_pdf
+from pdf_extraction.lattice import grid_table, iter_lattice_tables, ruling_grids, ruling_segments
+
+
+def test_ruled_parts_list_becomes_one_table_per_page(tmp_path):
+    pdf = str(tmp_path / 'ruled.pdf')
+    reference = build_parts_pdf(pdf, pages=2, ruled=True)
+    rows = []
+    for page_num, tables in iter_lattice_tables(pdf):
+        # Le cadre et le cartouche forment aussi une grille: on garde la liste de pieces
+        parts = [t for t in tables if t[0] == ['ITEM', 'TAG', 'QTY', 'DESCRIPTION']]
+        assert len(parts) == 1
+        assert len(parts[0]) == ROWS_PER_PAGE + 1
+        rows.extend(parts[0][1:])
+    assert [r[0] for r in rows[:ROWS_PER_PAGE]] == [str(i + 1) for i in range(ROWS_PER_PAGE)]
+    assert {tag: int(qty) for _, tag, qty, _ in rows} == reference
+    assert all(r[3] == 'PANEL SHEET 16GA' for r in rows)
+
+
+def test_unruled_page_has_only_the_frame_grid(tmp_path):
+    pdf = str(tmp_path / 'plain.pdf')
+    build_parts_pdf(pdf, pages=1)
+    with fitz.open(pdf) as doc:
+        grids = ruling_grids(*ruling_segments(doc[0]))
+    assert [([round(x) for x in xs], [round(y) for y in ys]) for xs, ys in grids] == [([20, 900, 1204], [20, 650, 772])]
+
+
+def test_word_goes_to_the_cell_holding_its_centre():
+    xs, ys = [0, 50, 100], [0, 20, 40]
+    words = [(5, 2, 30, 12, 'A'), (45, 22, 70, 32, 'B'), (55, 2, 80, 12, 'C'), (55, 12, 80, 19, 'D'),
+             (120, 5, 130, 10, 'hors')]
+    assert grid_table(xs, ys, words) == [['A', 'C D'], [None, 'B']]
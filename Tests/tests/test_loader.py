@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""Lecture anticipee: jamais plus de max_in_flight buffers lus et non consommes"""
+
+import threading
+import time
+
+from pdf_extraction.loader import PdfPrefetcher
+
+
+def test_in_flight_buffers_stay_bounded(tmp_path):
+    paths = []
+    for i in range(8):
+        path = tmp_path / f'{i}.pdf'
+        path.write_bytes(b'%PDF-1.4 ' + bytes([i]) * 64)
+        paths.append(str(path))
+    lock = threading.Lock()
+    state = {'read': 0, 'consumed': 0, 'peak': 0}
+
+    def reader(path):
+        with lock:
+            state['read'] += 1
+            state['peak'] = max(state['peak'], state['read'] - state['consumed'])
+        return open(path, 'rb').read()
+
+    seen = []
+    for path, buf, err in PdfPrefetcher(paths, max_in_flight=2, local=False, reader=reader):
+        with lock:
+            state['consumed'] += 1
+        assert err is None
+        with buf:
+            seen.append(path)
+        time.sleep(0.02)   # le thread I/O a le temps de remplir ses places
+    assert seen == paths
+    assert state['peak'] <= 2
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""Masques de feuille: aucun couple de la proximite n'est perdu"""
+
+from pdf_extraction.masks import LEARN_PAGES, SheetMask, iter_masked_words
+from pdf_extraction.proximity import extract_proximity, pair_page_words
+
+
+def _word(x, y, text):
+    return (x, y, x + 5 * len(text), y + 8, text, 0, 0, 0)
+
+
+def _list_page(extra=()):
+    words = [_word(45, 60 + 14 * i, f"WPA1300-01{i:02d}") for i in range(3)]
+    words += [_word(160, 60 + 14 * i, str(i + 2)) for i in range(3)]
+    return words + list(extra)
+
+
+def test_static_word_on_a_tag_row_is_kept():
+    """Un '4' fixe hors des lignes de tags a l'apprentissage reste la qty d'un tag plus tard"""
+    mask = SheetMask()
+    for _ in range(LEARN_PAGES):
+        mask.learn(_list_page([_word(200, 300, '4')]))
+    assert mask.ready and ('4', 200, 300) in mask.static
+
+    page = _list_page([_word(120, 300, 'WPA1300-0199'), _word(200, 300, '4')])
+    full = [(t, q) for t, q, _ in pair_page_words(page)]
+    masked = [(t, q) for t, q, _ in pair_page_words(mask.apply(page))]
+    assert ('WPA1300-0199', 4) in full
+    assert masked == full
+
+
+def test_learning_continues_until_a_page_has_tags():
+    """Premieres pages sans tag: le cartouche est appris sur toutes les pages vues"""
+    title_block = [_word(910, 680, 'SHEET'), _word(960, 680, '7')]
+    mask = SheetMask()
+    for _ in range(LEARN_PAGES):
+        mask.learn(list(title_block))
+    assert not mask.ready
+    mask.learn(_list_page(title_block))
+    assert mask.ready
+    assert mask.static == {('SHEET', 910, 680), ('7', 960, 680)}
+
+
+def test_masked_extraction_matches_full_page(module_dir):
+    stats = {}
+    list(iter_masked_words(module_dir['pdf'], {}, stats))
+    assert stats['words_after'] < stats['words_before']
+    assert extract_proximity(module_dir['pdf'], masked=True) == extract_proximity(module_dir['pdf'])
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""Scoring: la version matricielle donne les memes paires que la reference"""
+
+import random
+
+import pytest
+
+from pdf_extraction.neighbors import score_page_matrix, score_page_words
+
+
+def _page(seed):
+    """Lignes de tags et de nombres, avec des X egaux et des mots en double"""
+    rng = random.Random(seed)
+    words = []
+    for r in range(8):
+        y = 100 + 14 * r + rng.choice((0, 0, 1))
+        xs = [rng.choice((40, 80, 80, 120, 160)) for _ in range(rng.randint(2, 6))]
+        for k, x in enumerate(xs):
+            text = f"WPA1300-01{r}{k}" if rng.random() < 0.3 else str(rng.randint(1, 30))
+            words.append((x, y, x + 30, y + 8, text, 0, r, k))
+        if rng.random() < 0.3:
+            # Texte gras simule: meme mot ecrit deux fois (deux tuples distincts)
+            words.append(words[-1][:4] + words[-1][4:])
+    rng.shuffle(words)
+    return words
+
+
+@pytest.mark.parametrize('seed', range(60))
+def test_matrix_matches_reference_with_equal_x(seed):
+    words = _page(seed)
+    expected = [(t, q, id(w)) for t, q, w in score_page_words(words)]
+    assert [(t, q, id(w)) for t, q, w in score_page_matrix(words)] == expected
+
+
+def test_benchmark_reports_identical_pairs_on_dense_pages():
+    from pdf_extraction.neighbors import benchmark
+    from pdf_extraction.shared_words import densify
+    results = benchmark(densify([(1, _page(3)), (2, _page(4))], 5), repeat=1)
+    assert [r['method'] for r in results] == ['tag par tag', 'matriciel']
+    assert all(r['same'] for r in results) and results[0]['pairs'] > 0
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""pairing_digest: un reglage change invalide les resultats de couplage en cache"""
+
+import pytest
+
+from pdf_extraction import params
+from pdf_extraction.params import apply_params, pairing_digest
+
+
+@pytest.fixture
+def retuned():
+    """Fenetre de couplage modifiee le temps du test"""
+    original = params.param('pairing_window')
+    apply_params({'pairing_window': original + 1})
+    yield
+    apply_params({'pairing_window': original})
+
+
+def test_digest_follows_current_values():
+    before = pairing_digest()
+    original = params.param('pairing_window')
+    apply_params({'pairing_window': original + 1})
+    try:
+        assert pairing_digest() != before
+    finally:
+        apply_params({'pairing_window': original})
+    assert pairing_digest() == before
+
+
+def test_tag_index_is_stale_after_retuning(module_dir, tmp_path, request):
+    from pdf_extraction.tag_index import TagIndex
+    with TagIndex(str(tmp_path / 'tag_index.sqlite')) as index:
+        assert index.index_pdf(module_dir['pdf'])
+        assert index.is_current(module_dir['pdf'])
+        request.getfixturevalue('retuned')
+        assert not index.is_current(module_dir['pdf'])
+
+
+def test_job_checkpoints_are_dropped_after_retuning(tmp_path):
+    from pdf_extraction.jobs import JobQueue
+    with JobQueue(str(tmp_path / 'jobs.sqlite')) as queue:
+        job_id = queue.add('a.pdf', 'ref')
+        assert queue.start_pages(job_id, 10, 1, 2, pairing_digest()) == {}
+        queue.save_pages(job_id, [(1, [('WPA1300-0101', 4)])])
+        assert queue.start_pages(job_id, 10, 1, 2, pairing_digest()) == {1: [('WPA1300-0101', 4)]}
+        assert queue.start_pages(job_id, 10, 1, 2, 'autre') == {}
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""Flux NDJSON: ordre des evenements, une annonce par tag, lignes ecrites sans attendre la suite"""
+
+import io
+import json
+import time
+
+from pdf_extraction.evaluation import compare
+from pdf_extraction.progress import NdjsonWriter, stream_verification
+
+
+def test_events_come_in_page_order(module_dir):
+    reference = dict(module_dir['reference'])
+    wrong = sorted(reference)[5]
+    reference[wrong] += 1
+    reference['WPA9999-0001'] = 1
+    events = []
+    result = stream_verification(module_dir['pdf'], reference, lambda event, urgent: events.append((event, urgent)))
+
+    kinds = [e['event'] for e, _ in events]
+    assert kinds[0] == 'document' and kinds[-1] == 'summary'
+    assert events[0][0]['pages'] == 6 and events[0][1] and events[-1][1]
+    pages = [e for e, _ in events if e['event'] == 'page']
+    assert [p['page'] for p in pages] == [1, 2, 3, 4, 5, 6]
+    assert [urgent for e, urgent in events if e['event'] == 'page'] == [True] + [False] * 5
+
+    # Les tags d'une page precedent son evenement 'page' et n'apparaissent qu'une fois
+    page_of, current = {}, []
+    for event, _ in events[1:-1]:
+        if event['event'] == 'tag':
+            current.append(event['tag'])
+            page_of[event['tag']] = event['page']
+        else:
+            assert event['tags'] == current and all(page_of[t] == event['page'] for t in current)
+            current = []
+    statuses = {e['tag']: e['status'] for e, _ in events if e['event'] == 'tag'}
+    assert len(statuses) == len(module_dir['reference'])
+    assert statuses[wrong] == 'mismatch' and list(statuses.values()).count('confirmed') == len(statuses) - 1
+    assert pages[-1]['confirmed'] == len(statuses) - 1 and pages[-1]['mismatch'] == 1
+
+    summary = events[-1][0]
+    expected = compare(module_dir['reference'], reference)
+    assert {k: summary[k] for k in expected} == expected
+    assert result['extracted'] == module_dir['reference']
+
+
+def test_writer_output_is_one_json_object_per_line(module_dir):
+    out = io.StringIO()
+    writer = NdjsonWriter(out, interval=60)
+    stream_verification(module_dir['pdf'], module_dir['reference'], writer.emit)
+    writer.close()
+    lines = out.getvalue().splitlines()
+    assert len(lines) == writer.events
+    assert [json.loads(line)['event'] for line in lines][::len(lines) - 1] == ['document', 'summary']
+
+
+def test_pending_lines_are_written_while_the_next_event_is_late():
+    out = io.StringIO()
+    writer = NdjsonWriter(out, interval=0.05)
+    writer.emit({'event': 'document'}, True)
+    writer.emit({'event': 'tag', 'tag': 'WPA1300-0101'})
+    assert out.getvalue().count('\n') == 1
+    # Aucun evenement ne suit (page lente): le thread d'ecriture envoie la ligne
+    time.sleep(0.3)
+    assert out.getvalue().count('\n') == 2
+    writer.emit({'event': 'summary'})
+    writer.close()
+    assert [json.loads(line)['event'] for line in out.getvalue().splitlines()] == ['document', 'tag', 'summary']
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""Store de resultats: un meme nom de PDF dans deux modules reste distinct"""
+
+import os
+
+from pdf_extraction.results_store import ResultRecorder, pdf_label
+
+
+def test_same_pdf_name_in_two_modules_is_kept_apart(tmp_path):
+    recorder = ResultRecorder(str(tmp_path), history=False)
+    for module in ('M02', 'M03'):
+        pdf = os.path.join(str(tmp_path), '10381', 'REF13', module, '6-Shop Drawing PDF', '02-Machines.pdf')
+        recorder.add(pdf, 'proximity', {'WPA1300-0101': 4}, {'WPA1300-0101': 4})
+    cols = recorder._columns
+    assert len(set(cols['pdf'])) == 2
+    assert cols['module'] == ['M02', 'M03']
+    rows = [dict(zip(cols, values)) for values in zip(*cols.values())]
+    assert [pdf_label(r) for r in rows] == ['10381/REF13/M02/02-Machines.pdf', '10381/REF13/M03/02-Machines.pdf']
+
+
+def test_label_without_vault_path_is_the_file_name():
+    assert pdf_label({'pdf': '/tmp/x/02-Machines.pdf', 'project': None, 'ref': None, 'module': None}) == '02-Machines.pdf'
+
+
+def test_summary_reads_the_parquet_store_and_filters_by_module(tmp_path):
+    from pdf_extraction.results_store import filter_runs, query, summarize
+    with ResultRecorder(str(tmp_path), run_id='run-1', history=False) as recorder:
+        for module in ('M02', 'M03'):
+            pdf = os.path.join(str(tmp_path), '10381', 'REF13', module, '6-Shop Drawing PDF', '02-Machines.pdf')
+            recorder.add(pdf, 'proximity', {'WPA1300-0101': 4, 'WPA1300-0102': 1},
+                         {'WPA1300-0101': 4, 'WPA1300-0102': 2, 'WPA1300-0103': 1})
+    table = query(results_dir=str(tmp_path))
+    assert table.num_rows == 6
+    rows = summarize(filter_runs(table, pdf='02-Machines', module='m03')).to_pylist()
+    assert len(rows) == 1
+    assert rows[0]['module'] == 'M03'
+    assert (rows[0]['correct_sum'], rows[0]['wrong_sum'], rows[0]['missing_sum']) == (1, 1, 1)
+    assert filter_runs(table, module='10381').num_rows == 6
+    assert filter_runs(table, module='M09').num_rows == 0
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""Diff de revision: tags ajoutes / requantifies, pages deja vues lues dans le cache"""
+
+import fitz
+
+from conftest import build_parts_pdf
+from pdf_extraction.page_cache import PageCache
+from pdf_extraction.revision_diff import diff_revisions, index_revision
+
+
+def _requantify(pdf: str, out: str, page_index: int, tag: str, qty: int) -> None:
+    """Copie du PDF ou la quantite de `tag` est remplacee sur une page"""
+    doc = fitz.open(pdf)
+    page = doc[page_index]
+    words = page.get_text('words')
+    tag_word = next(w for w in words if w[4] == tag)
+    qty_word = min((w for w in words if w[4].isdigit() and abs(w[1] - tag_word[1]) < 2 and w[0] > tag_word[0]),
+                   key=lambda w: w[0])
+    page.add_redact_annot(fitz.Rect(qty_word[:4]))
+    page.apply_redactions()
+    page.insert_text((qty_word[0], qty_word[3] - 2), str(qty), fontsize=8)
+    doc.save(out)
+    doc.close()
+
+
+def test_added_and_requantified_tags_with_cached_pages(tmp_path):
+    old, grown, new = (str(tmp_path / name) for name in ('old.pdf', 'grown.pdf', 'new.pdf'))
+    reference = build_parts_pdf(old, pages=4)
+    # Meme tirage: les 4 premieres pages sont identiques, la 5e est nouvelle
+    grown_reference = build_parts_pdf(grown, pages=5)
+    tag = sorted(reference)[14]
+    _requantify(grown, new, 1, tag, reference[tag] + 30)
+
+    cache = PageCache(str(tmp_path / 'pages.sqlite'))
+    first = diff_revisions(index_revision(old, cache), index_revision(new, cache))
+    assert [a['tag'] for a in first['added']] == sorted(grown_reference.keys() - reference.keys())
+    assert all(a['pages'] == [5] for a in first['added'])
+    assert first['removed'] == []
+    assert first['requantified'] == [{'tag': tag, 'old_qty': reference[tag], 'new_qty': reference[tag] + 30,
+                                      'old_pages': [2], 'new_pages': [2]}]
+    assert first['changed_pages'] == [2, 5]
+    # Pages communes aux deux revisions: parsees une seule fois
+    assert (first['parsed_pages'], first['cached_pages']) == (6, 3)
+
+    again = diff_revisions(index_revision(new, cache), index_revision(old, cache))
+    assert (again['parsed_pages'], again['cached_pages']) == (0, 9)
+    assert [r['tag'] for r in again['removed']] == [a['tag'] for a in first['added']]
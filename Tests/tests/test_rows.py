@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""Lignes par balayage vertical: tolerance sur la hauteur mediane, mots pdfplumber"""
+
+from pdf_extraction.rows import plumber_box, row_lines, sweep_rows
+
+
+def _word(x, top, height, text):
+    return (x, top, x + 20, top + height, text, 0, 0, 0)
+
+
+def test_a_small_glyph_does_not_split_the_row():
+    words = [_word(40, 100, 8, 'WPA1300-0101'), _word(160, 103.2, 2, '.'), _word(200, 101, 8, '4'),
+             _word(260, 101.5, 8, 'PANEL')]
+    rows = sweep_rows(words)
+    assert len(rows) == 1
+    assert [w[4] for w in rows[0].words] == ['WPA1300-0101', '.', '4', 'PANEL']
+    assert rows[0].height == 8
+
+
+def test_close_rows_stay_apart():
+    words = [_word(40, 100, 8, 'A'), _word(40, 110, 8, 'B'), _word(80, 110.5, 8, '2')]
+    assert [[w[4] for w in ws] for ws in row_lines(words).values()] == [['A'], ['B', '2']]
+
+
+def test_pdfplumber_words():
+    words = [{'x0': 90, 'top': 50.4, 'bottom': 58.4, 'text': '3'},
+             {'x0': 10, 'top': 49.6, 'bottom': 57.6, 'text': 'WPA1300-0101'}]
+    lines = row_lines(words, plumber_box)
+    assert [[w['text'] for w in ws] for ws in lines.values()] == [['WPA1300-0101', '3']]
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""Service HTTP: flux NDJSON execute dans le pool, verifications inscrites a l'historique"""
+
+import json
+import os
+import subprocess
+import sys
+
+TESTS_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Le service tourne dans un processus a part: CACHE_DIR (historique) est lu a l'import
+SCRIPT = r'''
+import json, sys, threading, urllib.request
+from pdf_extraction.history import HistoryDB
+from pdf_extraction.service import VerificationService, serve
+
+pdf, csv = sys.argv[1:3]
+service = VerificationService(workers=1)
+server = serve(service, port=0)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+req = urllib.request.Request(f"http://127.0.0.1:{server.server_address[1]}/verify/stream",
+                             data=json.dumps({'pdf': pdf, 'csv': csv}).encode('utf-8'))
+with urllib.request.urlopen(req) as resp:
+    events = [json.loads(line) for line in resp]
+cached = service.verify(pdf, csv)['cached']
+server.shutdown()
+service.shutdown()
+with HistoryDB() as history:
+    runs = [dict(r) for r in history.runs()]
+print(json.dumps({'events': events, 'cached': cached, 'runs': runs}, default=str))
+'''
+
+
+def test_stream_is_recorded_in_history(module_dir, tmp_path):
+    env = dict(os.environ, XNRGY_PDF_CACHE=str(tmp_path / 'cache'), PYTHONPATH=TESTS_ROOT)
+    out = subprocess.run([sys.executable, '-c', SCRIPT, module_dir['pdf'], module_dir['nesting']],
+                         env=env, capture_output=True, text=True, timeout=120, check=True).stdout
+    data = json.loads(out.strip().splitlines()[-1])
+    summary = [e for e in data['events'] if e['event'] == 'summary']
+    assert len(summary) == 1 and summary[0]['correct'] == len(module_dir['reference'])
+    # Le verify servi par le cache est inscrit aussi, par le thread d'historique
+    assert data['cached']
+    assert len(data['runs']) == 2
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""Instantane .wsnap: la couche de mots relue est celle du PDF"""
+
+from pdf_extraction.proximity import extract_proximity
+from pdf_extraction.snapshot import iter_snapshot_words, snapshot_pdf
+from pdf_extraction.streaming import iter_fitz_words
+
+
+def test_snapshot_round_trip(module_dir, tmp_path):
+    pdf = module_dir['pdf']
+    path, header = snapshot_pdf(pdf, str(tmp_path / 'm.wsnap'))
+    original = list(iter_fitz_words(pdf))
+    assert header['page_count'] == len(original)
+    assert [(n, [tuple(w) for w in words]) for n, words in iter_snapshot_words(path)] == \
+        [(n, [tuple(w) for w in words]) for n, words in original]
+    assert extract_proximity(path) == extract_proximity(pdf) == module_dir['reference']
+
+
+def test_snapshot_of_selected_pages(module_dir, tmp_path):
+    path, header = snapshot_pdf(module_dir['pdf'], str(tmp_path / 'p.wsnap'), pages={2, 5})
+    assert [n for n, _ in iter_snapshot_words(path)] == [2, 5]
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""Index spatial: memes voisins qu'un parcours complet des mots de la page"""
+
+import math
+import random
+
+import fitz
+import pytest
+
+from conftest import build_parts_pdf
+from pdf_extraction.spatial import ROW_TOLERANCE, WordGrid
+
+
+@pytest.fixture(scope='module')
+def pages(tmp_path_factory):
+    pdf = str(tmp_path_factory.mktemp('spatial') / 'parts.pdf')
+    build_parts_pdf(pdf, pages=2)
+    with fitz.open(pdf) as doc:
+        return [page.get_text('words') for page in doc]
+
+
+def _distance(w, x, y):
+    return math.hypot(max(w[0] - x, 0, x - w[2]), max(w[1] - y, 0, y - w[3]))
+
+
+def test_in_rect_matches_a_full_scan(pages):
+    rng = random.Random(0)
+    for words in pages:
+        grid = WordGrid(words)
+        for _ in range(50):
+            x0, y0 = rng.uniform(0, 1200), rng.uniform(0, 780)
+            x1, y1 = x0 + rng.uniform(1, 300), y0 + rng.uniform(1, 120)
+            expected = [w for w in words if w[0] <= x1 and w[2] >= x0 and w[1] <= y1 and w[3] >= y0]
+            assert sorted(grid.in_rect(x0, y0, x1, y1)) == sorted(expected)
+        assert sorted(grid.in_rect(-math.inf, -math.inf, math.inf, math.inf)) == sorted(words)
+
+
+def test_nearest_matches_a_full_scan(pages):
+    rng = random.Random(1)
+    words = pages[0]
+    grid = WordGrid(words)
+    for _ in range(30):
+        x, y = rng.uniform(-100, 1300), rng.uniform(-100, 900)
+        found = grid.nearest(x, y, k=3)
+        expected = sorted(_distance(w, x, y) for w in words)[:3]
+        assert [_distance(w, x, y) for w in found] == pytest.approx(expected)
+
+
+def test_row_and_side_neighbours_of_each_tag(pages):
+    words = pages[0]
+    grid = WordGrid(words)
+    tags = [w for w in words if w[4].startswith('WPA')]
+    assert len(tags) == 12
+    for tag in tags:
+        same_row = [w for w in words if abs(w[1] - tag[1]) <= ROW_TOLERANCE]
+        assert grid.row(tag) == sorted(same_row, key=lambda w: (w[0], words.index(w)))
+        right = min((w for w in same_row if w[0] > tag[0] and w[0] - tag[0] < 150), key=lambda w: w[0])
+        assert grid.nearest_right(tag, 150) == right
+        assert right[4].isdigit()
+        left = grid.nearest_left(tag, 150, predicate=lambda w: w[4].isdigit())
+        assert left is not None and left[0] < tag[0] and left[4].isdigit()
+        assert grid.nearest_left(tag, 150, predicate=lambda w: w[4] == 'absent') is None
+
+
+def test_empty_grid():
+    grid = WordGrid([])
+    assert len(grid) == 0
+    assert grid.in_rect(0, 0, 100, 100) == [] and grid.nearest(0, 0) == []
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Lecture page par page: pages pdfplumber liberees, recherche dans le texte brut"""
+
+import gc
+import tracemalloc
+import weakref
+
+import pytest
+
+from conftest import build_parts_pdf
+from pdf_extraction.streaming import find_tags_in_raw_text, iter_pdfplumber_pages
+
+
+def _peak_kib(pdf: str) -> float:
+    """Pic d'allocation (KiB) pendant l'extraction des mots de toutes les pages"""
+    pytest.importorskip('pdfplumber')
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for page in iter_pdfplumber_pages(pdf):
+            page.extract_words()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def test_each_page_is_released_before_the_next(tmp_path):
+    pytest.importorskip('pdfplumber')
+    pdf = str(tmp_path / 'parts.pdf')
+    build_parts_pdf(pdf, pages=4)
+    seen = []
+    for page in iter_pdfplumber_pages(pdf):
+        page.extract_words()
+        seen.append(weakref.ref(page))
+        del page
+        gc.collect()
+        # La page precedente n'est plus referencee par le document
+        assert all(ref() is None for ref in seen[:-1])
+    gc.collect()
+    assert len(seen) == 4 and all(ref() is None for ref in seen)
+
+
+def test_peak_memory_does_not_grow_with_the_page_count(tmp_path):
+    short, long = str(tmp_path / 'short.pdf'), str(tmp_path / 'long.pdf')
+    build_parts_pdf(short, pages=4)
+    build_parts_pdf(long, pages=40)
+    # Sans liberation le pic suit le nombre de pages (x10 ici)
+    assert _peak_kib(long) < 3 * _peak_kib(short)
+
+
+def test_raw_text_search_is_a_case_insensitive_substring_search(tmp_path):
+    pdf = str(tmp_path / 'parts.pdf')
+    build_parts_pdf(pdf, pages=2)
+    found = find_tags_in_raw_text(pdf, ['wpa1300-0101', 'WPA1300-010', 'WPA1300-0113', 'M02 SHEET', 'WPA9999-0001'])
+    assert found == {'wpa1300-0101': [1], 'WPA1300-010': [1], 'WPA1300-0113': [2], 'M02 SHEET': [1, 2],
+                     'WPA9999-0001': []}
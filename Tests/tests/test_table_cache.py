@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Cache des tableaux par page: seules les pages jamais vues passent par le moteur"""
+
+import pytest
+
+from conftest import build_parts_pdf
+from pdf_extraction import table_cache
+from pdf_extraction.page_cache import PageCache
+
+pd = pytest.importorskip('pandas')
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    store = PageCache(str(tmp_path / 'tables.sqlite'), table='page_tables')
+    monkeypatch.setattr(table_cache, '_CACHE', store)
+    yield store
+    store.close()
+
+
+def _engine(calls):
+    """Moteur factice: un tableau par page paire, aucun sur les pages impaires"""
+    def read_pages(pages):
+        calls.append(list(pages))
+        return {p: [pd.DataFrame([[f"WPA1300-01{p:02d}", p], ['x', None]], columns=['tag', 'qty'])]
+                for p in pages if p % 2 == 0}
+    return read_pages
+
+
+def test_only_missing_pages_are_read(tmp_path, cache):
+    old, grown = str(tmp_path / 'old.pdf'), str(tmp_path / 'grown.pdf')
+    build_parts_pdf(old, pages=4)
+    build_parts_pdf(grown, pages=6)
+    calls = []
+    first = table_cache.cached_page_tables(old, 'fake', '1', {}, _engine(calls))
+    assert calls == [[1, 2, 3, 4]]
+    assert [df.iloc[0, 0] for df in first] == ['WPA1300-0102', 'WPA1300-0104']
+    assert (cache.hits, cache.misses) == (0, 4)
+
+    again = table_cache.cached_page_tables(old, 'fake', '1', {}, _engine(calls))
+    assert calls == [[1, 2, 3, 4]]
+    assert (cache.hits, cache.misses) == (4, 4)
+    # Pages relues depuis le JSON: memes colonnes et valeurs (NaN -> None)
+    assert [table_cache.frame_to_json(df) for df in again] == [table_cache.frame_to_json(df) for df in first]
+
+    # Memes 4 premieres pages dans une autre revision: seules 5 et 6 sont lues
+    table_cache.cached_page_tables(grown, 'fake', '1', {}, _engine(calls))
+    assert calls[-1] == [5, 6]
+    # Autre version ou autres reglages du moteur: cles distinctes
+    table_cache.cached_page_tables(old, 'fake', '2', {}, _engine(calls))
+    table_cache.cached_page_tables(old, 'fake', '1', {'flavor': 'lattice'}, _engine(calls))
+    assert calls[-2:] == [[1, 2, 3, 4], [1, 2, 3, 4]]
+
+
+def test_disabled_cache_reads_every_page(tmp_path, cache, monkeypatch):
+    pdf = str(tmp_path / 'parts.pdf')
+    build_parts_pdf(pdf, pages=2)
+    monkeypatch.setattr(table_cache, 'ENABLED', False)
+    calls = []
+    for _ in range(2):
+        table_cache.cached_page_tables(pdf, 'fake', '1', {}, _engine(calls))
+    assert calls == [[1, 2], [1, 2]]
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_tabula_json_table_to_frame():
+    table = {'page_number': 3, 'data': [[{'text': 'TAG'}, {'text': 'QTY'}],
+                                        [{'text': 'WPA1300-0101'}, {'text': '4'}],
+                                        [{'text': 'WPA1300-0102'}, {'text': ''}]]}
+    df = table_cache.tabula_frame(table)
+    assert df.columns.tolist() == ['TAG', 'QTY']
+    assert table_cache.frame_to_json(df)['rows'] == [['WPA1300-0101', '4'], ['WPA1300-0102', None]]
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""Index des tags alimente par l'extraction: une seule passe de couplage par page"""
+
+from pdf_extraction import proximity, tag_index
+from pdf_extraction.proximity import extract_proximity, extract_proximity_pages
+from pdf_extraction.streaming import iter_fitz_words
+from pdf_extraction.tag_index import TagIndex
+
+
+def test_cold_index_pairs_each_page_once(module_dir, tmp_path, monkeypatch):
+    calls = []
+    original = proximity.pair_page_words
+
+    def counting(words, grid=None):
+        calls.append(1)
+        return original(words, grid)
+
+    monkeypatch.setattr(proximity, 'pair_page_words', counting)
+    monkeypatch.setattr(tag_index, 'pair_page_words', counting)
+    pdf = module_dir['pdf']
+    with TagIndex(str(tmp_path / 'tag_index.sqlite')) as index:
+        extracted = extract_proximity_pages(index.indexing(pdf, iter_fitz_words(pdf)))
+        pages = len(calls)
+        assert pages == 6
+        # Index a jour: la couche passe telle quelle, couplee par l'extraction
+        assert extract_proximity_pages(index.indexing(pdf, iter_fitz_words(pdf))) == extracted
+        assert len(calls) == 2 * pages
+        hits = index.where('WPA1300-0105')
+    monkeypatch.undo()
+    assert extracted == extract_proximity(pdf) == module_dir['reference']
+    assert [(h['page'], h['qty']) for h in hits] == [(1, module_dir['reference']['WPA1300-0105'])]
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Grammaire des tags: formats qui se recouvrent, modes de recherche coherents"""
+
+import pytest
+
+from pdf_extraction.tags import TagFormat, compile_formats, find_tags, match_tag, normalize_tag, search_tag
+
+OVERLAPPING = [
+    TagFormat('xnrgy', r'[A-Z]{2,4}\d{3,4}[-_]\d{3,4}', 'dash'),
+    TagFormat('revised', r'[A-Z]{2,4}\d{3,4}-\d{3,4}-[A-Z]', 'compact'),
+]
+
+
+@pytest.mark.parametrize('text, name', [
+    ('WPA1300-0105', 'xnrgy'),
+    ('WPA1300_0105', 'xnrgy'),
+    ('WPA1300-0105-A', 'revised'),
+    ('wpa1300-0105-a', 'revised'),
+])
+def test_overlapping_formats_agree_across_modes(text, name):
+    pattern = compile_formats(OVERLAPPING)
+    assert pattern.match(text).lastgroup == name
+    assert pattern.search(f"QTY 4 {text} PANEL").lastgroup == name
+    assert pattern.fullmatch(text).lastgroup == name
+
+
+def test_declaration_order_does_not_change_the_format():
+    pattern = compile_formats(reversed(OVERLAPPING))
+    assert pattern.match('WPA1300-0105').lastgroup == 'xnrgy'
+    assert pattern.match('WPA1300-0105-A').lastgroup == 'revised'
+
+
+def test_longest_format_wins_and_suffixes_are_kept():
+    pattern = compile_formats(OVERLAPPING)
+    assert pattern.search('WPA1300-0105-A.dxf').lastgroup == 'revised'
+    assert pattern.search('WPA1300-0105_1.dxf').lastgroup == 'xnrgy'
+    assert pattern.search('WPA1300-0105_1.dxf').group() == 'WPA1300-0105'
+
+
+@pytest.mark.parametrize('text', ['WPA1300-0105_1.dxf', 'WPA1300-0105-A.dxf', 'WPA1300-0105-A', 'WPA1300-0105.dxf'])
+def test_suffixed_file_names_keep_their_tag(text):
+    assert search_tag(text) == 'WPA1300-0105'
+    assert match_tag(text) == 'WPA1300-0105'
+
+
+def test_find_tags_in_text():
+    assert find_tags('WPA1300-0105, wpa1300_0106') == ['WPA1300-0105', 'WPA1300-0106']
+
+
+def test_duplicate_format_names_are_rejected():
+    with pytest.raises(ValueError):
+        compile_formats(OVERLAPPING + OVERLAPPING[:1])
+
+
+def test_normalize_tag_uses_the_recognised_format():
+    assert normalize_tag('wpa1300_0105') == 'WPA1300-0105'
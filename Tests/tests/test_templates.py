@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Gabarits de liste de pieces: reutilises d'une page a l'autre, pages de suite sans entete"""
+
+import fitz
+import pytest
+
+from conftest import build_parts_pdf
+from pdf_extraction.templates import (QTY_HEADERS, TAG_HEADERS, TemplateCache, _page_lines, grid_pages,
+                                      header_column_pages)
+
+HEADERS = {'ITEM', 'TAG', 'QTY', 'DESCRIPTION'}
+
+
+@pytest.fixture(scope='module')
+def parts(tmp_path_factory):
+    pdf = str(tmp_path_factory.mktemp('templates') / 'parts.pdf')
+    reference = build_parts_pdf(pdf, pages=4)
+    with fitz.open(pdf) as doc:
+        pages = [(page.number + 1, page.get_text('words')) for page in doc]
+    return pages, reference
+
+
+def _cache():
+    return TemplateCache(QTY_HEADERS, TAG_HEADERS, max_lines=15)
+
+
+def test_template_detected_once_then_reused(parts):
+    pages, _ = parts
+    cache = _cache()
+    found = [cache.for_page(words, _page_lines(words)) for _, words in pages]
+    assert cache.stats == {'reused': 3, 'detected': 1, 'continuation': 0, 'none': 0}
+    assert len({id(template) for template, _ in found}) == 1
+    template, header_y = found[0]
+    assert template.qty_x == pytest.approx(203, abs=1)
+    assert {w[4] for w in _page_lines(pages[0][1])[header_y]} == HEADERS
+
+
+def test_same_header_lower_on_the_page_keeps_the_template(parts):
+    pages, _ = parts
+    cache = _cache()
+    first, _ = cache.for_page(pages[0][1], _page_lines(pages[0][1]))
+    shifted = [(w[0], w[1] + 60, w[2], w[3] + 60) + w[4:] for w in pages[1][1]]
+    template, header_y = cache.for_page(shifted, _page_lines(shifted))
+    assert template is first and header_y is not None
+    assert cache.stats['detected'] == 2 and cache.stats['reused'] == 0
+
+
+def test_page_without_header_continues_the_last_table(parts):
+    pages, reference = parts
+    headless = [(n, [w for w in words if w[4] not in HEADERS]) for n, words in pages]
+    cache = _cache()
+    cache.for_page(pages[0][1], _page_lines(pages[0][1]))
+    template, header_y = cache.for_page(headless[1][1], _page_lines(headless[1][1]))
+    assert template is not None and header_y is None
+    assert cache.stats['continuation'] == 1
+    # Sans tableau du tout: plus de gabarit courant
+    title_block = [w for w in pages[2][1] if w[0] >= 900]
+    assert cache.for_page(title_block, _page_lines(title_block)) == (None, None)
+    assert cache.stats['none'] == 1
+
+    pages_with_suite = [pages[0]] + headless[1:]
+    assert header_column_pages(pages_with_suite) == reference
+    assert grid_pages(pages_with_suite) == reference